@@ -4,15 +4,19 @@ from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
-from decouple import config
-from database import get_db, User
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from decouple import config, Csv
+from database import lookup_session, User
+from executors import run_cpu
 
 # Configuration
 SECRET_KEY = config("SECRET_KEY", default="your-secret-key-change-this-in-production")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 REFRESH_TOKEN_EXPIRE_DAYS = 7
+# Users allowed to manage global settings such as the categorization rules
+ADMIN_EMAILS = config("ADMIN_EMAILS", default="", cast=Csv())
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -64,36 +68,36 @@ def verify_token(token: str, token_type: str = "access") -> Optional[dict]:
         return None
 
 
-def get_user_by_email(db: Session, email: str) -> Optional[User]:
+async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
     """Get user by email."""
-    return db.query(User).filter(User.email == email).first()
+    return await db.scalar(select(User).where(User.email == email).limit(1))
 
 
-def get_user_by_username(db: Session, username: str) -> Optional[User]:
+async def get_user_by_username(db: AsyncSession, username: str) -> Optional[User]:
     """Get user by username."""
-    return db.query(User).filter(User.username == username).first()
+    return await db.scalar(select(User).where(User.username == username).limit(1))
 
 
-def get_user_by_id(db: Session, user_id: int) -> Optional[User]:
+async def get_user_by_id(db: AsyncSession, user_id: int) -> Optional[User]:
     """Get user by ID."""
-    return db.query(User).filter(User.id == user_id).first()
+    return await db.get(User, user_id)
 
 
-def authenticate_user(db: Session, email: str, password: str) -> Union[User, bool]:
-    """Authenticate a user."""
-    user = get_user_by_email(db, email)
+async def authenticate_user(db: AsyncSession, email: str, password: str) -> Union[User, bool]:
+    """Authenticate a user; bcrypt runs in the CPU pool."""
+    user = await get_user_by_email(db, email)
     if not user:
         return False
-    if not verify_password(password, user.hashed_password):
+    if not await run_cpu(verify_password, password, user.hashed_password):
         return False
     return user
 
 
-def create_user(
-    db: Session, email: str, username: str, password: str, full_name: str = None
+async def create_user(
+    db: AsyncSession, email: str, username: str, password: str, full_name: str = None
 ) -> User:
-    """Create a new user."""
-    hashed_password = get_password_hash(password)
+    """Create a new user; bcrypt runs in the CPU pool."""
+    hashed_password = await run_cpu(get_password_hash, password)
     db_user = User(
         email=email,
         username=username,
@@ -101,16 +105,21 @@ def create_user(
         hashed_password=hashed_password,
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     return db_user
 
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db),
 ) -> User:
-    """Get the current authenticated user."""
+    """
+    Get the current authenticated user.
+
+    The user is loaded in a session of its own that is closed before the
+    endpoint runs, so the returned instance is detached; endpoints that
+    change it load it into their own session.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -130,7 +139,8 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
 
-    user = get_user_by_id(db, user_id=int(user_id))
+    async with lookup_session() as db:
+        user = await get_user_by_id(db, user_id=int(user_id))
     if user is None:
         raise credentials_exception
 
@@ -144,3 +154,14 @@ async def get_current_active_user(
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
+
+
+async def get_current_admin_user(
+    current_user: User = Depends(get_current_active_user),
+) -> User:
+    """Get the current user, requiring admin rights."""
+    if current_user.email not in ADMIN_EMAILS:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required"
+        )
+    return current_user
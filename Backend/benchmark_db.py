@@ -0,0 +1,151 @@
+"""
+Compare API throughput on the sync and async database engines.
+
+Starts the API under uvicorn once per DATABASE_URL, seeds one user with
+transactions, then has many concurrent clients hit the read endpoints
+that use the async session.
+
+Usage:
+    python benchmark_db.py --clients 200 --duration 10
+    python benchmark_db.py --url postgresql://u:p@host/db --url postgresql+asyncpg://u:p@host/db
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+ENDPOINTS = ("/api/transactions", "/api/dashboard/stats", "/api/auth/me")
+
+
+def _seed_csv(rows: int) -> bytes:
+    lines = ["date,description,amount,account"]
+    for i in range(rows):
+        lines.append(f"2025-{i % 12 + 1:02d}-{i % 28 + 1:02d},Purchase {i},-{i % 500 + 1}.25,Checking")
+    return "\n".join(lines).encode()
+
+
+def _start_server(url: str, port: int, workdir: str) -> subprocess.Popen:
+    env = dict(os.environ, DATABASE_URL=url, IMPORT_JOB_DIR=os.path.join(workdir, "imports"))
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env,
+    )
+
+
+async def _wait_ready(
+    client: httpx.AsyncClient, server: subprocess.Popen, timeout: float = 30
+) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline and server.poll() is None:
+        try:
+            if (await client.get("/")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+
+async def _login_and_seed(client: httpx.AsyncClient, rows: int) -> dict:
+    user = {"email": "bench@example.com", "username": "bench", "password": "benchpass"}
+    await client.post("/api/auth/register", json=user)
+    token = (
+        await client.post(
+            "/api/auth/login", json={"email": user["email"], "password": user["password"]}
+        )
+    ).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    await client.post(
+        "/api/upload",
+        files={"file": ("seed.csv", _seed_csv(rows), "text/csv")},
+        headers=headers,
+    )
+    return headers
+
+
+async def _client(client, headers, deadline, latencies, errors, index) -> None:
+    path = ENDPOINTS[index % len(ENDPOINTS)]
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        try:
+            response = await client.get(path, headers=headers)
+            ok = response.status_code == 200
+        except httpx.HTTPError:
+            ok = False
+        if ok:
+            latencies.append(time.perf_counter() - start)
+        else:
+            errors.append(path)
+
+
+async def run(url: str, port: int, clients: int, duration: float, rows: int) -> dict:
+    """Benchmark one DATABASE_URL; returns requests/second and latency percentiles."""
+    with tempfile.TemporaryDirectory() as workdir:
+        if url.startswith("sqlite") and ":memory:" not in url:
+            # Fresh database file per run
+            url = url.split(":///")[0] + ":///" + os.path.join(workdir, "bench.db")
+        server = _start_server(url, port, workdir)
+        limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+        try:
+            async with httpx.AsyncClient(
+                base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60
+            ) as client:
+                await _wait_ready(client, server)
+                headers = await _login_and_seed(client, rows)
+
+                latencies, errors = [], []
+                started = time.monotonic()
+                deadline = started + duration
+                await asyncio.gather(
+                    *(
+                        _client(client, headers, deadline, latencies, errors, i)
+                        for i in range(clients)
+                    )
+                )
+                elapsed = time.monotonic() - started
+        finally:
+            server.terminate()
+            server.wait()
+
+    latencies.sort()
+    return {
+        "url": url.split("://")[0],
+        "requests_per_second": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 1) if latencies else None,
+        "p99_ms": round(latencies[int(len(latencies) * 0.99)] * 1000, 1) if latencies else None,
+        "errors": len(errors),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument(
+        "--url",
+        action="append",
+        help="DATABASE_URL to benchmark (repeatable; default: sqlite and sqlite+aiosqlite)",
+    )
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--rows", type=int, default=200, help="Transactions seeded for the user")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    urls = args.url or ["sqlite:///bench.db", "sqlite+aiosqlite:///bench.db"]
+    for url in urls:
+        result = asyncio.run(run(url, args.port, args.clients, args.duration, args.rows))
+        print(
+            f"{result['url']:<24} {result['requests_per_second']:>9} req/s  "
+            f"p50 {result['p50_ms']} ms  p99 {result['p99_ms']} ms  errors {result['errors']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Bulk write path for imported transactions."""
+
+import csv
+import io
+
+import pandas as pd
+from decouple import config
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from database import Transaction, bump_data_version, relax_sqlite_sync
+from search import deferred_search_index
+
+# Rows sent per executemany batch / COPY chunk
+BULK_INSERT_BATCH_SIZE = config("BULK_INSERT_BATCH_SIZE", default=10000, cast=int)
+
+INSERT_COLUMNS = [
+    "id", "user_id", "date", "description", "category", "amount", "type", "status", "account",
+    "fingerprint", "needs_review",
+]
+
+
+# Storage format of SQLAlchemy's SQLite DateTime type
+_SQLITE_DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+
+def _columns(frame: pd.DataFrame) -> list:
+    """Each column as an object array of plain Python values."""
+    return [frame[name].to_numpy(dtype=object) for name in INSERT_COLUMNS]
+
+
+def _insert_batch(db: Session, frame: pd.DataFrame) -> None:
+    """Insert one batch with a Core executemany."""
+    frame = frame.assign(date=frame["date"].astype(object))
+    db.execute(
+        insert(Transaction.__table__),
+        [dict(zip(INSERT_COLUMNS, row)) for row in zip(*_columns(frame))],
+    )
+
+
+def _sqlite_batch(db: Session, frame: pd.DataFrame) -> None:
+    """
+    Insert one batch straight through the sqlite3 driver.
+
+    Dates are pre-rendered in the DateTime type's storage format, which
+    skips SQLAlchemy's per-row parameter processing.
+    """
+    frame = frame.assign(date=frame["date"].dt.strftime(_SQLITE_DATETIME_FORMAT))
+    placeholders = ", ".join("?" * len(INSERT_COLUMNS))
+    db.connection().exec_driver_sql(
+        f"INSERT INTO {Transaction.__tablename__} ({', '.join(INSERT_COLUMNS)}) "
+        f"VALUES ({placeholders})",
+        list(zip(*_columns(frame))),
+    )
+
+
+def _copy_batch(db: Session, frame: pd.DataFrame) -> None:
+    """Stream one batch through PostgreSQL ``COPY FROM STDIN``."""
+    buffer = io.StringIO()
+    # Missing values are written as \N so that empty strings stay empty
+    # strings; in CSV format COPY otherwise reads an empty field as NULL
+    frame.to_csv(buffer, index=False, header=False, quoting=csv.QUOTE_MINIMAL, na_rep="\\N")
+    buffer.seek(0)
+    columns = ", ".join(INSERT_COLUMNS)
+    # The session's own connection, so COPY joins the open transaction
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {Transaction.__tablename__} ({columns}) FROM STDIN "
+            "WITH (FORMAT csv, NULL '\\N')",
+            buffer,
+        )
+    finally:
+        cursor.close()
+
+
+def insert_transactions(
+    db: Session,
+    frame: pd.DataFrame,
+    user_id: int,
+    batch_size: int = BULK_INSERT_BATCH_SIZE,
+) -> int:
+    """
+    Insert parsed transactions without building ORM objects.
+
+    PostgreSQL rows are streamed with ``COPY``, SQLite rows go through a
+    driver-level executemany and other databases get Core ``insert()``
+    executemany batches. Nothing is committed here, so the
+    caller decides the transaction boundary. SQLite rows are added to the
+    search index in one statement after the last batch, and the user's
+    data version is bumped in the same transaction.
+
+    Args:
+        db: Database session
+        frame: Rows with id, date, description, category, amount, type
+            and account columns, and optionally fingerprint and needs_review
+        user_id: Owner of the rows
+        batch_size: Rows per batch
+
+    Returns:
+        Number of rows inserted
+    """
+    if frame.empty:
+        return 0
+
+    if "fingerprint" not in frame:
+        frame = frame.assign(fingerprint=None)
+    if "needs_review" not in frame:
+        frame = frame.assign(needs_review=False)
+    frame = frame.assign(needs_review=frame["needs_review"].astype(bool))
+    frame = frame.assign(user_id=user_id, status="completed")[INSERT_COLUMNS]
+    write_batch = {
+        "postgresql": _copy_batch,
+        "sqlite": _sqlite_batch,
+    }.get(db.get_bind().dialect.name, _insert_batch)
+    if write_batch is _sqlite_batch:
+        relax_sqlite_sync(db)
+
+    with deferred_search_index(db):
+        for start in range(0, len(frame), batch_size):
+            write_batch(db, frame.iloc[start:start + batch_size])
+    db.execute(bump_data_version(user_id))
+
+    return len(frame)
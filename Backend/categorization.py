@@ -1,147 +1,611 @@
-# Add this to a new file: Backend/categorization.py
+"""Keyword, model and blended categorization of transactions."""
 
+import argparse
+import hashlib
+import json
+import os
 import re
-from typing import Tuple, Optional
-
-# Keyword-based categorization rules
-CATEGORY_KEYWORDS = {
-    # Food & Dining
-    "Food & Dining": [
-        "restaurant", "cafe", "coffee", "starbucks", "mcdonald", "burger",
-        "pizza", "food", "dining", "lunch", "dinner", "breakfast", "eatery",
-        "bistro", "grill", "kitchen", "bar", "pub", "diner", "fast food"
-    ],
-    "Groceries": [
-        "grocery", "supermarket", "walmart", "target", "costco", "whole foods",
-        "trader joe", "safeway", "kroger", "publix", "market", "food store",
-        "aldi", "lidl", "fresh", "organic"
-    ],
-    
-    # Housing
-    "Housing": [
-        "furniture", "home depot", "ikea", "bed bath", "lowes", "hardware",
-        "home improvement", "decor", "furnishing"
-    ],
-    "Rent/Mortgage": [
-        "rent", "mortgage", "lease", "housing payment", "property management",
-        "landlord", "rental"
-    ],
-    "Utilities": [
-        "electric", "electricity", "water", "gas utility", "power", "energy",
-        "utility", "sewage", "trash", "waste management", "internet", "wifi",
-        "broadband", "comcast", "verizon", "at&t", "spectrum"
-    ],
-    
-    # Transportation
-    "Transportation": [
-        "uber", "lyft", "taxi", "cab", "rideshare", "car rental", "hertz",
-        "enterprise", "parking", "toll", "metro", "subway"
-    ],
-    "Gas/Fuel": [
-        "gas station", "fuel", "shell", "chevron", "exxon", "bp", "mobil",
-        "petrol", "gasoline", "diesel"
-    ],
-    "Public Transport": [
-        "bus", "train", "metro", "subway", "transit", "railway", "amtrak",
-        "public transport", "mta", "bart"
-    ],
-    
-    # Healthcare
-    "Healthcare": [
-        "hospital", "clinic", "doctor", "medical", "health", "pharmacy",
-        "cvs", "walgreens", "prescription", "medicine", "dental", "dentist",
-        "physician", "healthcare", "urgent care", "emergency"
-    ],
-    "Insurance": [
-        "insurance", "premium", "policy", "coverage", "geico", "state farm",
-        "allstate", "progressive", "health insurance", "life insurance"
-    ],
-    
-    # Entertainment
-    "Entertainment": [
-        "netflix", "hulu", "disney", "spotify", "apple music", "amazon prime",
-        "movie", "cinema", "theater", "theatre", "concert", "show", "game",
-        "entertainment", "amusement", "fun", "recreation", "steam", "playstation",
-        "xbox", "nintendo"
-    ],
-    
-    # Shopping
-    "Shopping": [
-        "amazon", "ebay", "shop", "store", "retail", "purchase", "buy",
-        "shopping", "mall", "outlet", "online"
-    ],
-    "Clothing": [
-        "clothing", "apparel", "fashion", "nike", "adidas", "h&m", "zara",
-        "gap", "uniqlo", "shoes", "shirt", "pants", "dress", "suit"
-    ],
-    "Personal Care": [
-        "salon", "spa", "barber", "haircut", "beauty", "cosmetic", "makeup",
-        "skincare", "massage", "manicure", "pedicure", "grooming"
-    ],
-    
-    # Education
-    "Education": [
-        "school", "university", "college", "tuition", "course", "class",
-        "education", "learning", "training", "books", "textbook", "academic",
-        "udemy", "coursera", "edx"
-    ],
-    
-    # Travel
-    "Travel": [
-        "hotel", "motel", "airbnb", "booking", "flight", "airline", "airport",
-        "travel", "vacation", "trip", "resort", "accommodation", "hilton",
-        "marriott", "expedia", "delta", "united", "american airlines"
-    ],
-    
-    # Subscriptions
-    "Subscriptions": [
-        "subscription", "monthly", "membership", "gym", "fitness", "planet fitness",
-        "24 hour fitness", "la fitness", "crunch", "yoga", "peloton"
-    ],
-    
-    # Other Expense Categories
-    "Gifts & Donations": [
-        "gift", "donation", "charity", "nonprofit", "fundraiser", "contribution",
-        "present", "flowers", "red cross", "salvation army"
-    ],
-    "Fees & Charges": [
-        "fee", "charge", "atm", "bank fee", "service charge", "processing fee",
-        "late fee", "overdraft", "penalty"
-    ],
-    "Taxes": [
-        "tax", "irs", "federal tax", "state tax", "property tax", "income tax",
-        "sales tax", "customs", "duty"
-    ],
-    
-    # Income Categories
-    "Salary": [
-        "salary", "payroll", "wages", "paycheck", "employer", "payment from",
-        "income", "earnings", "compensation"
-    ],
-    "Freelance": [
-        "freelance", "consulting", "contractor", "upwork", "fiverr", "project payment",
-        "client payment", "invoice"
-    ],
-    "Business": [
-        "business income", "sales", "revenue", "customer payment", "service fee"
-    ],
-    "Investment": [
-        "dividend", "stock", "investment", "capital gain", "portfolio",
-        "trading", "etrade", "robinhood", "fidelity", "vanguard", "schwab"
-    ],
-    "Rental Income": [
-        "rental income", "rent received", "property income", "tenant payment"
-    ],
-    "Interest": [
-        "interest", "savings interest", "bank interest", "apy", "yield"
-    ],
-    "Bonus": [
-        "bonus", "incentive", "commission", "performance pay", "reward"
-    ],
-    "Refund": [
-        "refund", "reimbursement", "credit", "return", "cashback", "rebate"
-    ],
-}
+import threading
+import time
+from collections import OrderedDict, deque
+from functools import partial
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from decouple import config
+
+from executors import cpu_pool
+
+# Parallel categorization settings; chunks run in the shared CPU pool
+CATEGORIZATION_CHUNK_SIZE = config("CATEGORIZATION_CHUNK_SIZE", default=5000, cast=int)
+# Below this many rows the IPC overhead outweighs the parallel speedup
+CATEGORIZATION_PARALLEL_THRESHOLD = config(
+    "CATEGORIZATION_PARALLEL_THRESHOLD", default=20000, cast=int
+)
+
+# Categorization engine: "keyword", "model" or "blend"
+CATEGORIZATION_ENGINE = config("CATEGORIZATION_ENGINE", default="keyword")
+# Share of the model probability in the blended confidence
+CATEGORIZATION_MODEL_WEIGHT = config("CATEGORIZATION_MODEL_WEIGHT", default=0.5, cast=float)
+
+# Maximum number of normalized texts kept in the categorization cache
+CATEGORIZATION_CACHE_SIZE = config("CATEGORIZATION_CACHE_SIZE", default=50000, cast=int)
+
+# Keyword-based categorization rules live in a data file; a compiled,
+# versioned matcher artifact is cached next to it for fast worker startup.
+# Artifacts are plain JSON, so a writable directory cannot inject code.
+_MODULE_DIR = os.path.dirname(os.path.abspath(__file__))
+CATEGORY_RULES_PATH = config(
+    "CATEGORY_RULES_PATH", default=os.path.join(_MODULE_DIR, "category_rules.json")
+)
+CATEGORY_RULES_ARTIFACT_DIR = config(
+    "CATEGORY_RULES_ARTIFACT_DIR", default=os.path.join(_MODULE_DIR, "rules")
+)
+# Seconds between checks for a rule file swapped in by another worker
+CATEGORY_RULES_RELOAD_INTERVAL = config(
+    "CATEGORY_RULES_RELOAD_INTERVAL", default=5.0, cast=float
+)
+_ARTIFACT_FORMAT = 2
+
+
+def load_rule_table(path: str = CATEGORY_RULES_PATH) -> Tuple[str, Dict[str, List[str]]]:
+    """
+    Read a keyword rule table from disk.
+
+    Args:
+        path: JSON file with a "categories" object of category -> keywords
+
+    Returns:
+        Tuple of (version, keyword table); the version is a content hash
+    """
+    with open(path, "r", encoding="utf-8") as handle:
+        table = json.load(handle)["categories"]
+    return rule_table_version(table), table
+
+
+def rule_table_version(table: Dict[str, List[str]]) -> str:
+    """Return the content-hash version of a keyword rule table."""
+    canonical = json.dumps(table, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:12]
+
+
+RULES_VERSION, CATEGORY_KEYWORDS = load_rule_table()
+
+
+# Income category keywords indicate income regardless of amount
+INCOME_CATEGORIES = ["Salary", "Freelance", "Business", "Investment",
+                     "Rental Income", "Interest", "Bonus", "Refund"]
+
+
+def _is_word_char(char: str) -> bool:
+    """Mirror the regex ``\\w`` class so boundaries match ``re`` exactly."""
+    return char.isalnum() or char == "_"
+
+
+class KeywordMatcher:
+    """
+    Aho-Corasick automaton over every keyword in a category table.
+
+    A single pass over the lowercased text reports each keyword that occurs
+    as a substring, and whether at least one occurrence sits on word
+    boundaries. Scoring on top of that reproduces the per-keyword
+    ``in`` check plus ``re.search(r'\\b...\\b')`` bonus exactly.
+    """
+
+    def __init__(self, keyword_table: Dict[str, List[str]]):
+        self.categories: List[str] = list(keyword_table)
+        self.patterns: List[str] = []
+        # pattern index -> category indices (repeated if a category lists a
+        # keyword twice, so its score is counted twice as before)
+        self.postings: List[List[int]] = []
+
+        pattern_ids: Dict[str, int] = {}
+        for category_index, keywords in enumerate(keyword_table.values()):
+            for keyword in keywords:
+                keyword = keyword.lower()
+                if not keyword:
+                    continue
+                if keyword not in pattern_ids:
+                    pattern_ids[keyword] = len(self.patterns)
+                    self.patterns.append(keyword)
+                    self.postings.append([])
+                self.postings[pattern_ids[keyword]].append(category_index)
+
+        self._build()
+
+    def _build(self) -> None:
+        goto: List[Dict[str, int]] = [{}]
+        output: List[List[int]] = [[]]
+
+        for pattern_index, pattern in enumerate(self.patterns):
+            state = 0
+            for char in pattern:
+                next_state = goto[state].get(char)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][char] = next_state
+                    goto.append({})
+                    output.append([])
+                state = next_state
+            output[state].append(pattern_index)
+
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in goto[state].items():
+                queue.append(next_state)
+                fallback = fail[state]
+                while fallback and char not in goto[fallback]:
+                    fallback = fail[fallback]
+                fail[next_state] = goto[fallback].get(char, 0)
+                if fail[next_state] == next_state:
+                    fail[next_state] = 0
+                output[next_state] = output[next_state] + output[fail[next_state]]
+
+        self._goto = goto
+        self._fail = fail
+        self._output = output
+        self._prepare()
+
+    def _prepare(self) -> None:
+        self._lengths = [len(pattern) for pattern in self.patterns]
+        self._starts_word = [_is_word_char(p[0]) for p in self.patterns]
+        self._ends_word = [_is_word_char(p[-1]) for p in self.patterns]
+        self._weights: Optional[np.ndarray] = None
+        self._points: Optional[np.ndarray] = None
+
+    def to_artifact(self) -> dict:
+        """Return the compiled automaton as JSON-serializable data."""
+        return {
+            "categories": self.categories,
+            "patterns": self.patterns,
+            "postings": self.postings,
+            "goto": self._goto,
+            "fail": self._fail,
+            "output": self._output,
+        }
+
+    @classmethod
+    def from_artifact(cls, data: dict) -> "KeywordMatcher":
+        """
+        Rebuild a matcher from ``to_artifact`` data without recompiling.
+
+        Raises:
+            ValueError: If the data is not a consistent automaton
+        """
+        matcher = cls.__new__(cls)
+        try:
+            matcher.categories = [str(category) for category in data["categories"]]
+            matcher.patterns = [str(pattern) for pattern in data["patterns"]]
+            matcher.postings = [[int(index) for index in posting] for posting in data["postings"]]
+            matcher._goto = [
+                {str(char): int(state) for char, state in edges.items()} for edges in data["goto"]
+            ]
+            matcher._fail = [int(state) for state in data["fail"]]
+            matcher._output = [[int(index) for index in indices] for indices in data["output"]]
+        except (KeyError, TypeError, AttributeError) as e:
+            raise ValueError("Malformed matcher artifact") from e
+
+        states, patterns = len(matcher._goto), len(matcher.patterns)
+        if (
+            len(matcher.postings) != patterns
+            or len(matcher._fail) != states
+            or len(matcher._output) != states
+            or not all(0 <= state < states for edges in matcher._goto for state in edges.values())
+            or not all(0 <= state < states for state in matcher._fail)
+            or not all(0 <= index < patterns for indices in matcher._output for index in indices)
+            or not all(
+                0 <= index < len(matcher.categories)
+                for posting in matcher.postings
+                for index in posting
+            )
+            or not all(matcher.patterns)
+        ):
+            raise ValueError("Malformed matcher artifact")
+        matcher._prepare()
+        return matcher
+
+    def scan(self, text: str) -> Dict[int, bool]:
+        """
+        Find every keyword in ``text`` in one pass.
+
+        Args:
+            text: Lowercased text to search
+
+        Returns:
+            Dict of pattern index -> True if any occurrence is word-bounded
+        """
+        goto, fail, output = self._goto, self._fail, self._output
+        hits: Dict[int, bool] = {}
+        state = 0
+        last = len(text) - 1
+
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+
+            for pattern_index in output[state]:
+                if hits.get(pattern_index):
+                    continue
+                start = position - self._lengths[pattern_index] + 1
+                before = start > 0 and _is_word_char(text[start - 1])
+                after = position < last and _is_word_char(text[position + 1])
+                hits[pattern_index] = (
+                    before != self._starts_word[pattern_index]
+                    and after != self._ends_word[pattern_index]
+                )
+
+        return hits
+
+    def scan_many(self, texts) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Scan a batch of texts and return the hits in coordinate form.
+
+        Args:
+            texts: Iterable of lowercased texts
+
+        Returns:
+            Tuple of (row indices, pattern indices, word-bounded flags)
+        """
+        rows: List[int] = []
+        patterns: List[int] = []
+        bounded: List[bool] = []
+
+        for row, text in enumerate(texts):
+            for pattern_index, is_bounded in self.scan(text).items():
+                rows.append(row)
+                patterns.append(pattern_index)
+                bounded.append(is_bounded)
+
+        return (
+            np.asarray(rows, dtype=np.intp),
+            np.asarray(patterns, dtype=np.intp),
+            np.asarray(bounded, dtype=bool),
+        )
+
+    def score_matrix(self, texts) -> np.ndarray:
+        """
+        Score a batch of texts against every category at once.
+
+        Args:
+            texts: Sequence of lowercased texts
+
+        Returns:
+            Integer matrix of shape (len(texts), len(categories))
+        """
+        if self._weights is None:
+            # pattern x category posting counts
+            weights = np.zeros((len(self.patterns), len(self.categories)), dtype=np.int64)
+            for pattern_index, category_indices in enumerate(self.postings):
+                for category_index in category_indices:
+                    weights[pattern_index, category_index] += 1
+            self._weights = weights
+            self._points = np.asarray(self._lengths, dtype=np.int64) * 2
+
+        rows, patterns, bounded = self.scan_many(texts)
+        points = self._points[patterns] + np.where(bounded, 10, 0)
+
+        scores = np.zeros((len(texts), len(self.categories)), dtype=np.int64)
+        np.add.at(scores, rows, self._weights[patterns] * points[:, None])
+        return scores
+
+    def score(self, text: str) -> Dict[str, int]:
+        """
+        Score every category against ``text``.
+
+        Args:
+            text: Lowercased text to search
+
+        Returns:
+            Dict of category -> raw score, in table order, non-zero only
+        """
+        scores = [0] * len(self.categories)
+        for pattern_index, bounded in self.scan(text).items():
+            # Longer keyword matches get higher scores, exact word match gets bonus
+            points = self._lengths[pattern_index] * 2 + (10 if bounded else 0)
+            for category_index in self.postings[pattern_index]:
+                scores[category_index] += points
+
+        return {
+            self.categories[index]: score
+            for index, score in enumerate(scores)
+            if score > 0
+        }
+
+
+class CategorizationCache:
+    """Thread-safe bounded LRU of categorization results with usage counters."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data: "OrderedDict[tuple, Tuple[str, str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> Optional[Tuple[str, str, float]]:
+        with self._lock:
+            result = self._data.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, key: tuple, result: Tuple[str, str, float]) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = result
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+# (rules version, matcher) replaced as one value, so a reader never pairs a
+# matcher with the version of other rules
+_matcher: Optional[Tuple[str, KeywordMatcher]] = None
+_matcher_lock = threading.Lock()
+_cache = CategorizationCache(CATEGORIZATION_CACHE_SIZE)
+
+_DATE_PATTERN = re.compile(r"\b\d{1,4}[/.-]\d{1,2}(?:[/.-]\d{1,4})?\b")
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+_next_rules_check = 0.0
+_rules_mtime: Optional[int] = None
+
+
+def _compile_digits_pattern(table: Dict[str, List[str]]) -> re.Pattern:
+    """
+    Pattern of the digit runs normalization masks.
+
+    Numbers that are part of a keyword (e.g. "24 hour fitness") survive
+    normalization; every other digit run is masked to a single "0" so word
+    boundaries around it are unchanged.
+    """
+    protected = sorted(
+        {
+            digits
+            for keywords in table.values()
+            for keyword in keywords
+            for digits in re.findall(r"\d+", keyword)
+        },
+        key=len,
+        reverse=True,
+    )
+    if not protected:
+        return re.compile(r"\d+")
+    alternatives = "|".join(protected)
+    return re.compile(rf"(?<!\d)(?!(?:{alternatives})(?!\d))\d+")
+
+
+_digits_pattern = _compile_digits_pattern(CATEGORY_KEYWORDS)
+
+
+def _check_rules_if_due() -> None:
+    if time.monotonic() >= _next_rules_check:
+        _check_rules_file()
+
+
+def _versioned_matcher() -> Tuple[str, KeywordMatcher]:
+    """Return (rules version, matcher), loading or compiling the current rules on first use."""
+    global _matcher
+    _check_rules_if_due()
+    loaded = _matcher
+    if loaded is None:
+        with _matcher_lock:
+            if _matcher is None:
+                _matcher = (
+                    RULES_VERSION,
+                    _load_or_compile_matcher(CATEGORY_KEYWORDS, RULES_VERSION),
+                )
+            loaded = _matcher
+    return loaded
+
+
+def get_matcher() -> KeywordMatcher:
+    """Return the shared matcher, loading or compiling the current rules on first use."""
+    return _versioned_matcher()[1]
+
+
+def reset_matcher() -> None:
+    """Drop the compiled matcher and cached results after a rule table change."""
+    global _matcher
+    with _matcher_lock:
+        _matcher = None
+    # Entries are keyed by rules version, so a result a racing thread
+    # stores after this still can't be served for the new rules
+    _cache.clear()
+
+
+def get_rules_version() -> str:
+    """Return the version of the keyword rules currently in use."""
+    get_matcher()
+    return RULES_VERSION
+
+
+def get_rule_table() -> Tuple[str, Dict[str, List[str]]]:
+    """Return the (version, keyword table) currently in use."""
+    get_matcher()
+    return RULES_VERSION, CATEGORY_KEYWORDS
+
+
+def _artifact_path(version: str) -> str:
+    return os.path.join(CATEGORY_RULES_ARTIFACT_DIR, f"matcher-{version}.json")
+
+
+def compile_rules_artifact(
+    table: Dict[str, List[str]],
+    version: Optional[str] = None,
+) -> str:
+    """
+    Compile a rule table into a serialized matcher artifact.
+
+    Args:
+        table: Keyword rule table
+        version: Table version (computed if omitted)
+
+    Returns:
+        Path of the written artifact
+    """
+    version = version or rule_table_version(table)
+    path = _artifact_path(version)
+    os.makedirs(CATEGORY_RULES_ARTIFACT_DIR, exist_ok=True)
+
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "w", encoding="utf-8") as handle:
+        json.dump(
+            {
+                "format": _ARTIFACT_FORMAT,
+                "version": version,
+                "matcher": KeywordMatcher(table).to_artifact(),
+            },
+            handle,
+            ensure_ascii=False,
+            separators=(",", ":"),
+        )
+    os.replace(temporary, path)
+    return path
+
+
+def _load_or_compile_matcher(table: Dict[str, List[str]], version: str) -> KeywordMatcher:
+    path = _artifact_path(version)
+    try:
+        with open(path, "r", encoding="utf-8") as handle:
+            artifact = json.load(handle)
+        if artifact.get("format") == _ARTIFACT_FORMAT and artifact.get("version") == version:
+            return KeywordMatcher.from_artifact(artifact["matcher"])
+    except (OSError, ValueError, AttributeError):
+        # Missing, stale or corrupt: compile from the rule table instead
+        pass
+
+    try:
+        compile_rules_artifact(table, version)
+    except OSError:
+        # A read-only deployment still works, it just compiles per process
+        pass
+    return KeywordMatcher(table)
+
+
+def _apply_rule_table(table: Dict[str, List[str]], version: str) -> None:
+    global CATEGORY_KEYWORDS, RULES_VERSION, _digits_pattern, _matcher
+    with _matcher_lock:
+        CATEGORY_KEYWORDS = table
+        RULES_VERSION = version
+        _digits_pattern = _compile_digits_pattern(table)
+        _matcher = None
+    _cache.clear()
+
+
+def _check_rules_file() -> None:
+    """Pick up a rule file swapped in by another worker."""
+    global _next_rules_check, _rules_mtime
+    _next_rules_check = time.monotonic() + CATEGORY_RULES_RELOAD_INTERVAL
+    try:
+        modified = os.stat(CATEGORY_RULES_PATH).st_mtime_ns
+    except OSError:
+        return
+    if modified == _rules_mtime:
+        return
+
+    _rules_mtime = modified
+    try:
+        version, table = load_rule_table()
+    except (OSError, ValueError, KeyError):
+        return
+    if version != RULES_VERSION:
+        _apply_rule_table(table, version)
+
+
+def update_rule_table(table: Dict[str, List[str]]) -> str:
+    """
+    Replace the keyword rules for every worker without a restart.
+
+    The artifact is compiled first and the rule file is swapped in
+    atomically; this process switches immediately and other workers follow
+    within CATEGORY_RULES_RELOAD_INTERVAL seconds.
+
+    Args:
+        table: New keyword rule table
+
+    Returns:
+        Version of the new rules
+    """
+    global _rules_mtime
+    version = rule_table_version(table)
+    compile_rules_artifact(table, version)
+
+    temporary = f"{CATEGORY_RULES_PATH}.{os.getpid()}.tmp"
+    with open(temporary, "w", encoding="utf-8") as handle:
+        json.dump({"categories": table}, handle, indent=2, ensure_ascii=False)
+        handle.write("\n")
+    os.replace(temporary, CATEGORY_RULES_PATH)
+
+    _rules_mtime = os.stat(CATEGORY_RULES_PATH).st_mtime_ns
+    _apply_rule_table(table, version)
+    return version
+
+
+def get_cache_stats() -> dict:
+    """Return hit/miss/eviction counters for the categorization cache."""
+    return _cache.stats()
+
+
+def normalize_transaction_text(description: str, merchant: Optional[str] = None) -> str:
+    """
+    Normalize description and merchant into the text used for matching.
+
+    Dates are dropped, volatile numbers (store numbers, card suffixes,
+    reference ids) are masked and whitespace is collapsed, so repeated
+    charges from the same merchant share one cache entry. Keywords are
+    matched against this text as well, so a multi-word keyword also
+    matches across a run of spaces ("fast  food" matches "fast food").
+
+    Args:
+        description: Transaction description
+        merchant: Optional merchant name
+
+    Returns:
+        Lowercased, normalized search text
+    """
+    _check_rules_if_due()
+    text = f"{description} {merchant or ''}".lower()
+    text = _DATE_PATTERN.sub(" ", text)
+    text = _digits_pattern.sub("0", text)
+    return _WHITESPACE_PATTERN.sub(" ", text).strip()
+
+
+def _normalize_text_series(text: pd.Series) -> pd.Series:
+    """Vectorized ``normalize_transaction_text`` over an already joined column."""
+    _check_rules_if_due()
+    return (
+        text.str.lower()
+        .str.replace(_DATE_PATTERN, " ", regex=True)
+        .str.replace(_digits_pattern, "0", regex=True)
+        .str.replace(_WHITESPACE_PATTERN, " ", regex=True)
+        .str.strip()
+    )
 
 
 def auto_categorize_transaction(
@@ -161,39 +625,39 @@ def auto_categorize_transaction(
         Tuple of (category, transaction_type, confidence_score)
     """
     # Combine description and merchant for better matching
-    search_text = f"{description} {merchant or ''}".lower()
-    
+    version, matcher = _versioned_matcher()
+    search_text = normalize_transaction_text(description, merchant)
+
+    # Repeated merchants are served from the cache; the amount sign is part
+    # of the key because it decides the default transaction type, and the
+    # rules version because a rule swap may race with this call
+    cache_key = (version, search_text, amount < 0)
+    cached = _cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    result = _score_text(matcher, search_text, amount)
+    _cache.put(cache_key, result)
+    return result
+
+
+def _score_text(
+    matcher: KeywordMatcher, search_text: str, amount: float
+) -> Tuple[str, str, float]:
+    """Score normalized text against the keyword table."""
     # Store matches with confidence scores
-    matches = {}
-    
-    # Check each category's keywords
-    for category, keywords in CATEGORY_KEYWORDS.items():
-        score = 0
-        for keyword in keywords:
-            if keyword.lower() in search_text:
-                # Longer keyword matches get higher scores
-                score += len(keyword) * 2
-                # Exact word match gets bonus
-                if re.search(rf'\b{re.escape(keyword)}\b', search_text):
-                    score += 10
-        
-        if score > 0:
-            matches[category] = score
+    matches = matcher.score(search_text)
     
     # Determine transaction type based on amount or category
     transaction_type = "expense" if amount >= 0 else "income"
     
-    # Income category keywords indicate income regardless of amount
-    income_categories = ["Salary", "Freelance", "Business", "Investment", 
-                        "Rental Income", "Interest", "Bonus", "Refund"]
-    
     if matches:
         # Get category with highest confidence
         best_category = max(matches, key=matches.get)
         confidence = min(matches[best_category] / 30.0, 1.0)  # Normalize to 0-1
         
         # Override transaction type if it's an income category
-        if best_category in income_categories:
+        if best_category in INCOME_CATEGORIES:
             transaction_type = "income"
             
         return best_category, transaction_type, confidence
@@ -205,16 +669,49 @@ def auto_categorize_transaction(
         return "Other Expense", "expense", 0.0
 
 
-def bulk_categorize_transactions(transactions_data: list) -> list:
+def bulk_categorize_transactions(
+    transactions_data: list,
+    merchant_index: Optional[Dict[str, Tuple[str, str]]] = None,
+    model=None,
+    engine: Optional[str] = None,
+    user_rules=None,
+) -> list:
     """
     Categorize a list of transactions.
     
     Args:
         transactions_data: List of transaction dictionaries with 'description', 'amount', 'merchant'
+        merchant_index: Optional learned mapping of normalized text -> (category, type)
+        model: Optional trained ``CategoryModel`` for the "model"/"blend" engines
+        engine: Engine override (defaults to CATEGORIZATION_ENGINE)
+        user_rules: Optional ``UserRuleMatcher`` applied before everything else
         
     Returns:
         List of transactions with added 'category', 'type', and 'confidence' fields
     """
+    if model is not None and (engine or CATEGORIZATION_ENGINE) != "keyword":
+        # The model scores the whole batch at once, so go through the columns
+        results = categorize_columns(
+            [txn.get("description", "") for txn in transactions_data],
+            [txn.get("merchant", txn.get("account", "")) for txn in transactions_data],
+            [abs(float(txn.get("amount", 0))) for txn in transactions_data],
+            merchant_index=merchant_index,
+            model=model,
+            engine=engine,
+            accounts=[txn.get("account", "") for txn in transactions_data],
+            user_rules=user_rules,
+        )
+        return [
+            {
+                **txn,
+                "suggested_category": results["suggested_category"][index],
+                "suggested_type": results["suggested_type"][index],
+                "confidence": float(results["confidence"][index]),
+                "needs_review": bool(results["needs_review"][index]),
+            }
+            for index, txn in enumerate(transactions_data)
+        ]
+
     categorized = []
     
     for txn in transactions_data:
@@ -222,9 +719,21 @@ def bulk_categorize_transactions(transactions_data: list) -> list:
         amount = abs(float(txn.get("amount", 0)))
         merchant = txn.get("merchant", txn.get("account", ""))
         
-        category, txn_type, confidence = auto_categorize_transaction(
-            description, amount, merchant
-        )
+        # The user's own rules come first, then categories they already
+        # confirmed for this merchant
+        learned = None
+        if user_rules is not None:
+            learned = user_rules.match(description, merchant, txn.get("account"), amount)
+        if learned is None and merchant_index:
+            learned = merchant_index.get(normalize_transaction_text(description, merchant))
+
+        if learned is not None:
+            category, txn_type = learned
+            confidence = 1.0
+        else:
+            category, txn_type, confidence = auto_categorize_transaction(
+                description, amount, merchant
+            )
         
         categorized.append({
             **txn,
@@ -237,6 +746,316 @@ def bulk_categorize_transactions(transactions_data: list) -> list:
     return categorized
 
 
+def categorize_columns(
+    descriptions,
+    merchants=None,
+    amounts=None,
+    merchant_index: Optional[Dict[str, Tuple[str, str]]] = None,
+    model=None,
+    engine: Optional[str] = None,
+    accounts=None,
+    user_rules=None,
+) -> Dict[str, np.ndarray]:
+    """
+    Categorize whole columns of transactions without per-row Python calls.
+
+    Each distinct normalized description/merchant text is scanned once,
+    the hits are summed into a NumPy score matrix and the best category per
+    row is picked with ``argmax``, which keeps the table-order tie-break of
+    ``auto_categorize_transaction``.
+
+    Args:
+        descriptions: Array-like of descriptions
+        merchants: Optional array-like of merchant names
+        amounts: Optional array-like of amounts (sign decides default type)
+        merchant_index: Optional learned mapping of normalized text -> (category, type)
+        model: Optional trained ``CategoryModel`` for the "model"/"blend" engines
+        engine: Engine override (defaults to CATEGORIZATION_ENGINE)
+        accounts: Optional array-like of account names, used by user rules
+        user_rules: Optional ``UserRuleMatcher`` applied before everything else
+
+    Returns:
+        Dict of 'suggested_category', 'suggested_type', 'confidence' and
+        'needs_review' arrays, aligned with the input rows
+    """
+    descriptions = pd.Series(descriptions, dtype=object).fillna("").astype(str)
+    if merchants is None:
+        merchants = pd.Series("", index=descriptions.index, dtype=object)
+    else:
+        merchants = pd.Series(
+            np.asarray(merchants, dtype=object), index=descriptions.index
+        ).fillna("").astype(str)
+
+    search_text = _normalize_text_series(descriptions.str.cat(merchants, sep=" "))
+    codes, unique_texts = pd.factorize(search_text)
+
+    unique_category, unique_confidence, unique_income = _score_unique_texts(
+        unique_texts, model, engine or CATEGORIZATION_ENGINE
+    )
+    category = unique_category[codes]
+    confidence = unique_confidence[codes]
+    matched = confidence > 0
+
+    if amounts is None:
+        is_income = np.zeros(len(codes), dtype=bool)
+    else:
+        is_income = np.asarray(amounts, dtype=float) < 0
+    is_income = np.where(matched, is_income | unique_income[codes], is_income)
+
+    fallback = np.where(is_income, "Other Income", "Other Expense").astype(object)
+    suggested_category = np.where(matched, category, fallback)
+    suggested_type = np.where(is_income, "income", "expense").astype(object)
+
+    if merchant_index:
+        # One dict lookup per distinct text, broadcast back to the rows
+        learned = pd.Series(unique_texts, dtype=object).map(merchant_index)
+        known_unique = learned.notna().to_numpy()
+        if known_unique.any():
+            known = known_unique[codes]
+            learned_values = learned[known_unique]
+            learned_category = np.empty(len(unique_texts), dtype=object)
+            learned_type = np.empty(len(unique_texts), dtype=object)
+            learned_category[known_unique] = learned_values.str[0].to_numpy()
+            learned_type[known_unique] = learned_values.str[1].to_numpy()
+            suggested_category = np.where(known, learned_category[codes], suggested_category)
+            suggested_type = np.where(known, learned_type[codes], suggested_type)
+            confidence = np.where(known, 1.0, confidence)
+
+    if user_rules is not None:
+        if accounts is None:
+            accounts = pd.Series("", index=descriptions.index, dtype=object)
+        else:
+            accounts = pd.Series(
+                np.asarray(accounts, dtype=object), index=descriptions.index
+            ).fillna("").astype(str)
+        row_amounts = (
+            np.zeros(len(codes)) if amounts is None else np.asarray(amounts, dtype=float)
+        )
+        ruled, rule_category, rule_type = user_rules.match_columns(
+            descriptions, merchants, accounts, row_amounts
+        )
+        suggested_category = np.where(ruled, rule_category, suggested_category)
+        suggested_type = np.where(ruled, rule_type, suggested_type)
+        confidence = np.where(ruled, 1.0, confidence)
+
+    return {
+        "suggested_category": suggested_category,
+        "suggested_type": suggested_type,
+        "confidence": np.round(confidence, 2),
+        "needs_review": confidence < 0.5,
+    }
+
+
+def _score_unique_texts(
+    unique_texts: np.ndarray,
+    model,
+    engine: str,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Pick the best category for each distinct text with the chosen engine.
+
+    Returns:
+        Tuple of (category, confidence, category-implies-income) arrays
+    """
+    matcher = get_matcher()
+    names = list(matcher.categories)
+    income = np.isin(names, INCOME_CATEGORIES)
+    scores = matcher.score_matrix(unique_texts)
+    rows = np.arange(len(unique_texts))
+
+    if model is None or engine == "keyword":
+        # Pick on raw scores so ties beyond the 1.0 cap resolve as before
+        best = scores.argmax(axis=1)
+        confidence = np.minimum(scores[rows, best] / 30.0, 1.0)
+    else:
+        probabilities = model.predict_proba(unique_texts)
+        model_income = np.asarray(model.types) == "income"
+
+        if engine == "model":
+            names, income, combined = list(model.categories), model_income, probabilities
+        else:
+            positions = {name: index for index, name in enumerate(names)}
+            for name in model.categories:
+                positions.setdefault(name, len(positions))
+            names = list(positions)
+            columns = [positions[name] for name in model.categories]
+
+            combined = np.zeros((len(unique_texts), len(names)))
+            combined[:, :scores.shape[1]] = (
+                (1.0 - CATEGORIZATION_MODEL_WEIGHT) * np.minimum(scores / 30.0, 1.0)
+            )
+            combined[:, columns] += CATEGORIZATION_MODEL_WEIGHT * probabilities
+            income = np.concatenate([income, np.zeros(len(names) - len(income), dtype=bool)])
+            income[columns] |= model_income
+
+        best = combined.argmax(axis=1)
+        confidence = combined[rows, best]
+
+    return np.asarray(names, dtype=object)[best], confidence, income[best]
+
+
+def categorize_dataframe(
+    df: pd.DataFrame,
+    description_col: str = "description",
+    merchant_col: str = "merchant",
+    amount_col: str = "amount",
+    merchant_index: Optional[Dict[str, Tuple[str, str]]] = None,
+    model=None,
+    engine: Optional[str] = None,
+    user_rules=None,
+    account_col: str = "account",
+) -> Dict[str, np.ndarray]:
+    """
+    Categorize a parsed upload DataFrame column-wise.
+
+    Args:
+        df: DataFrame holding at least the description column
+        description_col: Name of the description column
+        merchant_col: Name of the merchant column, if present
+        amount_col: Name of the amount column, if present
+        merchant_index: Optional learned mapping of normalized text -> (category, type)
+        model: Optional trained ``CategoryModel``
+        engine: Engine override (defaults to CATEGORIZATION_ENGINE)
+        user_rules: Optional ``UserRuleMatcher`` applied before everything else
+        account_col: Name of the account column, if present
+
+    Returns:
+        Same arrays as ``categorize_columns``, aligned with ``df`` rows
+    """
+    if description_col in df:
+        descriptions = df[description_col]
+    else:
+        descriptions = pd.Series("", index=df.index, dtype=object)
+
+    return categorize_columns(
+        descriptions,
+        df[merchant_col] if merchant_col in df else None,
+        df[amount_col] if amount_col in df else None,
+        merchant_index=merchant_index,
+        model=model,
+        engine=engine,
+        accounts=df[account_col] if account_col in df else None,
+        user_rules=user_rules,
+    )
+
+
+def init_worker() -> None:
+    """Compile the keyword rules and load stored category models once per worker process."""
+    from category_model import load_models
+
+    get_matcher()
+    load_models()
+
+
+def _with_user_model(func, model_user_id: Optional[int], chunk, **kwargs):
+    """
+    Run ``func`` on ``chunk`` with a user's stored model.
+
+    The model is looked up in the process that runs the chunk, where it is
+    cached after its first use, instead of being pickled with every chunk.
+    """
+    from category_model import get_user_model
+
+    model = get_user_model(model_user_id) if model_user_id is not None else None
+    return func(chunk, model=model, **kwargs)
+
+
+async def _run_chunked(func, chunks: list) -> list:
+    """Run ``func`` over each chunk in the CPU pool, returning results in input order."""
+    return await cpu_pool.map(func, chunks)
+
+
+async def bulk_categorize_transactions_parallel(
+    transactions_data: list,
+    chunk_size: Optional[int] = None,
+    merchant_index: Optional[Dict[str, Tuple[str, str]]] = None,
+    model_user_id: Optional[int] = None,
+    engine: Optional[str] = None,
+    user_rules=None,
+) -> list:
+    """
+    Categorize a list of transactions across the process pool.
+
+    Small batches are categorized in-process; larger ones are split into
+    chunks and awaited without blocking the event loop.
+
+    Args:
+        transactions_data: Same input as ``bulk_categorize_transactions``
+        chunk_size: Rows per chunk (defaults to CATEGORIZATION_CHUNK_SIZE)
+        merchant_index: Optional learned mapping of normalized text -> (category, type)
+        model_user_id: Categorize with this user's stored ``CategoryModel``
+        engine: Engine override (defaults to CATEGORIZATION_ENGINE)
+        user_rules: Optional ``UserRuleMatcher`` applied before everything else
+
+    Returns:
+        Same output as ``bulk_categorize_transactions``, in input order
+    """
+    categorize = partial(
+        _with_user_model,
+        bulk_categorize_transactions,
+        model_user_id,
+        merchant_index=merchant_index,
+        engine=engine,
+        user_rules=user_rules,
+    )
+    if len(transactions_data) < CATEGORIZATION_PARALLEL_THRESHOLD:
+        return categorize(transactions_data)
+
+    chunk_size = chunk_size or CATEGORIZATION_CHUNK_SIZE
+    chunks = [
+        transactions_data[start:start + chunk_size]
+        for start in range(0, len(transactions_data), chunk_size)
+    ]
+    results = await _run_chunked(categorize, chunks)
+    return [txn for chunk in results for txn in chunk]
+
+
+async def categorize_dataframe_parallel(
+    df: pd.DataFrame,
+    chunk_size: Optional[int] = None,
+    merchant_index: Optional[Dict[str, Tuple[str, str]]] = None,
+    model_user_id: Optional[int] = None,
+    engine: Optional[str] = None,
+    user_rules=None,
+) -> Dict[str, np.ndarray]:
+    """
+    Columnar counterpart of ``bulk_categorize_transactions_parallel``.
+
+    Args:
+        df: DataFrame with description, merchant and amount columns
+        chunk_size: Rows per chunk (defaults to CATEGORIZATION_CHUNK_SIZE)
+        merchant_index: Optional learned mapping of normalized text -> (category, type)
+        model_user_id: Categorize with this user's stored ``CategoryModel``
+        engine: Engine override (defaults to CATEGORIZATION_ENGINE)
+        user_rules: Optional ``UserRuleMatcher`` applied before everything else
+
+    Returns:
+        Same arrays as ``categorize_dataframe``, aligned with ``df`` rows
+    """
+    categorize = partial(
+        _with_user_model,
+        categorize_dataframe,
+        model_user_id,
+        merchant_index=merchant_index,
+        engine=engine,
+        user_rules=user_rules,
+    )
+    if len(df) < CATEGORIZATION_PARALLEL_THRESHOLD:
+        return categorize(df)
+
+    chunk_size = chunk_size or CATEGORIZATION_CHUNK_SIZE
+    columns = [col for col in ("description", "merchant", "amount", "account") if col in df]
+    chunks = [
+        df.iloc[start:start + chunk_size][columns]
+        for start in range(0, len(df), chunk_size)
+    ]
+    results = await _run_chunked(categorize, chunks)
+    return {
+        key: np.concatenate([result[key] for result in results])
+        for key in results[0]
+    }
+
+
 def get_category_suggestions(description: str) -> list:
     """
     Get top 3 category suggestions for a given description.
@@ -247,20 +1066,31 @@ def get_category_suggestions(description: str) -> list:
     Returns:
         List of tuples (category, confidence_score)
     """
-    matches = {}
-    search_text = description.lower()
-    
-    for category, keywords in CATEGORY_KEYWORDS.items():
-        score = 0
-        for keyword in keywords:
-            if keyword.lower() in search_text:
-                score += len(keyword) * 2
-                if re.search(rf'\b{re.escape(keyword)}\b', search_text):
-                    score += 10
-        
-        if score > 0:
-            matches[category] = min(score / 30.0, 1.0)
+    matches = {
+        category: min(score / 30.0, 1.0)
+        for category, score in get_matcher().score(description.lower()).items()
+    }
     
     # Sort by confidence and return top 3
     sorted_matches = sorted(matches.items(), key=lambda x: x[1], reverse=True)
-    return sorted_matches[:3]
\ No newline at end of file
+    return sorted_matches[:3]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compile the keyword rules into a matcher artifact for fast worker startup."
+    )
+    parser.add_argument(
+        "rules",
+        nargs="?",
+        default=CATEGORY_RULES_PATH,
+        help=f"Rule file to compile (default: {CATEGORY_RULES_PATH})",
+    )
+    args = parser.parse_args()
+
+    version, table = load_rule_table(args.rules)
+    print(compile_rules_artifact(table, version))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+"""
+Trainable category model: multinomial Naive Bayes over hashed character n-grams.
+
+The model is trained per user from confirmed transactions and scores a whole
+batch of texts with one sparse x dense product against its weight matrix.
+"""
+
+import os
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from decouple import config
+
+from categorization import normalize_transaction_text
+
+# Directory holding one model artifact per user
+CATEGORY_MODEL_DIR = config("CATEGORY_MODEL_DIR", default="./models")
+# Size of the hashed feature space
+CATEGORY_MODEL_FEATURES = config("CATEGORY_MODEL_FEATURES", default=2 ** 20, cast=int)
+# Fewest confirmed transactions needed before a model is trained
+CATEGORY_MODEL_MIN_SAMPLES = config("CATEGORY_MODEL_MIN_SAMPLES", default=20, cast=int)
+
+# Catch-all categories say nothing about the text, so they are never learned
+UNLABELED_CATEGORIES = ("Other", "Other Income", "Other Expense")
+
+NGRAM_RANGE = (3, 5)
+SMOOTHING = 1.0
+_HASH_MULTIPLIER = np.uint64(1099511628211)
+_HASH_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+
+def featurize(
+    texts: Sequence[str],
+    n_features: int = CATEGORY_MODEL_FEATURES,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Hash the character n-grams of each text.
+
+    All texts are packed into one byte buffer and every n-gram is hashed
+    with a polynomial rolling hash in NumPy, so there is no per-n-gram
+    Python call. The hash does not depend on ``PYTHONHASHSEED``, which keeps
+    feature ids stable across processes and on disk.
+
+    Args:
+        texts: Normalized texts
+        n_features: Size of the hashed feature space
+
+    Returns:
+        Tuple of (row index, feature id) arrays, one entry per n-gram
+    """
+    encoded = [f" {text} ".encode("utf-8") for text in texts]
+    lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+    buffer = np.frombuffer(b"".join(encoded), dtype=np.uint8).astype(np.uint64)
+    row_of_byte = np.repeat(np.arange(len(encoded)), lengths)
+    row_end = np.cumsum(lengths)
+
+    rows: List[np.ndarray] = []
+    features: List[np.ndarray] = []
+    low, high = NGRAM_RANGE
+
+    for size in range(low, high + 1):
+        count = len(buffer) - size + 1
+        if count <= 0:
+            continue
+
+        hashes = np.full(count, size, dtype=np.uint64)
+        for offset in range(size):
+            hashes = hashes * _HASH_MULTIPLIER + buffer[offset:offset + count]
+        hashes ^= hashes >> np.uint64(29)
+        hashes *= _HASH_MIX
+        hashes ^= hashes >> np.uint64(32)
+
+        # Drop n-grams that would straddle two texts
+        owner = row_of_byte[:count]
+        valid = np.arange(count) + size <= row_end[owner]
+        rows.append(owner[valid])
+        features.append((hashes[valid] % np.uint64(n_features)).astype(np.int64))
+
+    if not rows:
+        return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.int64)
+    return np.concatenate(rows).astype(np.intp), np.concatenate(features)
+
+
+class CategoryModel:
+    """
+    Multinomial Naive Bayes with a compact vocabulary.
+
+    Only features seen during training get a row in the weight matrix; the
+    smoothing term for unseen features is folded into a per-category bias,
+    so the model size grows with the training data, not the hash space.
+    """
+
+    def __init__(
+        self,
+        categories: Sequence[str],
+        types: Sequence[str],
+        vocabulary: np.ndarray,
+        weights: np.ndarray,
+        bias: np.ndarray,
+        per_feature: np.ndarray,
+        n_features: int,
+        trained_at: str,
+        samples: int,
+    ):
+        self.categories = list(categories)
+        self.types = list(types)
+        self.vocabulary = vocabulary
+        self.weights = weights
+        self.bias = bias
+        self.per_feature = per_feature
+        self.n_features = n_features
+        self.trained_at = trained_at
+        self.samples = samples
+
+    @classmethod
+    def train(
+        cls,
+        texts: Sequence[str],
+        categories: Sequence[str],
+        types: Sequence[str],
+        n_features: int = CATEGORY_MODEL_FEATURES,
+    ) -> "CategoryModel":
+        """
+        Fit the model on normalized texts and their confirmed labels.
+
+        Args:
+            texts: Normalized description/merchant texts
+            categories: Confirmed category per text
+            types: Confirmed transaction type per text
+            n_features: Size of the hashed feature space
+
+        Returns:
+            Trained model
+        """
+        labels, label_names = _factorize(categories)
+        n_classes = len(label_names)
+
+        # Each category keeps the transaction type it was confirmed with most
+        type_counts: Dict[str, Dict[str, int]] = {name: {} for name in label_names}
+        for category, txn_type in zip(categories, types):
+            counts = type_counts[category]
+            counts[txn_type] = counts.get(txn_type, 0) + 1
+        label_types = [max(type_counts[name], key=type_counts[name].get) for name in label_names]
+
+        rows, features = featurize(texts, n_features)
+        vocabulary, columns = np.unique(features, return_inverse=True)
+
+        counts = np.zeros((len(vocabulary), n_classes), dtype=np.float64)
+        np.add.at(counts, (columns, labels[rows]), 1.0)
+
+        class_totals = counts.sum(axis=0)
+        log_denominator = np.log(class_totals + SMOOTHING * n_features)
+        class_prior = np.log(np.bincount(labels, minlength=n_classes) / len(labels))
+
+        # log P(f|c) = log(count + a) - log(denominator); split into the part
+        # that only exists for seen features and a per-n-gram constant.
+        weights = np.log(counts + SMOOTHING) - np.log(SMOOTHING)
+        per_feature = np.log(SMOOTHING) - log_denominator
+
+        return cls(
+            categories=label_names,
+            types=label_types,
+            vocabulary=vocabulary,
+            weights=weights.astype(np.float32),
+            bias=class_prior,
+            per_feature=per_feature,
+            n_features=n_features,
+            trained_at=datetime.utcnow().isoformat(),
+            samples=len(labels),
+        )
+
+    def predict_proba(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        Score a batch of normalized texts.
+
+        Args:
+            texts: Normalized texts
+
+        Returns:
+            Posterior probabilities of shape (len(texts), len(categories))
+        """
+        rows, features = featurize(texts, self.n_features)
+        n_grams = np.bincount(rows, minlength=len(texts)).astype(np.float64)
+
+        log_scores = self.bias + n_grams[:, None] * self.per_feature
+
+        # Sparse (rows x vocabulary) times dense (vocabulary x categories)
+        positions = np.searchsorted(self.vocabulary, features)
+        positions = np.minimum(positions, len(self.vocabulary) - 1)
+        seen = self.vocabulary[positions] == features
+        rows, positions = rows[seen], positions[seen]
+        for column in range(len(self.categories)):
+            log_scores[:, column] += np.bincount(
+                rows, weights=self.weights[positions, column], minlength=len(texts)
+            )
+
+        log_scores -= log_scores.max(axis=1, keepdims=True)
+        probabilities = np.exp(log_scores)
+        probabilities /= probabilities.sum(axis=1, keepdims=True)
+        return probabilities
+
+    def save(self, path: str) -> None:
+        """Write the model to ``path`` as an uncompressed ``.npz`` archive."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temporary = f"{path}.tmp.npz"
+        np.savez(
+            temporary,
+            categories=np.asarray(self.categories, dtype=str),
+            types=np.asarray(self.types, dtype=str),
+            vocabulary=self.vocabulary,
+            weights=self.weights,
+            bias=self.bias,
+            per_feature=self.per_feature,
+            n_features=np.asarray(self.n_features),
+            trained_at=np.asarray(self.trained_at),
+            samples=np.asarray(self.samples),
+        )
+        # Atomic swap so workers never load a half-written file
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path: str) -> "CategoryModel":
+        """Read a model written by ``save``."""
+        with np.load(path, allow_pickle=False) as archive:
+            return cls(
+                categories=archive["categories"].tolist(),
+                types=archive["types"].tolist(),
+                vocabulary=archive["vocabulary"],
+                weights=archive["weights"],
+                bias=archive["bias"],
+                per_feature=archive["per_feature"],
+                n_features=int(archive["n_features"]),
+                trained_at=str(archive["trained_at"]),
+                samples=int(archive["samples"]),
+            )
+
+
+def _factorize(values: Sequence[str]) -> Tuple[np.ndarray, List[str]]:
+    names: Dict[str, int] = {}
+    labels = [names.setdefault(value, len(names)) for value in values]
+    return np.asarray(labels, dtype=np.intp), list(names)
+
+
+_models: Dict[int, Tuple[float, CategoryModel]] = {}
+_lock = threading.Lock()
+
+
+def model_path(user_id: int) -> str:
+    """Return the artifact path for a user's model."""
+    return os.path.join(CATEGORY_MODEL_DIR, f"user_{user_id}.npz")
+
+
+def load_models() -> int:
+    """Load every stored model so workers pay the load cost once at startup."""
+    if not os.path.isdir(CATEGORY_MODEL_DIR):
+        return 0
+
+    loaded = 0
+    for name in os.listdir(CATEGORY_MODEL_DIR):
+        if name.startswith("user_") and name.endswith(".npz"):
+            try:
+                user_id = int(name[len("user_"):-len(".npz")])
+            except ValueError:
+                continue
+            if get_user_model(user_id) is not None:
+                loaded += 1
+    return loaded
+
+
+def get_user_model(user_id: int) -> Optional[CategoryModel]:
+    """
+    Return the user's model, reloading it if another worker retrained it.
+
+    Args:
+        user_id: Owner of the model
+
+    Returns:
+        The model, or None if the user has not trained one
+    """
+    path = model_path(user_id)
+    try:
+        modified = os.stat(path).st_mtime
+    except FileNotFoundError:
+        return None
+
+    with _lock:
+        cached = _models.get(user_id)
+    if cached is not None and cached[0] == modified:
+        return cached[1]
+
+    model = CategoryModel.load(path)
+    with _lock:
+        _models[user_id] = (modified, model)
+    return model
+
+
+def train_user_model(
+    user_id: int,
+    rows: Sequence[Tuple[str, Optional[str], str, str]],
+) -> CategoryModel:
+    """
+    Train, store and cache a model from a user's confirmed transactions.
+
+    Args:
+        user_id: Owner of the model
+        rows: Sequence of (description, merchant, category, transaction_type)
+
+    Returns:
+        The trained model
+    """
+    texts = [normalize_transaction_text(description, merchant) for description, merchant, _, _ in rows]
+    model = CategoryModel.train(
+        texts,
+        [category for _, _, category, _ in rows],
+        [txn_type for _, _, _, txn_type in rows],
+    )
+
+    path = model_path(user_id)
+    model.save(path)
+    with _lock:
+        _models[user_id] = (os.stat(path).st_mtime, model)
+    return model
@@ -1,27 +1,140 @@
 from sqlalchemy import (
     create_engine,
+    event,
     Column,
     Integer,
     String,
     Float,
     DateTime,
     Boolean,
+    Text,
+    Index,
     Enum as SQLEnum,
+    UniqueConstraint,
+    inspect,
+    text,
+    false,
+    update,
 )
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
 from sqlalchemy.sql import func
 from decouple import config
+import asyncio
 import enum
+from contextlib import asynccontextmanager
+import os
+from typing import Optional
 
-# Database configuration
+from executors import run_io
+
+# Database configuration. An async driver (sqlite+aiosqlite://,
+# postgresql+asyncpg://) serves API requests from an asyncio engine;
+# background jobs and bulk imports always use the matching sync driver.
 DATABASE_URL = config("DATABASE_URL", default="sqlite:///./fintrack.db")
 
+# Async driver -> sync driver of the same database
+ASYNC_DRIVERS = {"aiosqlite": "pysqlite", "asyncpg": "psycopg2"}
+
+_url = make_url(DATABASE_URL)
+DATABASE_ASYNC = _url.get_driver_name() in ASYNC_DRIVERS
+SYNC_DATABASE_URL = (
+    _url.set(drivername=f"{_url.get_backend_name()}+{ASYNC_DRIVERS[_url.get_driver_name()]}")
+    if DATABASE_ASYNC
+    else _url
+)
+
+# Connections kept open per engine, and extra ones allowed under load
+DB_POOL_SIZE = config("DB_POOL_SIZE", default=5, cast=int)
+DB_MAX_OVERFLOW = config("DB_MAX_OVERFLOW", default=10, cast=int)
+
+
+def pool_arguments(url) -> dict:
+    """Pool sizing for an engine; only QueuePools take it (not in-memory SQLite)."""
+    url = make_url(url)
+    if issubclass(url.get_dialect().get_pool_class(url), QueuePool):
+        return {"pool_size": DB_POOL_SIZE, "max_overflow": DB_MAX_OVERFLOW}
+    return {}
+
+
 engine = create_engine(
-    DATABASE_URL,
+    SYNC_DATABASE_URL,
     connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {},
+    **pool_arguments(SYNC_DATABASE_URL),
+)
+async_engine = (
+    create_async_engine(DATABASE_URL, **pool_arguments(DATABASE_URL))
+    if DATABASE_ASYNC
+    else None
 )
+# Applied to every SQLite connection. WAL is a property of the database
+# file rather than of one connection: once set it persists for every
+# reader and writer, and lets readers proceed while an import writes.
+# The sync level stays at the default; see relax_sqlite_sync()
+SQLITE_PRAGMAS = (
+    "journal_mode=WAL",
+    "temp_store=MEMORY",
+    "cache_size=-64000",
+)
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for pragma in SQLITE_PRAGMAS:
+        cursor.execute(f"PRAGMA {pragma}")
+    cursor.close()
+
+
+def _restore_sqlite_sync(dbapi_connection, connection_record):
+    synchronous = connection_record.info.pop("synchronous", None)
+    if synchronous is not None:
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA synchronous={int(synchronous)}")
+        cursor.close()
+
+
+if DATABASE_URL.startswith("sqlite"):
+    event.listen(engine, "connect", _set_sqlite_pragmas)
+    event.listen(engine, "checkin", _restore_sqlite_sync)
+    if async_engine is not None:
+        event.listen(async_engine.sync_engine, "connect", _set_sqlite_pragmas)
+
+
+def relax_sqlite_sync(db) -> None:
+    """
+    Skip the fsync on each commit of the session's SQLite connection.
+
+    Under WAL, ``synchronous=NORMAL`` cannot corrupt the database, but a
+    power loss may roll back the most recent commits. Bulk imports accept
+    that trade, since an interrupted import is re-run from its source
+    file; every other connection keeps the default. The previous level is
+    restored when the connection goes back to the pool.
+
+    Args:
+        db: Session bound to a SQLite engine
+    """
+    connection = db.connection().connection
+    if "synchronous" not in connection.info:
+        cursor = connection.cursor()
+        cursor.execute("PRAGMA synchronous")
+        connection.info["synchronous"] = cursor.fetchone()[0]
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Request sessions keep loaded attributes after commit: with an async
+# driver, reloading them implicitly would need a blocking round trip
+AsyncSessionLocal = (
+    async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    if async_engine is not None
+    else None
+)
+_ThreadedSessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, expire_on_commit=False, bind=engine
+)
 
 Base = declarative_base()
 
@@ -37,6 +150,13 @@ class TransactionStatusEnum(enum.Enum):
     pending = "pending"
 
 
+class ImportJobStatusEnum(enum.Enum):
+    queued = "queued"
+    running = "running"
+    completed = "completed"
+    failed = "failed"
+
+
 # Database Models
 class User(Base):
     __tablename__ = "users"
@@ -48,10 +168,30 @@ class User(Base):
     hashed_password = Column(String, nullable=False)
     is_active = Column(Boolean, default=True)
     is_verified = Column(Boolean, default=False)
+    # Bumped by every write to the user's transactions; GET responses
+    # derived from them use it as their ETag
+    data_version = Column(Integer, nullable=False, server_default=text("0"))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
 
+def bump_data_version(user_id: int):
+    """
+    UPDATE marking a user's transactions as changed.
+
+    Execute it in the transaction that writes them, so the new version
+    commits (or rolls back) together with the data.
+    """
+    users = User.__table__
+    return (
+        update(users)
+        .where(users.c.id == user_id)
+        # Setting updated_at to itself keeps its onupdate from firing; it
+        # tracks profile edits
+        .values(data_version=users.c.data_version + 1, updated_at=users.c.updated_at)
+    )
+
+
 class Transaction(Base):
     __tablename__ = "transactions"
 
@@ -66,10 +206,91 @@ class Transaction(Base):
         SQLEnum(TransactionStatusEnum), default=TransactionStatusEnum.completed
     )
     account = Column(String, nullable=False)
+    # Content hash set on imported rows; re-imports of the same row collide
+    fingerprint = Column(String, nullable=True, unique=True, index=True)
+    # Imported with a low-confidence category the user did not review;
+    # cleared when the user recategorizes the row
+    needs_review = Column(Boolean, nullable=False, default=False, server_default=false())
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    __table_args__ = (
+        # Keyset pagination: newest first, id breaks ties
+        Index("ix_transactions_user_date_id", user_id, date.desc(), id),
+        # Listing filters: equality on the leading columns, then date order
+        Index("ix_transactions_user_category_date", user_id, category, date),
+        Index("ix_transactions_user_account_date", user_id, account, date),
+        Index("ix_transactions_user_amount_id", user_id, amount, id),
+    )
+
+
+class MerchantCategory(Base):
+    """Category a user confirmed for a normalized merchant/description."""
+
+    __tablename__ = "merchant_categories"
+    __table_args__ = (UniqueConstraint("user_id", "merchant_key"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, nullable=False, index=True)  # Foreign key to users
+    merchant_key = Column(String, nullable=False)
+    category = Column(String, nullable=False)
+    type = Column(SQLEnum(TransactionTypeEnum), nullable=False)
+    hits = Column(Integer, nullable=False, default=1)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
 
+class CategorizationRule(Base):
+    """User-defined rule applied before the global keyword rules."""
+
+    __tablename__ = "categorization_rules"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, nullable=False, index=True)  # Foreign key to users
+    field = Column(String, nullable=False)  # description, merchant or account
+    match_type = Column(String, nullable=False)  # contains or equals
+    pattern = Column(String, nullable=False)
+    min_amount = Column(Float, nullable=True)
+    max_amount = Column(Float, nullable=True)
+    category = Column(String, nullable=False)
+    type = Column(SQLEnum(TransactionTypeEnum), nullable=True)
+    priority = Column(Integer, nullable=False, default=0)
+    is_active = Column(Boolean, nullable=False, default=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+
+class ImportJob(Base):
+    """Background import of an uploaded or confirmed statement."""
+
+    __tablename__ = "import_jobs"
+
+    id = Column(String, primary_key=True, index=True)
+    user_id = Column(Integer, nullable=False, index=True)  # Foreign key to users
+    kind = Column(String, nullable=False)  # upload or confirm
+    filename = Column(String, nullable=False)
+    source_path = Column(String, nullable=False)  # Spooled copy of the input
+    status = Column(
+        SQLEnum(ImportJobStatusEnum), nullable=False, default=ImportJobStatusEnum.queued
+    )
+    # Checkpoint: batches before this one are committed and skipped on resume
+    batches_committed = Column(Integer, nullable=False, default=0)
+    # Date format guessed from the first batch, reused when the job resumes
+    date_format = Column(String, nullable=True)
+    rows_processed = Column(Integer, nullable=False, default=0)
+    rows_total = Column(Integer, nullable=True)
+    duplicate_count = Column(Integer, nullable=False, default=0)
+    bytes_processed = Column(Integer, nullable=False, default=0)
+    bytes_total = Column(Integer, nullable=False, default=0)
+    error_count = Column(Integer, nullable=False, default=0)
+    errors = Column(Text, nullable=True)  # JSON list of reported parse errors
+    message = Column(String, nullable=True)
+    started_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
 # Dependency to get database session
 def get_db():
     db = SessionLocal()
@@ -79,9 +300,129 @@ def get_db():
         db.close()
 
 
+class ThreadedSession:
+    """
+    The subset of ``AsyncSession`` the API uses, backed by a blocking session.
+
+    Each call runs in the I/O thread pool, so handlers written against the
+    async API also work, without blocking the event loop, when
+    DATABASE_URL names a sync driver.
+    """
+
+    def __init__(self, session):
+        self.sync_session = session
+
+    def add(self, instance) -> None:
+        self.sync_session.add(instance)
+
+    async def execute(self, statement, params=None, **kwargs):
+        # Rows are fetched in the worker, not when the result is read
+        kwargs.setdefault("execution_options", {"prebuffer_rows": True})
+        return await run_io(self.sync_session.execute, statement, params, **kwargs)
+
+    async def scalars(self, statement, params=None, **kwargs):
+        return (await self.execute(statement, params, **kwargs)).scalars()
+
+    async def scalar(self, statement, params=None, **kwargs):
+        return await run_io(self.sync_session.scalar, statement, params, **kwargs)
+
+    async def get(self, entity, ident, **kwargs):
+        return await run_io(self.sync_session.get, entity, ident, **kwargs)
+
+    async def delete(self, instance) -> None:
+        await run_io(self.sync_session.delete, instance)
+
+    async def flush(self) -> None:
+        await run_io(self.sync_session.flush)
+
+    async def commit(self) -> None:
+        await run_io(self.sync_session.commit)
+
+    async def rollback(self) -> None:
+        await run_io(self.sync_session.rollback)
+
+    async def refresh(self, instance) -> None:
+        await run_io(self.sync_session.refresh, instance)
+
+    async def close(self) -> None:
+        await run_io(self.sync_session.close)
+
+    async def run_sync(self, fn, *args, **kwargs):
+        return await run_io(fn, self.sync_session, *args, **kwargs)
+
+
+_threaded_slots: Optional[asyncio.Semaphore] = None
+
+
+@asynccontextmanager
+async def lookup_session():
+    """
+    A session for one quick lookup, closed before the caller goes on.
+
+    Authentication loads the user through this instead of a request
+    dependency, so no request holds a connection for it while the handler
+    checks out another from ``get_db`` or ``get_async_db``. Those sessions
+    only connect on their first query, inside the handler, so a lookup
+    never waits on a connection held by its own request.
+    """
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as db:
+            yield db
+        return
+
+    db = ThreadedSession(_ThreadedSessionLocal())
+    try:
+        yield db
+    finally:
+        db.sync_session.close()
+
+
+# Async dependency: an AsyncSession, or a ThreadedSession on a sync driver
+async def get_async_db():
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as db:
+            yield db
+        return
+
+    # A session holds its connection between calls, so sessions beyond the
+    # connection pool wait here rather than blocking I/O threads on checkout
+    global _threaded_slots
+    if _threaded_slots is None:
+        _threaded_slots = asyncio.Semaphore(DB_POOL_SIZE + DB_MAX_OVERFLOW)
+    async with _threaded_slots:
+        db = ThreadedSession(_ThreadedSessionLocal())
+        try:
+            yield db
+        finally:
+            # Not through the pool: a saturated pool must not leak the session
+            db.sync_session.close()
+
+
+# Alembic migrations that define the schema
+ALEMBIC_CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "alembic.ini")
+# Revision matching the schema create_all() built before migrations existed
+_BASELINE_REVISION = "0001"
+
+
 # Create tables
-def create_tables():
-    Base.metadata.create_all(bind=engine)
+def create_tables(bind: Engine = engine) -> None:
+    """
+    Create the schema, or upgrade it to the latest migration.
+
+    A database created before migrations existed has the baseline tables
+    but no ``alembic_version`` table; it is stamped with the baseline
+    revision first so only the later migrations run on it.
+    """
+    from alembic import command
+    from alembic.config import Config
+
+    alembic_config = Config(ALEMBIC_CONFIG)
+    with bind.begin() as connection:
+        alembic_config.attributes["connection"] = connection
+        tables = inspect(connection).get_table_names()
+        if "alembic_version" not in tables and "transactions" in tables:
+            command.stamp(alembic_config, _BASELINE_REVISION)
+        command.upgrade(alembic_config, "head")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,113 @@
+"""Content fingerprints for spotting re-imported transactions."""
+
+import hashlib
+from typing import Dict, Iterable, Set, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy.orm import Session
+
+from bulk_insert import BULK_INSERT_BATCH_SIZE
+from database import Transaction
+
+
+def _normalize(values: pd.Series) -> pd.Series:
+    """Lowercase and collapse whitespace, once per distinct value."""
+    codes, uniques = pd.factorize(values.astype(object).fillna(""))
+    normalized = np.array(
+        [" ".join(str(value).lower().split()) for value in uniques] + [""], dtype=object
+    )
+    return pd.Series(normalized[codes], index=values.index)
+
+
+class Fingerprinter:
+    """
+    Fingerprints the rows of one import.
+
+    A fingerprint hashes user, day, amount, normalized description
+    and account, plus the row's occurrence number among identical rows of
+    the same import. Two genuine identical purchases on one day therefore
+    stay distinct, while the same statement uploaded again maps onto the
+    same fingerprints. Occurrence counts carry across batches.
+    """
+
+    def __init__(self, user_id: int):
+        self.user_id = user_id
+        self._seen: Dict[str, int] = {}
+
+    def fingerprint(self, frame: pd.DataFrame) -> np.ndarray:
+        """
+        Fingerprint a batch of parsed rows.
+
+        Args:
+            frame: Rows with date, description, amount and account
+
+        Returns:
+            Array of 32-character hex fingerprints aligned with ``frame``
+        """
+        if frame.empty:
+            return np.array([], dtype=object)
+
+        # Amounts are unsigned here: the sign is not kept on every import path
+        cents = np.round(np.abs(frame["amount"].to_numpy(dtype=np.float64)) * 100)
+        base = (
+            str(self.user_id)
+            + "|" + frame["date"].dt.strftime("%Y-%m-%d")
+            + "|" + pd.Series(cents.astype(np.int64), index=frame.index).astype(str)
+            + "|" + _normalize(frame["description"])
+            + "|" + _normalize(frame["account"])
+        )
+
+        # Occurrence of each row among identical rows so far
+        occurrence = base.groupby(base, sort=False).cumcount().to_numpy()
+        previous = base.map(self._seen).fillna(0).astype(np.int64).to_numpy()
+        occurrence = occurrence + previous
+        for key, count in base.value_counts(sort=False).items():
+            self._seen[key] = self._seen.get(key, 0) + int(count)
+
+        keys = base + "|" + pd.Series(occurrence, index=frame.index).astype(str)
+        return np.array(
+            [
+                hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+                for key in keys.to_numpy(dtype=object)
+            ],
+            dtype=object,
+        )
+
+
+def existing_fingerprints(
+    db: Session,
+    fingerprints: Iterable[str],
+    chunk_size: int = BULK_INSERT_BATCH_SIZE,
+) -> Set[str]:
+    """
+    Return which fingerprints are already stored.
+
+    One IN query per ``chunk_size`` fingerprints, answered from the
+    unique index on ``transactions.fingerprint``.
+    """
+    fingerprints = [
+        value for value in pd.unique(np.asarray(list(fingerprints), dtype=object)) if value
+    ]
+    found: Set[str] = set()
+    for start in range(0, len(fingerprints), chunk_size):
+        chunk = fingerprints[start:start + chunk_size]
+        found.update(
+            value for (value,) in db.query(Transaction.fingerprint)
+            .filter(Transaction.fingerprint.in_(chunk))
+        )
+    return found
+
+
+def duplicate_mask(db: Session, frame: pd.DataFrame) -> np.ndarray:
+    """Flag the rows of ``frame`` whose fingerprint is already stored."""
+    if frame.empty:
+        return np.zeros(0, dtype=bool)
+    existing = existing_fingerprints(db, frame["fingerprint"])
+    return frame["fingerprint"].isin(existing).to_numpy()
+
+
+def drop_duplicates(db: Session, frame: pd.DataFrame) -> Tuple[pd.DataFrame, int]:
+    """Remove already stored rows from a fingerprinted batch; returns (rows, skipped)."""
+    duplicates = duplicate_mask(db, frame)
+    return frame[~duplicates], int(duplicates.sum())
@@ -0,0 +1,235 @@
+"""Bounded worker pools that keep blocking work off the event loop."""
+
+import asyncio
+import os
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Callable, Dict, Iterable, List, Optional
+
+from decouple import config
+from fastapi import HTTPException, status
+
+# Threads for blocking I/O: reading uploads, CSV chunks, database batches
+IO_POOL_SIZE = config("IO_POOL_SIZE", default=16, cast=int)
+# Calls running or queued on the I/O pool before new ones are refused
+IO_POOL_MAX_PENDING = config("IO_POOL_MAX_PENDING", default=64, cast=int)
+# Processes for CPU-bound work that holds the GIL: Excel parsing, password
+# hashing, model training and large categorization batches
+CPU_POOL_SIZE = config("CPU_POOL_SIZE", default=os.cpu_count() or 1, cast=int)
+# Calls running or queued on the CPU pool before new ones are refused
+CPU_POOL_MAX_PENDING = config("CPU_POOL_MAX_PENDING", default=32, cast=int)
+# Retry-After seconds sent with the 503 of a saturated pool
+EXECUTOR_RETRY_AFTER = config("EXECUTOR_RETRY_AFTER", default=1, cast=int)
+# Seconds between event loop lag samples
+LOOP_LAG_INTERVAL = config("LOOP_LAG_INTERVAL", default=0.5, cast=float)
+
+
+class ExecutorSaturated(HTTPException):
+    """503 raised when a pool already holds its maximum number of pending calls."""
+
+    def __init__(self, pool_name: str):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Server busy ({pool_name} pool saturated), please retry",
+            headers={"Retry-After": str(EXECUTOR_RETRY_AFTER)},
+        )
+
+
+class BoundedPool:
+    """
+    A lazily started executor with a cap on running plus queued calls.
+
+    A call that would exceed ``max_pending`` fails fast with
+    ``ExecutorSaturated`` instead of waiting behind an unbounded queue.
+    Slots are released when the work itself finishes, not when the awaiting
+    request goes away, so abandoned calls still count against the cap.
+    """
+
+    def __init__(self, name: str, factory: Callable[[], Executor], max_pending: int):
+        self.name = name
+        self.max_pending = max_pending
+        self._factory = factory
+        self._executor: Optional[Executor] = None
+        self._pending = 0
+        self._completed = 0
+        self._rejected = 0
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> Executor:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._rejected += 1
+                raise ExecutorSaturated(self.name)
+            if self._executor is None:
+                self._executor = self._factory()
+            self._pending += 1
+            return self._executor
+
+    def _submit(self, calls: List[Callable]) -> List[Future]:
+        """Submit ``calls`` under one slot, released once all of them finish."""
+        executor = self._reserve()
+        futures = []
+        try:
+            for call in calls:
+                futures.append(executor.submit(call))
+        except Exception:
+            for future in futures:
+                future.cancel()
+            with self._lock:
+                self._pending -= 1
+            raise
+
+        remaining = len(futures)
+
+        def release(future) -> None:
+            nonlocal remaining
+            with self._lock:
+                if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+                    # A worker died; start a fresh pool on the next call
+                    if self._executor is executor:
+                        self._executor = None
+                remaining -= 1
+                if remaining == 0:
+                    self._pending -= 1
+                    self._completed += 1
+
+        for future in futures:
+            future.add_done_callback(release)
+        return futures
+
+    async def run(self, func: Callable, *args, **kwargs):
+        """
+        Run ``func(*args, **kwargs)`` in the pool and await its result.
+
+        Raises:
+            ExecutorSaturated: If the pool has no free slot
+        """
+        (future,) = self._submit([partial(func, *args, **kwargs)])
+        return await asyncio.wrap_future(future)
+
+    async def map(self, func: Callable, items: Iterable) -> list:
+        """
+        Run ``func(item)`` for each item in the pool; results keep input order.
+
+        The whole batch takes a single slot, so a large batch queues behind
+        the pool's workers instead of being refused part way through.
+
+        Raises:
+            ExecutorSaturated: If the pool has no free slot
+        """
+        calls = [partial(func, item) for item in items]
+        if not calls:
+            return []
+        futures = self._submit(calls)
+        return list(await asyncio.gather(*(asyncio.wrap_future(future) for future in futures)))
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "pending": self._pending,
+                "max_pending": self.max_pending,
+                "completed": self._completed,
+                "rejected": self._rejected,
+            }
+
+    def shutdown(self) -> None:
+        """Stop the pool's workers, if they were started."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+class LoopLagMonitor:
+    """
+    Samples how late the event loop wakes up from a timed sleep.
+
+    Lag is the time a ready callback waited because something blocked the
+    loop; a healthy server stays in the low milliseconds.
+    """
+
+    def __init__(self, interval: float = LOOP_LAG_INTERVAL):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self._last = 0.0
+        self._max = 0.0
+        self._total = 0.0
+        self._samples = 0
+
+    async def _sample(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(loop.time() - start - self.interval, 0.0)
+            self._last = lag
+            self._max = max(self._max, lag)
+            self._total += lag
+            self._samples += 1
+
+    def start(self) -> None:
+        """Start sampling on the running event loop."""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._sample())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def stats(self) -> Dict:
+        return {
+            "last_ms": round(self._last * 1000, 2),
+            "max_ms": round(self._max * 1000, 2),
+            "mean_ms": round(self._total / self._samples * 1000, 2) if self._samples else 0.0,
+            "samples": self._samples,
+        }
+
+
+io_pool = BoundedPool(
+    "io",
+    partial(ThreadPoolExecutor, max_workers=IO_POOL_SIZE, thread_name_prefix="io"),
+    IO_POOL_MAX_PENDING,
+)
+
+
+def _init_cpu_worker() -> None:
+    """Load the categorization rules and models once per worker process."""
+    from categorization import init_worker
+
+    init_worker()
+
+
+cpu_pool = BoundedPool(
+    "cpu",
+    partial(ProcessPoolExecutor, max_workers=CPU_POOL_SIZE, initializer=_init_cpu_worker),
+    CPU_POOL_MAX_PENDING,
+)
+loop_lag = LoopLagMonitor()
+
+
+async def run_io(func: Callable, *args, **kwargs):
+    """Run blocking I/O in the bounded thread pool."""
+    return await io_pool.run(func, *args, **kwargs)
+
+
+async def run_cpu(func: Callable, *args, **kwargs):
+    """Run CPU-bound work in the bounded process pool; ``func`` must be picklable."""
+    return await cpu_pool.run(func, *args, **kwargs)
+
+
+def executor_stats() -> Dict:
+    """Pool occupancy and event loop lag, for the metrics endpoint."""
+    return {
+        "event_loop_lag": loop_lag.stats(),
+        "pools": {pool.name: pool.stats() for pool in (io_pool, cpu_pool)},
+    }
+
+
+def shutdown_executors() -> None:
+    """Stop lag sampling and both pools."""
+    loop_lag.stop()
+    io_pool.shutdown()
+    cpu_pool.shutdown()
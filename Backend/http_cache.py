@@ -0,0 +1,89 @@
+"""Conditional GET: ETags from per-user data versions and static content."""
+
+import hashlib
+import json
+from typing import Any, Optional
+
+from decouple import config
+from fastapi import Depends, HTTPException, Request, Response, status
+
+from auth import get_current_active_user
+from database import User
+
+# Seconds browsers may reuse static responses (categories) before revalidating
+STATIC_CACHE_MAX_AGE = config("STATIC_CACHE_MAX_AGE", default=86400, cast=int)
+
+# Per-user data: always revalidate, never store in shared caches
+_USER_DATA_CACHE_CONTROL = "private, no-cache"
+
+
+class NotModified(HTTPException):
+    """304 raised when the client's cached copy is still current."""
+
+    def __init__(self, etag: str, cache_control: str):
+        super().__init__(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers={"ETag": etag, "Cache-Control": cache_control, "Vary": "Authorization"},
+        )
+
+
+def _matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison, as If-None-Match uses, against a list of tags."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    bare = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == bare for tag in if_none_match.split(","))
+
+
+def _digest(data: str) -> str:
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()[:16]
+
+
+def _conditional(request: Request, response: Response, etag: str, cache_control: str) -> None:
+    if _matches(request.headers.get("if-none-match"), etag):
+        raise NotModified(etag, cache_control)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
+    response.headers["Vary"] = "Authorization"
+
+
+async def user_data_etag(
+    request: Request,
+    response: Response,
+    current_user: User = Depends(get_current_active_user),
+) -> str:
+    """
+    Dependency for GET endpoints computed from the user's transactions.
+
+    The ETag combines the user, their data version and the request URL,
+    so it changes with every write and differs per page and filter. A
+    matching ``If-None-Match`` raises a 304 before the endpoint runs its
+    queries; the version comes with the user row that authentication
+    loads anyway. The version is read before the endpoint's queries, so
+    a write racing with them can only make a tag look stale, never serve
+    stale data as current.
+
+    Raises:
+        NotModified: If the client's copy is current
+    """
+    url = request.url.path + "?" + request.url.query
+    etag = f'W/"{current_user.id}.{current_user.data_version}.{_digest(url)}"'
+    _conditional(request, response, etag, _USER_DATA_CACHE_CONTROL)
+    return etag
+
+
+def static_etag(content: Any) -> str:
+    """Content-hash ETag of a JSON-serializable response body."""
+    return f'"{_digest(json.dumps(content, sort_keys=True))}"'
+
+
+def cache_static(request: Request, response: Response, etag: str) -> None:
+    """
+    Mark a static response cacheable for ``STATIC_CACHE_MAX_AGE``.
+
+    Raises:
+        NotModified: If the client's copy is current
+    """
+    _conditional(request, response, etag, f"private, max-age={STATIC_CACHE_MAX_AGE}")
@@ -0,0 +1,316 @@
+"""Chunked reading and column-wise parsing of uploaded statements."""
+
+import io
+import os
+from typing import AsyncIterator, BinaryIO, Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.api import guess_datetime_format
+from decouple import config
+from fastapi import UploadFile
+
+from executors import run_cpu, run_io
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet/Arrow support is optional
+    pa = pq = None
+
+# Rows parsed, categorized and persisted per batch
+UPLOAD_CHUNK_ROWS = config("UPLOAD_CHUNK_ROWS", default=50000, cast=int)
+# Parse errors returned in a response; the rest are only counted
+UPLOAD_MAX_REPORTED_ERRORS = config("UPLOAD_MAX_REPORTED_ERRORS", default=100, cast=int)
+
+ARROW_EXTENSIONS = (".parquet", ".arrow", ".feather")
+SUPPORTED_EXTENSIONS = (".csv", ".xlsx", ".xls") + (ARROW_EXTENSIONS if pa is not None else ())
+SUPPORTED_FORMATS_MESSAGE = (
+    "Only CSV, Excel, Parquet and Arrow files are supported"
+    if pa is not None
+    else "Only CSV and Excel files are supported"
+)
+
+
+def _iter_arrow_batches(source: BinaryIO, filename: str, chunk_rows: int):
+    """Record batches of a Parquet or Arrow IPC (file or stream format) upload."""
+    if filename.endswith(".parquet"):
+        yield from pq.ParquetFile(source).iter_batches(batch_size=chunk_rows)
+        return
+
+    try:
+        reader = pa.ipc.open_file(source)
+        batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+    except pa.ArrowInvalid:
+        source.seek(0)
+        batches = pa.ipc.open_stream(source)
+
+    # IPC batches keep the writer's sizes; regroup them to chunk_rows
+    pending, rows = [], 0
+    for batch in batches:
+        pending.append(batch)
+        rows += batch.num_rows
+        while rows >= chunk_rows:
+            table = pa.Table.from_batches(pending)
+            yield table.slice(0, chunk_rows)
+            rest = table.slice(chunk_rows)
+            pending, rows = rest.to_batches(), rest.num_rows
+    if rows:
+        yield pa.Table.from_batches(pending)
+
+
+def iter_frames(
+    source: BinaryIO,
+    filename: str,
+    chunk_rows: int = UPLOAD_CHUNK_ROWS,
+) -> Iterator[pd.DataFrame]:
+    """
+    Yield the rows of a statement file in bounded batches.
+
+    CSV files are parsed incrementally straight from the binary stream, so
+    the raw bytes, a decoded copy and the full DataFrame never coexist.
+    Excel workbooks cannot be read incrementally and are loaded once, then
+    sliced. Parquet and Arrow files are read batch by batch and keep their
+    column types, so typed amounts and dates skip string parsing.
+
+    Args:
+        source: Binary file object positioned at the start of the file
+        filename: Original file name, used to pick the format
+        chunk_rows: Rows per yielded DataFrame
+
+    Yields:
+        DataFrames of at most ``chunk_rows`` rows
+    """
+    if filename.endswith(ARROW_EXTENSIONS):
+        # Number rows across batches, as the CSV reader does, so row
+        # numbers in errors and previews stay unique
+        offset = 0
+        for batch in _iter_arrow_batches(source, filename, chunk_rows):
+            frame = batch.to_pandas(date_as_object=False)
+            frame.index = pd.RangeIndex(offset, offset + len(frame))
+            offset += len(frame)
+            yield frame
+        return
+
+    if filename.endswith(".csv"):
+        with pd.read_csv(source, chunksize=chunk_rows, encoding="utf-8") as reader:
+            for chunk in reader:
+                yield chunk
+        return
+
+    df = pd.read_excel(source)
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+
+def iter_upload_frames(
+    file: UploadFile,
+    chunk_rows: int = UPLOAD_CHUNK_ROWS,
+) -> Iterator[pd.DataFrame]:
+    """Yield the rows of an uploaded statement in bounded batches, reading its spool."""
+    file.file.seek(0)
+    return iter_frames(file.file, file.filename, chunk_rows)
+
+
+def _read_excel(data: bytes) -> pd.DataFrame:
+    return pd.read_excel(io.BytesIO(data))
+
+
+async def aiter_upload_frames(
+    file: UploadFile,
+    chunk_rows: int = UPLOAD_CHUNK_ROWS,
+) -> AsyncIterator[pd.DataFrame]:
+    """
+    Async counterpart of ``iter_upload_frames`` that never reads on the event loop.
+
+    Excel parsing is pure Python and holds the GIL, so workbooks are parsed
+    in the CPU process pool. CSV, Parquet and Arrow batches are read in the
+    I/O thread pool, one batch per call.
+    """
+    if file.filename.endswith((".xlsx", ".xls")):
+        file.file.seek(0)
+        df = await run_cpu(_read_excel, await run_io(file.file.read))
+        for start in range(0, len(df), chunk_rows):
+            yield df.iloc[start:start + chunk_rows]
+        return
+
+    frames = iter_upload_frames(file, chunk_rows)
+    while True:
+        df = await run_io(next, frames, None)
+        if df is None:
+            return
+        yield df
+
+
+PARSED_COLUMNS = [
+    "id", "date", "description", "merchant", "account", "category", "amount", "type",
+]
+
+# Currency symbols, thousands separators and spaces in amount cells
+_AMOUNT_NOISE = r"[\s,$€£₹]"
+
+
+def _to_number(values: pd.Series) -> pd.Series:
+    """Convert a column to float64, turning unparseable cells into NaN."""
+    if pd.api.types.is_numeric_dtype(values):
+        return values.astype(np.float64)
+    cleaned = values.astype(str).str.replace(_AMOUNT_NOISE, "", regex=True)
+    return pd.to_numeric(cleaned.where(values.notna()), errors="coerce").astype(np.float64)
+
+
+def _to_text(values: pd.Series, default: str) -> pd.Series:
+    """Convert a column to str, filling blanks with ``default``."""
+    # Statements repeat the same few descriptions and accounts, so only
+    # the distinct values are converted
+    codes, uniques = pd.factorize(values)
+    text = np.array([str(value).strip() or default for value in uniques] + [default], dtype=object)
+    return pd.Series(text[codes], index=values.index)
+
+
+def _uuid4_column(count: int) -> np.ndarray:
+    """Generate ``count`` random UUID strings without a Python call per id."""
+    raw = np.frombuffer(os.urandom(16 * count), dtype=np.uint8).reshape(count, 16).copy()
+    raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40  # version 4
+    raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80  # RFC 4122 variant
+    digits = np.frombuffer(raw.tobytes().hex().encode("ascii"), dtype=np.uint8).reshape(count, 32)
+    dashed = np.insert(digits, [8, 12, 16, 20], ord("-"), axis=1)
+    return np.ascontiguousarray(dashed).view("S36").ravel().astype(str).astype(object)
+
+
+class UploadParser:
+    """
+    Column-wise normalization of uploaded rows.
+
+    One parser is used per file: the date format is guessed from the first
+    batch and reused for the rest, and parse errors accumulate across
+    batches so they can be reported once in the response.
+    """
+
+    def __init__(self, max_errors: int = UPLOAD_MAX_REPORTED_ERRORS):
+        self.max_errors = max_errors
+        self.date_format: Optional[str] = None
+        self.error_count = 0
+        self.errors: List[Dict] = []
+
+    def _report(self, df: pd.DataFrame, mask: np.ndarray, column: str, message: str) -> None:
+        count = int(mask.sum())
+        if not count:
+            return
+        self.error_count += count
+        room = self.max_errors - len(self.errors)
+        if room > 0:
+            # Row numbers are 1-based positions in the file, header excluded
+            rows = np.asarray(df.index[mask][:room]) + 1
+            self.errors.extend(
+                pd.DataFrame({"row": rows, "column": column, "message": message})
+                .to_dict("records")
+            )
+
+    def _amounts(self, df: pd.DataFrame) -> pd.Series:
+        """Signed amounts from an amount column or debit/credit columns."""
+        if "amount" in df:
+            amounts = _to_number(df["amount"])
+            self._report(df, amounts.isna().to_numpy(), "amount", "Invalid or missing amount")
+            if "type" in df:
+                # Files exported from here carry unsigned amounts plus a type
+                types = df["type"].astype(str).str.strip().str.lower()
+                amounts = amounts.abs().where(types != "expense", -amounts.abs())
+                amounts = amounts.where(types.isin(["income", "expense"]), _to_number(df["amount"]))
+            return amounts
+
+        amounts = pd.Series(0.0, index=df.index)
+        for column in ("debit", "credit"):
+            if column not in df:
+                continue
+            values = _to_number(df[column])
+            invalid = values.isna() & df[column].notna()
+            self._report(df, invalid.to_numpy(), column, f"Invalid {column}")
+            values = values.fillna(0.0)
+            # Debits are money out; a lone debit/credit column is read as unsigned
+            paired = "debit" in df and "credit" in df
+            values = values if paired else values.abs()
+            amounts = amounts - values if column == "debit" else amounts + values
+            amounts[invalid] = np.nan
+        return amounts
+
+    def _dates(self, df: pd.DataFrame) -> pd.Series:
+        """Dates at day precision; unparseable ones fall back to today."""
+        today = pd.Timestamp.now().normalize()
+        if "date" not in df:
+            return pd.Series(today, index=df.index)
+
+        raw = df["date"]
+        if pd.api.types.is_datetime64_any_dtype(raw):
+            dates = raw
+            if raw.dt.tz is not None:
+                dates = raw.dt.tz_convert(None)
+        else:
+            if self.date_format is None:
+                first = raw.dropna()
+                if len(first):
+                    self.date_format = guess_datetime_format(str(first.iloc[0]))
+            dates = pd.to_datetime(
+                raw, format=self.date_format or "mixed", errors="coerce"
+            )
+            # Rows written in another format get one slower retry
+            retry = dates.isna() & raw.notna()
+            if self.date_format and retry.any():
+                dates[retry] = pd.to_datetime(raw[retry], format="mixed", errors="coerce")
+
+        missing = dates.isna().to_numpy()
+        self._report(df, missing, "date", "Invalid or missing date, used today")
+        return dates.fillna(today).dt.normalize()
+
+    def parse(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Normalize one batch of uploaded rows.
+
+        Args:
+            df: Raw batch from ``iter_upload_frames``
+
+        Returns:
+            DataFrame with ``PARSED_COLUMNS``. ``amount`` is the absolute
+            float64 value and ``type`` follows its sign. Rows without a
+            valid amount are dropped and reported in ``errors``.
+        """
+        df = df.rename(columns=lambda name: str(name).strip().lower())
+
+        amounts = self._amounts(df)
+        dates = self._dates(df)
+
+        def text(column: str, default: str) -> pd.Series:
+            if column in df:
+                return _to_text(df[column], default)
+            return pd.Series(default, index=df.index, dtype=object)
+
+        accounts = text("account", "Imported Account")
+        if "merchant" in df:
+            merchants = text("merchant", "")
+        else:
+            merchants = text("account", "")
+
+        parsed = pd.DataFrame({
+            "date": dates,
+            "description": text("description", "Imported transaction"),
+            "merchant": merchants,
+            "account": accounts,
+            "category": text("category", "Other"),
+            "amount": amounts.abs(),
+            "type": np.where(amounts < 0, "expense", "income"),
+        })
+        parsed = parsed[amounts.notna().to_numpy()]
+        parsed.insert(0, "id", _uuid4_column(len(parsed)))
+        return parsed
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Return this process's peak resident set size in MB, where available."""
+    if resource is None:
+        return None
+    # ru_maxrss is reported in kilobytes on Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
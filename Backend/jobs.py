@@ -0,0 +1,334 @@
+"""Background import jobs with checkpointed progress."""
+
+import json
+import os
+import shutil
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+import pandas as pd
+from decouple import config
+from fastapi import UploadFile
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+from bulk_insert import insert_transactions
+from database import ImportJob, ImportJobStatusEnum, SessionLocal
+from dedup import Fingerprinter, drop_duplicates
+from ingest import UPLOAD_CHUNK_ROWS, UploadParser, iter_frames
+from merchant_index import invalidate_merchant_index, learn_confirmed_categories
+from typeahead import invalidate_user_trie
+
+_MODULE_DIR = os.path.dirname(os.path.abspath(__file__))
+# Directory holding the spooled input of queued and running jobs
+IMPORT_JOB_DIR = config("IMPORT_JOB_DIR", default=os.path.join(_MODULE_DIR, "imports"))
+IMPORT_JOB_WORKERS = config("IMPORT_JOB_WORKERS", default=2, cast=int)
+# Seconds without a checkpoint after which a running job is taken over
+IMPORT_JOB_STALE_SECONDS = config("IMPORT_JOB_STALE_SECONDS", default=120, cast=int)
+
+_executor: Optional[ThreadPoolExecutor] = None
+_lock = threading.Lock()
+
+
+def get_job_executor() -> ThreadPoolExecutor:
+    """Return the shared import worker pool, creating it on first use."""
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=IMPORT_JOB_WORKERS, thread_name_prefix="import-job"
+            )
+        return _executor
+
+
+def shutdown_import_jobs() -> None:
+    """Stop the worker pool; unfinished jobs resume from their last checkpoint."""
+    global _executor
+    with _lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+def _new_job(
+    db: Session,
+    user_id: int,
+    kind: str,
+    filename: str,
+    source_path: str,
+    **fields,
+) -> ImportJob:
+    job = ImportJob(
+        id=os.path.splitext(os.path.basename(source_path))[0],
+        user_id=user_id,
+        kind=kind,
+        filename=filename,
+        source_path=source_path,
+        status=ImportJobStatusEnum.queued,
+        **fields,
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    get_job_executor().submit(run_import_job, job.id)
+    return job
+
+
+def create_upload_job(db: Session, user_id: int, file: UploadFile) -> ImportJob:
+    """
+    Spool an uploaded statement to disk and queue its import.
+
+    Args:
+        db: Database session
+        user_id: Owner of the import
+        file: Uploaded CSV or Excel file
+
+    Returns:
+        The queued job
+    """
+    os.makedirs(IMPORT_JOB_DIR, exist_ok=True)
+    extension = os.path.splitext(file.filename)[1]
+    path = os.path.join(IMPORT_JOB_DIR, f"{uuid.uuid4()}{extension}")
+
+    file.file.seek(0)
+    with open(path, "wb") as spool:
+        shutil.copyfileobj(file.file, spool, 1024 * 1024)
+
+    return _new_job(
+        db, user_id, "upload", file.filename, path, bytes_total=os.path.getsize(path)
+    )
+
+
+def create_confirm_job(db: Session, user_id: int, confirmed: pd.DataFrame) -> ImportJob:
+    """
+    Store reviewed preview rows and queue their import.
+
+    Args:
+        db: Database session
+        user_id: Owner of the import
+        confirmed: Rows for ``insert_transactions`` plus the merchant and
+            reviewed columns used to learn merchant categories
+
+    Returns:
+        The queued job
+    """
+    os.makedirs(IMPORT_JOB_DIR, exist_ok=True)
+    path = os.path.join(IMPORT_JOB_DIR, f"{uuid.uuid4()}.ndjson")
+    # Plain NDJSON, so a writable spool directory cannot inject code
+    confirmed.to_json(path, orient="records", lines=True, date_format="iso")
+    return _new_job(
+        db, user_id, "confirm", "confirmed preview", path, rows_total=len(confirmed)
+    )
+
+
+def _claim(db: Session, job_id: str) -> Optional[ImportJob]:
+    """Mark a queued or orphaned job as running; None if another worker holds it."""
+    now = datetime.utcnow()
+    stale = now - timedelta(seconds=IMPORT_JOB_STALE_SECONDS)
+    claimed = (
+        db.query(ImportJob)
+        .filter(
+            ImportJob.id == job_id,
+            or_(
+                ImportJob.status == ImportJobStatusEnum.queued,
+                and_(
+                    ImportJob.status == ImportJobStatusEnum.running,
+                    or_(ImportJob.heartbeat_at.is_(None), ImportJob.heartbeat_at < stale),
+                ),
+            ),
+        )
+        .update(
+            {ImportJob.status: ImportJobStatusEnum.running, ImportJob.heartbeat_at: now},
+            synchronize_session=False,
+        )
+    )
+    db.commit()
+    if not claimed:
+        return None
+
+    job = db.get(ImportJob, job_id)
+    if job.started_at is None:
+        job.started_at = now
+        db.commit()
+    return job
+
+
+def _checkpoint(
+    db: Session,
+    job: ImportJob,
+    batches: int,
+    rows: int,
+    duplicates: int,
+    parser: Optional[UploadParser] = None,
+    position: int = 0,
+) -> None:
+    """Commit a batch together with the job's progress."""
+    job.batches_committed = batches
+    job.rows_processed += rows
+    job.duplicate_count += duplicates
+    job.bytes_processed = min(position, job.bytes_total)
+    if parser is not None:
+        job.error_count = parser.error_count
+        job.errors = json.dumps(parser.errors)
+        job.date_format = parser.date_format
+    job.heartbeat_at = datetime.utcnow()
+    db.commit()
+
+
+def _run_upload(db: Session, job: ImportJob) -> None:
+    parser = UploadParser()
+    parser.date_format = job.date_format
+    parser.error_count = job.error_count
+    parser.errors = json.loads(job.errors or "[]")
+
+    fingerprinter = Fingerprinter(job.user_id)
+    # Reads committed batches the way they were first parsed; its errors
+    # were counted then
+    replay = UploadParser()
+    replay.date_format = job.date_format
+
+    with open(job.source_path, "rb") as source:
+        for index, df in enumerate(iter_frames(source, job.filename)):
+            if index < job.batches_committed:
+                # Committed already; only replayed so occurrence counts line up
+                fingerprinter.fingerprint(replay.parse(df))
+                # A job checkpointed before formats were saved guesses it again
+                # from its first batch
+                parser.date_format = parser.date_format or replay.date_format
+                continue
+            parsed = parser.parse(df)
+            parsed = parsed.assign(fingerprint=fingerprinter.fingerprint(parsed))
+            parsed, duplicates = drop_duplicates(db, parsed)
+            rows = insert_transactions(db, parsed, job.user_id)
+            _checkpoint(db, job, index + 1, rows, duplicates, parser, source.tell())
+
+
+def _run_confirm(db: Session, job: ImportJob) -> None:
+    # Read as written: digit-only text such as fingerprints stays text
+    confirmed = pd.read_json(job.source_path, orient="records", lines=True, dtype=False)
+    confirmed["date"] = pd.to_datetime(confirmed["date"])
+    starts = range(0, len(confirmed), UPLOAD_CHUNK_ROWS)
+
+    for index, start in enumerate(starts):
+        if index < job.batches_committed:
+            continue
+        batch = confirmed.iloc[start:start + UPLOAD_CHUNK_ROWS]
+        batch, duplicates = drop_duplicates(db, batch)
+        rows = insert_transactions(db, batch, job.user_id)
+        if index == len(starts) - 1:
+            # Learned with the last batch so a resumed job learns exactly once
+            learn_confirmed_categories(
+                db,
+                job.user_id,
+                zip(
+                    confirmed["description"],
+                    confirmed["merchant"],
+                    confirmed["amount"],
+                    confirmed["category"],
+                    confirmed["type"],
+                    confirmed["reviewed"],
+                ),
+            )
+        _checkpoint(db, job, index + 1, rows, duplicates)
+
+
+def run_import_job(job_id: str) -> None:
+    """Run (or resume) one job in batches, checkpointing after each commit."""
+    db = SessionLocal()
+    try:
+        job = _claim(db, job_id)
+        if job is None:
+            return
+
+        if job.kind == "confirm":
+            _run_confirm(db, job)
+        else:
+            _run_upload(db, job)
+
+        job.status = ImportJobStatusEnum.completed
+        job.message = f"Successfully imported {job.rows_processed} transactions"
+        job.finished_at = datetime.utcnow()
+        db.commit()
+
+        invalidate_user_trie(job.user_id)
+        if job.kind == "confirm":
+            invalidate_merchant_index(job.user_id)
+        try:
+            os.remove(job.source_path)
+        except FileNotFoundError:
+            pass
+
+    except Exception as e:
+        db.rollback()
+        job = db.get(ImportJob, job_id)
+        if job is not None:
+            job.status = ImportJobStatusEnum.failed
+            job.message = f"Error processing file: {str(e)}"
+            job.finished_at = datetime.utcnow()
+            db.commit()
+    finally:
+        db.close()
+
+
+def resume_if_stale(job: ImportJob) -> None:
+    """Hand a job whose worker stopped checkpointing to this process's pool."""
+    if job.status == ImportJobStatusEnum.running:
+        stale = datetime.utcnow() - timedelta(seconds=IMPORT_JOB_STALE_SECONDS)
+        if job.heartbeat_at is None or job.heartbeat_at < stale:
+            get_job_executor().submit(run_import_job, job.id)
+
+
+def resume_import_jobs() -> int:
+    """Queue every unfinished job at startup; each resumes after its last checkpoint."""
+    db = SessionLocal()
+    try:
+        pending = (
+            db.query(ImportJob.id)
+            .filter(
+                ImportJob.status.in_(
+                    [ImportJobStatusEnum.queued, ImportJobStatusEnum.running]
+                )
+            )
+            .all()
+        )
+    finally:
+        db.close()
+
+    for (job_id,) in pending:
+        get_job_executor().submit(run_import_job, job_id)
+    return len(pending)
+
+
+def job_progress(job: ImportJob) -> Dict:
+    """
+    Summarize a job's progress for polling.
+
+    Returns:
+        Dict with progress (0-1), rows_per_second and eta_seconds; rate and
+        ETA are None until the first batch is committed
+    """
+    if job.status == ImportJobStatusEnum.completed:
+        progress = 1.0
+    elif job.rows_total:
+        progress = job.rows_processed / job.rows_total
+    elif job.bytes_total:
+        progress = job.bytes_processed / job.bytes_total
+    else:
+        progress = 0.0
+
+    rows_per_second = eta_seconds = None
+    if job.started_at is not None and job.rows_processed:
+        end = job.finished_at or job.heartbeat_at or datetime.utcnow()
+        elapsed = max((end - job.started_at).total_seconds(), 1e-6)
+        rows_per_second = round(job.rows_processed / elapsed, 1)
+        if job.status == ImportJobStatusEnum.running and 0 < progress < 1:
+            eta_seconds = round(elapsed * (1 - progress) / progress, 1)
+
+    return {
+        "progress": round(min(progress, 1.0), 4),
+        "rows_per_second": rows_per_second,
+        "eta_seconds": eta_seconds,
+    }
@@ -1,9 +1,14 @@
-from fastapi import FastAPI, HTTPException, Depends, UploadFile, File, status
+from fastapi import (
+    FastAPI, HTTPException, Depends, UploadFile, File, Query, Request, Response, status
+)
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional, Tuple
 import pandas as pd
-import io
+import json
 import uuid
 from datetime import datetime, timedelta
 from contextlib import asynccontextmanager
@@ -11,18 +16,25 @@ from contextlib import asynccontextmanager
 # Local imports
 from database import (
     get_db,
+    get_async_db,
+    SessionLocal,
     create_tables,
     User as UserModel,
     Transaction as TransactionModel,
+    CategorizationRule as CategorizationRuleModel,
+    ImportJob as ImportJobModel,
+    bump_data_version,
 )
 from auth import (
     authenticate_user,
     create_user,
     get_current_active_user,
+    get_current_admin_user,
     create_access_token,
     create_refresh_token,
     verify_token,
     get_user_by_email,
+    get_user_by_id,
     get_user_by_username,
     ACCESS_TOKEN_EXPIRE_MINUTES,
 )
@@ -37,22 +49,103 @@ from schemas import (
     TransactionCreate,
     TransactionUpdate,
     TransactionResponse,
+    TransactionPage,
+    TransactionSearchResponse,
+    TransactionSort,
+    TransactionBatchUpdate,
+    TransactionBatchDelete,
+    TransactionBatchUpsert,
+    TransactionBatchResult,
+    TransactionBatchResponse,
+    SortOrder,
+    ExportFormat,
+    TransactionType,
     FinancialSummary,
     DashboardStats,
     FileUploadResponse,
+    ImportJobResponse,
     CategoryBreakdown,
     MonthlyData,
     CategoryResponse, 
     get_all_categories, 
     get_category_color,
     BulkUploadResponse,
-    TransactionPreview
+    TransactionPreview,
+    StagedConfirmRequest,
+    CategoryModelResponse,
+    CategorySuggestion,
+    CategorySuggestionsResponse,
+    CategorySuggestionBatchRequest,
+    CategorySuggestionBatchResponse,
+    CategoryRules,
+    CategoryRulesResponse,
+    CategorizationRuleCreate,
+    CategorizationRuleUpdate,
+    CategorizationRuleResponse,
 )
 
+from category_model import (
+    CATEGORY_MODEL_MIN_SAMPLES,
+    UNLABELED_CATEGORIES,
+    load_models,
+    train_user_model,
+)
+from typeahead import (
+    get_keyword_trie,
+    get_user_trie,
+    invalidate_user_trie,
+    suggest as typeahead_suggest,
+)
+from user_rules import get_user_rule_matcher, invalidate_user_rules
+from bulk_insert import insert_transactions
+from pagination import TRANSACTIONS_MAX_PAGE_SIZE, TRANSACTIONS_PAGE_SIZE
+from search import search_cursor, search_statement, search_terms
+from transaction_batch import (
+    TRANSACTION_BATCH_MAX_ITEMS,
+    delete_transactions,
+    update_transactions,
+    upsert_transactions,
+)
+from transaction_query import (
+    count_transactions,
+    filter_transactions,
+    order_page,
+    page_cursor,
+)
+from jobs import (
+    create_confirm_job,
+    create_upload_job,
+    job_progress,
+    resume_if_stale,
+    resume_import_jobs,
+    shutdown_import_jobs,
+)
+from staging import StagedPreview, preview_records, preview_store
+from dedup import Fingerprinter, drop_duplicates, duplicate_mask
+from executors import executor_stats, loop_lag, run_cpu, run_io, shutdown_executors
+from http_cache import cache_static, static_etag, user_data_etag
+from export import ARROW_AVAILABLE, ARROW_EXPORT_FORMATS, EXPORT_FORMATS, stream_export
+from ingest import (
+    SUPPORTED_EXTENSIONS,
+    SUPPORTED_FORMATS_MESSAGE,
+    UploadParser,
+    aiter_upload_frames,
+    peak_rss_mb,
+)
+from merchant_index import (
+    get_merchant_index,
+    invalidate_merchant_index,
+    learn_confirmed_categories,
+)
 from categorization import (
+    CATEGORIZATION_ENGINE,
     bulk_categorize_transactions, 
     auto_categorize_transaction,
-    get_category_suggestions
+    categorize_dataframe_parallel,
+    get_category_suggestions,
+    get_rule_table,
+    get_rules_version,
+    update_rule_table,
 )
 
 # Create FastAPI app using lifespan for startup/shutdown events
@@ -60,8 +153,14 @@ from categorization import (
 async def lifespan(app: FastAPI):
     # Startup actions
     create_tables()
+    load_models()
+    get_keyword_trie()
+    resume_import_jobs()
+    loop_lag.start()
     yield
-    # Shutdown actions (if any) can be added here
+    # Shutdown actions
+    shutdown_import_jobs()
+    shutdown_executors()
 
 app = FastAPI(
     title="FinTrack API",
@@ -86,27 +185,33 @@ async def root():
     return {"message": "FinTrack API v2.0 is running with JWT Authentication"}
 
 
+@app.get("/api/metrics")
+async def get_metrics(current_user: UserModel = Depends(get_current_admin_user)):
+    """Event loop lag and worker pool occupancy (admin only)."""
+    return executor_stats()
+
+
 # Authentication endpoints
 @app.post(
     "/api/auth/register",
     response_model=UserResponse,
     status_code=status.HTTP_201_CREATED,
 )
-async def register(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register(user_data: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """Register a new user."""
     # Check if user already exists
-    if get_user_by_email(db, user_data.email):
+    if await get_user_by_email(db, user_data.email):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered"
         )
 
-    if get_user_by_username(db, user_data.username):
+    if await get_user_by_username(db, user_data.username):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Username already taken"
         )
 
     # Create new user
-    user = create_user(
+    user = await create_user(
         db=db,
         email=user_data.email,
         username=user_data.username,
@@ -118,9 +223,9 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
 
 
 @app.post("/api/auth/login", response_model=Token)
-async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
+async def login(user_credentials: UserLogin, db: AsyncSession = Depends(get_async_db)):
     """Authenticate user and return JWT tokens."""
-    user = authenticate_user(db, user_credentials.email, user_credentials.password)
+    user = await authenticate_user(db, user_credentials.email, user_credentials.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -150,7 +255,7 @@ async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
 
 
 @app.post("/api/auth/refresh", response_model=Token)
-async def refresh_token(token_data: TokenRefresh, db: Session = Depends(get_db)):
+async def refresh_token(token_data: TokenRefresh, db: AsyncSession = Depends(get_async_db)):
     """Refresh access token using refresh token."""
     payload = verify_token(token_data.refresh_token, "refresh")
     if not payload:
@@ -159,7 +264,7 @@ async def refresh_token(token_data: TokenRefresh, db: Session = Depends(get_db))
         )
 
     user_id = payload.get("sub")
-    user = db.query(UserModel).filter(UserModel.id == int(user_id)).first()
+    user = await get_user_by_id(db, int(user_id))
     if not user or not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -194,11 +299,12 @@ async def get_current_user_info(
 async def update_current_user(
     user_update: UserUpdate,
     current_user: UserModel = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Update current user information."""
+    current_user = await db.get(UserModel, current_user.id)
     if user_update.email and user_update.email != current_user.email:
-        if get_user_by_email(db, user_update.email):
+        if await get_user_by_email(db, user_update.email):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Email already registered",
@@ -206,7 +312,7 @@ async def update_current_user(
         current_user.email = user_update.email
 
     if user_update.username and user_update.username != current_user.username:
-        if get_user_by_username(db, user_update.username):
+        if await get_user_by_username(db, user_update.username):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST, detail="Username already taken"
             )
@@ -215,20 +321,26 @@ async def update_current_user(
     if user_update.full_name is not None:
         current_user.full_name = user_update.full_name
 
-    db.commit()
-    db.refresh(current_user)
+    await db.commit()
+    await db.refresh(current_user)
     return current_user
 
 @app.get("/api/categories")
 async def get_categories(
+    request: Request,
+    response: Response,
     current_user: UserModel = Depends(get_current_active_user),
 ):
     """Get all available categories for transactions."""
-    return get_all_categories()
+    categories = get_all_categories()
+    cache_static(request, response, static_etag(categories))
+    return categories
 
 @app.get("/api/categories/{transaction_type}")
 async def get_categories_by_type(
     transaction_type: str,
+    request: Request,
+    response: Response,
     current_user: UserModel = Depends(get_current_active_user),
 ):
     """Get categories filtered by transaction type (income or expense)."""
@@ -238,40 +350,248 @@ async def get_categories_by_type(
             detail="Transaction type must be 'income' or 'expense'"
         )
     
-    all_categories = get_all_categories()
-    return all_categories[transaction_type]
+    categories = get_all_categories()[transaction_type]
+    cache_static(request, response, static_etag(categories))
+    return categories
 
 # Transaction endpoints
-@app.get("/api/transactions", response_model=List[TransactionResponse])
+@app.get("/api/transactions", response_model=TransactionPage)
 async def get_transactions(
+    limit: int = TRANSACTIONS_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    category: Optional[List[str]] = Query(None),
+    type: Optional[TransactionType] = None,
+    account: Optional[str] = None,
+    min_amount: Optional[float] = None,
+    max_amount: Optional[float] = None,
+    sort: TransactionSort = TransactionSort.date,
+    order: SortOrder = SortOrder.desc,
     current_user: UserModel = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+    etag: str = Depends(user_data_etag),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    """Get all transactions for the current user."""
-    transactions = (
-        db.query(TransactionModel)
-        .filter(TransactionModel.user_id == current_user.id)
-        .order_by(TransactionModel.date.desc())
-        .all()
+    """
+    Get the current user's transactions one page at a time.
+    Filters and sorting run in SQL. Pass next_cursor back as cursor, with
+    the same filters and sort, for the following page; pages are keyed
+    on (sort column, id), so deep pages cost the same as the first.
+    The first page also carries the total number of matching rows.
+    """
+    if not 1 <= limit <= TRANSACTIONS_MAX_PAGE_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"limit must be between 1 and {TRANSACTIONS_MAX_PAGE_SIZE}",
+        )
+
+    filtered = filter_transactions(
+        current_user.id,
+        date_from=date_from,
+        date_to=date_to,
+        categories=category,
+        type=type.value if type else None,
+        account=account,
+        min_amount=min_amount,
+        max_amount=max_amount,
+    )
+    descending = order == SortOrder.desc
+    try:
+        statement = order_page(filtered, sort.value, descending, cursor)
+    except (TypeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+
+    # One extra row tells whether another page follows
+    transactions = (await db.scalars(statement.limit(limit + 1))).all()
+    next_cursor = None
+    if len(transactions) > limit:
+        next_cursor = page_cursor(transactions[limit - 1], sort.value, descending)
+
+    total_count, total_is_estimate = None, False
+    if cursor is None:
+        total_count, total_is_estimate = await count_transactions(db, filtered)
+
+    return TransactionPage(
+        transactions=transactions[:limit],
+        next_cursor=next_cursor,
+        total_count=total_count,
+        total_is_estimate=total_is_estimate,
+    )
+
+
+@app.get("/api/transactions/search", response_model=TransactionSearchResponse)
+async def search_transactions(
+    q: str,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    current_user: UserModel = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Search the user's transactions by description and account, best match first.
+    Every word must match and the last one also matches as a prefix, so
+    "uber air" finds "Uber to Airport" and "pg&e" finds "PG&E". Every match
+    is ranked; pass next_cursor back as cursor, with the same q, for the
+    next page.
+    """
+    if not 1 <= limit <= TRANSACTIONS_MAX_PAGE_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"limit must be between 1 and {TRANSACTIONS_MAX_PAGE_SIZE}",
+        )
+    terms = search_terms(q)
+    if not terms:
+        return TransactionSearchResponse(transactions=[])
+
+    try:
+        # One extra row tells whether another page follows
+        statement = search_statement(current_user.id, terms, limit + 1, cursor)
+    except (TypeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+    rows = (await db.execute(statement)).all()
+    next_cursor = None
+    if len(rows) > limit:
+        transaction, rank = rows[limit - 1]
+        next_cursor = search_cursor(terms, transaction, rank)
+    return TransactionSearchResponse(
+        transactions=[transaction for transaction, _ in rows[:limit]],
+        next_cursor=next_cursor,
+    )
+
+
+@app.get("/api/transactions/export")
+async def export_transactions(
+    format: ExportFormat = ExportFormat.csv,
+    current_user: UserModel = Depends(get_current_active_user),
+):
+    """
+    Stream all of the user's transactions as CSV, NDJSON, XLSX, Parquet or Arrow.
+    Rows are read in fixed-size chunks and each chunk is sent as soon as it
+    is encoded, so memory stays flat however many transactions there are.
+    """
+    if format.value in ARROW_EXPORT_FORMATS and not ARROW_AVAILABLE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Parquet and Arrow export require pyarrow",
+        )
+
+    media_type, extension = EXPORT_FORMATS[format.value]
+    return StreamingResponse(
+        stream_export(current_user.id, format.value),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="transactions.{extension}"'
+        },
+    )
+
+
+def _check_batch_size(items: list) -> None:
+    if len(items) > TRANSACTION_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {TRANSACTION_BATCH_MAX_ITEMS} transactions per batch",
+        )
+
+
+@app.post("/api/transactions/batch/update", response_model=TransactionBatchResponse)
+async def batch_update_transactions(
+    batch: TransactionBatchUpdate,
+    current_user: UserModel = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Apply the same changes (e.g. a new category) to many transactions.
+    Runs as one UPDATE per few thousand ids in a single transaction.
+    """
+    _check_batch_size(batch.ids)
+    changes = batch.changes.dict(exclude_none=True)
+    if not changes:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="No changes given"
+        )
+    if "category" in changes or "type" in changes:
+        changes["needs_review"] = False
+
+    outcomes = await update_transactions(db, current_user.id, batch.ids, changes)
+    await db.execute(bump_data_version(current_user.id))
+    await db.commit()
+    invalidate_user_trie(current_user.id)
+    return TransactionBatchResponse(
+        results=[
+            TransactionBatchResult(id=id, outcome=outcome) for id, outcome in outcomes.items()
+        ]
+    )
+
+
+@app.post("/api/transactions/batch/delete", response_model=TransactionBatchResponse)
+async def batch_delete_transactions(
+    batch: TransactionBatchDelete,
+    current_user: UserModel = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Delete many transactions in a single transaction."""
+    _check_batch_size(batch.ids)
+    outcomes = await delete_transactions(db, current_user.id, batch.ids)
+    await db.execute(bump_data_version(current_user.id))
+    await db.commit()
+    invalidate_user_trie(current_user.id)
+    return TransactionBatchResponse(
+        results=[
+            TransactionBatchResult(id=id, outcome=outcome) for id, outcome in outcomes.items()
+        ]
+    )
+
+
+@app.post("/api/transactions/batch/upsert", response_model=TransactionBatchResponse)
+async def batch_upsert_transactions(
+    batch: TransactionBatchUpsert,
+    current_user: UserModel = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Create or replace many transactions in a single transaction.
+    Rows with an id the user owns replace that transaction; the rest are created.
+    """
+    _check_batch_size(batch.transactions)
+    results = await upsert_transactions(
+        db,
+        current_user.id,
+        [{**row.dict(), "needs_review": False} for row in batch.transactions],
+    )
+    await db.execute(bump_data_version(current_user.id))
+    await db.commit()
+    invalidate_user_trie(current_user.id)
+    return TransactionBatchResponse(
+        results=[
+            TransactionBatchResult(id=id, outcome=outcome, detail=detail)
+            for id, outcome, detail in results
+        ]
+    )
+
+
+async def _get_user_transaction(
+    db: AsyncSession, transaction_id: str, user_id: int
+) -> Optional[TransactionModel]:
+    return await db.scalar(
+        select(TransactionModel).where(
+            TransactionModel.id == transaction_id,
+            TransactionModel.user_id == user_id,
+        )
     )
-    return transactions
 
 
 @app.get("/api/transactions/{transaction_id}", response_model=TransactionResponse)
 async def get_transaction(
     transaction_id: str,
     current_user: UserModel = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Get a specific transaction."""
-    transaction = (
-        db.query(TransactionModel)
-        .filter(
-            TransactionModel.id == transaction_id,
-            TransactionModel.user_id == current_user.id,
-        )
-        .first()
-    )
+    transaction = await _get_user_transaction(db, transaction_id, current_user.id)
 
     if not transaction:
         raise HTTPException(
@@ -289,7 +609,7 @@ async def get_transaction(
 async def create_transaction(
     transaction_data: TransactionCreate,
     current_user: UserModel = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Create a new transaction."""
     transaction = TransactionModel(
@@ -297,8 +617,10 @@ async def create_transaction(
     )
 
     db.add(transaction)
-    db.commit()
-    db.refresh(transaction)
+    await db.execute(bump_data_version(current_user.id))
+    await db.commit()
+    await db.refresh(transaction)
+    invalidate_user_trie(current_user.id)
     return transaction
 
 
@@ -307,17 +629,10 @@ async def update_transaction(
     transaction_id: str,
     transaction_data: TransactionUpdate,
     current_user: UserModel = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Update a transaction."""
-    transaction = (
-        db.query(TransactionModel)
-        .filter(
-            TransactionModel.id == transaction_id,
-            TransactionModel.user_id == current_user.id,
-        )
-        .first()
-    )
+    transaction = await _get_user_transaction(db, transaction_id, current_user.id)
 
     if not transaction:
         raise HTTPException(
@@ -326,9 +641,12 @@ async def update_transaction(
 
     for field, value in transaction_data.dict().items():
         setattr(transaction, field, value)
+    transaction.needs_review = False
 
-    db.commit()
-    db.refresh(transaction)
+    await db.execute(bump_data_version(current_user.id))
+    await db.commit()
+    await db.refresh(transaction)
+    invalidate_user_trie(current_user.id)
     return transaction
 
 
@@ -336,40 +654,137 @@ async def update_transaction(
 async def delete_transaction(
     transaction_id: str,
     current_user: UserModel = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Delete a transaction."""
-    transaction = (
-        db.query(TransactionModel)
+    transaction = await _get_user_transaction(db, transaction_id, current_user.id)
+
+    if not transaction:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Transaction not found"
+        )
+
+    await db.delete(transaction)
+    await db.execute(bump_data_version(current_user.id))
+    await db.commit()
+    invalidate_user_trie(current_user.id)
+    return {"message": "Transaction deleted successfully"}
+
+
+# Categorization rule endpoints
+def _check_rule_amounts(rule_data: CategorizationRuleCreate) -> None:
+    if (
+        rule_data.min_amount is not None
+        and rule_data.max_amount is not None
+        and rule_data.min_amount > rule_data.max_amount
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="min_amount cannot be greater than max_amount",
+        )
+
+
+def _get_user_rule(db: Session, rule_id: int, user_id: int) -> CategorizationRuleModel:
+    rule = (
+        db.query(CategorizationRuleModel)
         .filter(
-            TransactionModel.id == transaction_id,
-            TransactionModel.user_id == current_user.id,
+            CategorizationRuleModel.id == rule_id,
+            CategorizationRuleModel.user_id == user_id,
         )
         .first()
     )
 
-    if not transaction:
+    if not rule:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Transaction not found"
+            status_code=status.HTTP_404_NOT_FOUND, detail="Rule not found"
         )
 
-    db.delete(transaction)
+    return rule
+
+
+@app.get("/api/rules", response_model=List[CategorizationRuleResponse])
+def get_rules(
+    current_user: UserModel = Depends(get_current_active_user),
+    db: Session = Depends(get_db),
+):
+    """Get the current user's categorization rules, highest priority first."""
+    return (
+        db.query(CategorizationRuleModel)
+        .filter(CategorizationRuleModel.user_id == current_user.id)
+        .order_by(CategorizationRuleModel.priority.desc(), CategorizationRuleModel.id)
+        .all()
+    )
+
+
+@app.post(
+    "/api/rules",
+    response_model=CategorizationRuleResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+def create_rule(
+    rule_data: CategorizationRuleCreate,
+    current_user: UserModel = Depends(get_current_active_user),
+    db: Session = Depends(get_db),
+):
+    """Create a categorization rule."""
+    _check_rule_amounts(rule_data)
+    rule = CategorizationRuleModel(user_id=current_user.id, **rule_data.dict())
+
+    db.add(rule)
     db.commit()
-    return {"message": "Transaction deleted successfully"}
+    db.refresh(rule)
+    invalidate_user_rules(current_user.id)
+    return rule
+
+
+@app.put("/api/rules/{rule_id}", response_model=CategorizationRuleResponse)
+def update_rule(
+    rule_id: int,
+    rule_data: CategorizationRuleUpdate,
+    current_user: UserModel = Depends(get_current_active_user),
+    db: Session = Depends(get_db),
+):
+    """Update a categorization rule."""
+    _check_rule_amounts(rule_data)
+    rule = _get_user_rule(db, rule_id, current_user.id)
+
+    for field, value in rule_data.dict().items():
+        setattr(rule, field, value)
+
+    db.commit()
+    db.refresh(rule)
+    invalidate_user_rules(current_user.id)
+    return rule
+
+
+@app.delete("/api/rules/{rule_id}")
+def delete_rule(
+    rule_id: int,
+    current_user: UserModel = Depends(get_current_active_user),
+    db: Session = Depends(get_db),
+):
+    """Delete a categorization rule."""
+    rule = _get_user_rule(db, rule_id, current_user.id)
+
+    db.delete(rule)
+    db.commit()
+    invalidate_user_rules(current_user.id)
+    return {"message": "Rule deleted successfully"}
 
 
 # Dashboard endpoints
 @app.get("/api/dashboard/stats", response_model=DashboardStats)
 async def get_dashboard_stats(
     current_user: UserModel = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+    etag: str = Depends(user_data_etag),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Get dashboard statistics for the current user."""
     transactions = (
-        db.query(TransactionModel)
-        .filter(TransactionModel.user_id == current_user.id)
-        .all()
-    )
+        await db.scalars(
+            select(TransactionModel).where(TransactionModel.user_id == current_user.id)
+        )
+    ).all()
 
     total_income = sum(t.amount for t in transactions if t.type.value == "income")
     total_expenses = sum(t.amount for t in transactions if t.type.value == "expense")
@@ -395,14 +810,15 @@ async def get_dashboard_stats(
 @app.get("/api/dashboard/summary", response_model=FinancialSummary)
 async def get_financial_summary(
     current_user: UserModel = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+    etag: str = Depends(user_data_etag),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Get financial summary for the current user."""
     transactions = (
-        db.query(TransactionModel)
-        .filter(TransactionModel.user_id == current_user.id)
-        .all()
-    )
+        await db.scalars(
+            select(TransactionModel).where(TransactionModel.user_id == current_user.id)
+        )
+    ).all()
 
     total_income = sum(t.amount for t in transactions if t.type.value == "income")
     total_expenses = sum(t.amount for t in transactions if t.type.value == "expense")
@@ -481,127 +897,175 @@ async def get_financial_summary(
 # File upload endpoint
 @app.post("/api/upload", response_model=FileUploadResponse)
 async def upload_file(
+    response: Response,
     file: UploadFile = File(...),
+    background: bool = False,
     current_user: UserModel = Depends(get_current_active_user),
     db: Session = Depends(get_db),
 ):
-    """Upload and process financial data file."""
-    if not file.filename.endswith((".csv", ".xlsx", ".xls")):
+    """
+    Upload and process financial data file.
+    With background=true the import is queued and its job id returned
+    right away; poll /api/jobs/{job_id} for progress.
+    """
+    if not file.filename.endswith(SUPPORTED_EXTENSIONS):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Only CSV and Excel files are supported",
+            detail=SUPPORTED_FORMATS_MESSAGE,
         )
 
-    try:
-        contents = await file.read()
-
-        if file.filename.endswith(".csv"):
-            df = pd.read_csv(io.StringIO(contents.decode("utf-8")))
-        else:
-            df = pd.read_excel(io.BytesIO(contents))
+    if background:
+        job = await run_io(create_upload_job, db, current_user.id, file)
+        response.status_code = status.HTTP_202_ACCEPTED
+        return FileUploadResponse(
+            message="Import queued",
+            processed_count=0,
+            job_id=job.id,
+        )
 
-        # Process the uploaded data
+    try:
+        # Process the uploaded data one bounded batch at a time
+        parser = UploadParser()
+        fingerprinter = Fingerprinter(current_user.id)
         processed_count = 0
-        for _, row in df.iterrows():
-            # Map CSV columns to our transaction format
-            # This is a simplified mapping - adjust based on actual CSV format
-            amount = float(row.get("amount", 0))
-            transaction = TransactionModel(
-                id=str(uuid.uuid4()),
-                user_id=current_user.id,
-                date=datetime.now(),  # In production, parse from CSV
-                description=str(row.get("description", "Imported transaction")),
-                category=str(row.get("category", "Other")),
-                amount=abs(amount),
-                type="expense" if amount < 0 else "income",
-                status="completed",
-                account=str(row.get("account", "Imported Account")),
+        duplicate_count = 0
+        async for df in aiter_upload_frames(file):
+            inserted, duplicates = await run_io(
+                _import_upload_batch, db, parser, fingerprinter, df, current_user.id
             )
-            db.add(transaction)
-            processed_count += 1
+            processed_count += inserted
+            duplicate_count += duplicates
 
-        db.commit()
+        # One commit keeps the import all-or-nothing
+        await run_io(db.commit)
+        invalidate_user_trie(current_user.id)
 
         return FileUploadResponse(
             message=f"Successfully processed {processed_count} transactions",
             processed_count=processed_count,
+            duplicate_count=duplicate_count,
+            parse_error_count=parser.error_count,
+            parse_errors=parser.errors,
+            peak_rss_mb=peak_rss_mb(),
         )
 
+    except HTTPException:
+        await run_io(db.rollback)
+        raise
     except Exception as e:
-        db.rollback()
+        await run_io(db.rollback)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Error processing file: {str(e)}",
         )
 
+
+def _import_upload_batch(
+    db: Session,
+    parser: UploadParser,
+    fingerprinter: Fingerprinter,
+    df: pd.DataFrame,
+    user_id: int,
+) -> Tuple[int, int]:
+    """Parse and insert one raw batch without committing; returns (inserted, duplicates)."""
+    parsed = parser.parse(df)
+    parsed = parsed.assign(fingerprint=fingerprinter.fingerprint(parsed))
+    # Rows already imported from an overlapping statement are skipped
+    parsed, duplicates = drop_duplicates(db, parsed)
+    return insert_transactions(db, parsed, user_id), duplicates
+
+
+def _parse_preview_batch(
+    db: Session,
+    parser: UploadParser,
+    fingerprinter: Fingerprinter,
+    df: pd.DataFrame,
+) -> pd.DataFrame:
+    """Parse and fingerprint one raw batch, flagging rows that are already stored."""
+    parsed = parser.parse(df)
+    parsed = parsed[["id", "date", "description", "amount", "merchant", "account"]]
+    parsed = parsed.assign(fingerprint=fingerprinter.fingerprint(parsed))
+    return parsed.assign(duplicate=duplicate_mask(db, parsed))
+
+
+async def _iter_preview_batches(
+    file: UploadFile,
+    user_id: int,
+    db: Session,
+    parser: UploadParser,
+):
+    """Parse, fingerprint and auto-categorize an upload one bounded batch at a time."""
+    merchant_index = await run_io(get_merchant_index, db, user_id)
+    model_user_id = user_id if CATEGORIZATION_ENGINE != "keyword" else None
+    user_rules = await run_io(get_user_rule_matcher, db, user_id)
+    fingerprinter = Fingerprinter(user_id)
+
+    async for df in aiter_upload_frames(file):
+        parsed = await run_io(_parse_preview_batch, db, parser, fingerprinter, df)
+        yield parsed.assign(
+            **await categorize_dataframe_parallel(
+                parsed,
+                merchant_index=merchant_index,
+                model_user_id=model_user_id,
+                user_rules=user_rules,
+            )
+        )
+
+
+def _stage_preview(user_id: int, batches: List[pd.DataFrame]) -> Tuple[str, StagedPreview]:
+    """Stage categorized batches and return (upload_token, staged preview)."""
+    upload_token = preview_store.put(
+        user_id,
+        pd.concat(batches, ignore_index=True) if batches else _empty_preview_frame(),
+        get_rules_version(),
+    )
+    return upload_token, preview_store.get(user_id, upload_token)
+
+
 @app.post("/api/upload/preview", response_model=BulkUploadResponse)
 async def preview_upload(
     file: UploadFile = File(...),
+    offset: int = 0,
+    limit: Optional[int] = None,
+    needs_review_only: bool = False,
     current_user: UserModel = Depends(get_current_active_user),
+    db: Session = Depends(get_db),
 ):
     """
     Preview uploaded file with auto-categorization before saving.
-    Returns categorized transactions for user review.
+    The categorized rows are staged on the server under the returned
+    upload_token; offset/limit/needs_review_only select which of them
+    are returned (all of them by default).
     """
-    if not file.filename.endswith((".csv", ".xlsx", ".xls")):
+    if not file.filename.endswith(SUPPORTED_EXTENSIONS):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Only CSV and Excel files are supported",
+            detail=SUPPORTED_FORMATS_MESSAGE,
         )
+    _check_page(offset, limit)
 
     try:
-        contents = await file.read()
-
-        # Parse file
-        if file.filename.endswith(".csv"):
-            df = pd.read_csv(io.StringIO(contents.decode("utf-8")))
-        else:
-            df = pd.read_excel(io.BytesIO(contents))
-
-        # Process and categorize transactions
-        transactions_data = []
-        for _, row in df.iterrows():
-            # Parse amount - handle both positive/negative and separate debit/credit columns
-            amount = 0
-            if 'amount' in row:
-                amount = float(row['amount'])
-            elif 'debit' in row and 'credit' in row:
-                amount = float(row.get('debit', 0) or 0) - float(row.get('credit', 0) or 0)
-            elif 'debit' in row:
-                amount = -abs(float(row.get('debit', 0) or 0))
-            elif 'credit' in row:
-                amount = abs(float(row.get('credit', 0) or 0))
-            
-            # Parse date
-            date_str = str(row.get('date', ''))
-            try:
-                parsed_date = pd.to_datetime(date_str)
-                date = parsed_date.strftime('%Y-%m-%d')
-            except:
-                date = datetime.now().strftime('%Y-%m-%d')
-            
-            transactions_data.append({
-                "id": str(uuid.uuid4()),
-                "date": date,
-                "description": str(row.get("description", "Imported transaction")),
-                "amount": abs(amount),
-                "merchant": str(row.get("merchant", row.get("account", ""))),
-                "account": str(row.get("account", "Imported Account")),
-            })
-
-        # Auto-categorize all transactions
-        categorized_transactions = bulk_categorize_transactions(transactions_data)
-        
-        # Count transactions that need review
-        needs_review = sum(1 for t in categorized_transactions if t["needs_review"])
+        parser = UploadParser()
+        batches = [
+            batch async for batch in _iter_preview_batches(file, current_user.id, db, parser)
+        ]
+        upload_token, staged = _stage_preview(current_user.id, batches)
 
         return BulkUploadResponse(
-            message=f"Preview ready: {len(categorized_transactions)} transactions categorized",
-            total_count=len(categorized_transactions),
-            preview=categorized_transactions,
-            needs_review_count=needs_review,
+            message=f"Preview ready: {len(staged.frame)} transactions categorized",
+            total_count=len(staged.frame),
+            preview=staged.page(offset, limit, needs_review_only),
+            needs_review_count=staged.needs_review_count,
+            duplicate_count=staged.duplicate_count,
+            rule_version=staged.rule_version,
+            upload_token=upload_token,
+            parse_error_count=parser.error_count,
+            parse_errors=parser.errors,
+            peak_rss_mb=peak_rss_mb(),
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -609,69 +1073,481 @@ async def preview_upload(
         )
 
 
+@app.post("/api/upload/preview/stream")
+async def preview_upload_stream(
+    file: UploadFile = File(...),
+    current_user: UserModel = Depends(get_current_active_user),
+):
+    """
+    Preview an upload as newline-delimited JSON.
+    Each line is a TransactionPreview, written as soon as its batch is
+    categorized. The last line is {"summary": {...}} with the counts and
+    the upload_token of the staged preview, or {"error": "..."} if
+    processing failed part-way.
+    """
+    if not file.filename.endswith(SUPPORTED_EXTENSIONS):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=SUPPORTED_FORMATS_MESSAGE,
+        )
+
+    async def generate():
+        # The response outlives the request dependencies, so it owns a session
+        db = SessionLocal()
+        try:
+            parser = UploadParser()
+            batches = []
+            async for batch in _iter_preview_batches(file, current_user.id, db, parser):
+                batches.append(batch)
+                yield "".join(
+                    json.dumps(row) + "\n" for row in preview_records(batch)
+                )
+
+            upload_token, staged = _stage_preview(current_user.id, batches)
+            summary = BulkUploadResponse(
+                message=f"Preview ready: {len(staged.frame)} transactions categorized",
+                total_count=len(staged.frame),
+                preview=[],
+                needs_review_count=staged.needs_review_count,
+                duplicate_count=staged.duplicate_count,
+                rule_version=staged.rule_version,
+                upload_token=upload_token,
+                parse_error_count=parser.error_count,
+                parse_errors=parser.errors,
+                peak_rss_mb=peak_rss_mb(),
+            )
+            yield json.dumps({"summary": summary.dict(exclude={"preview"})}) + "\n"
+
+        except Exception as e:
+            yield json.dumps({"error": f"Error processing file: {str(e)}"}) + "\n"
+        finally:
+            await run_io(db.close)
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+
+def _check_page(offset: int, limit: Optional[int]) -> None:
+    if offset < 0 or (limit is not None and limit < 1):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="offset must be >= 0 and limit >= 1",
+        )
+
+
+def _empty_preview_frame() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "id": pd.Series(dtype=object),
+            "date": pd.Series(dtype="datetime64[ns]"),
+            "description": pd.Series(dtype=object),
+            "amount": pd.Series(dtype=float),
+            "merchant": pd.Series(dtype=object),
+            "account": pd.Series(dtype=object),
+            "suggested_category": pd.Series(dtype=object),
+            "suggested_type": pd.Series(dtype=object),
+            "fingerprint": pd.Series(dtype=object),
+            "duplicate": pd.Series(dtype=bool),
+            "confidence": pd.Series(dtype=float),
+            "needs_review": pd.Series(dtype=bool),
+        }
+    )
+
+
+def _get_staged_preview(token: str, user_id: int) -> StagedPreview:
+    staged = preview_store.get(user_id, token)
+    if staged is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Upload preview not found or expired",
+        )
+    return staged
+
+
+@app.get("/api/upload/preview/{upload_token}", response_model=BulkUploadResponse)
+async def get_staged_preview(
+    upload_token: str,
+    offset: int = 0,
+    limit: Optional[int] = 100,
+    needs_review_only: bool = False,
+    current_user: UserModel = Depends(get_current_active_user),
+):
+    """Page through a staged upload preview."""
+    _check_page(offset, limit)
+    staged = _get_staged_preview(upload_token, current_user.id)
+
+    return BulkUploadResponse(
+        message=f"Preview ready: {len(staged.frame)} transactions categorized",
+        total_count=len(staged.frame),
+        preview=staged.page(offset, limit, needs_review_only),
+        needs_review_count=staged.needs_review_count,
+        duplicate_count=staged.duplicate_count,
+        rule_version=staged.rule_version,
+        upload_token=upload_token,
+    )
+
+
+def _insert_confirmed(
+    db: Session,
+    user_id: int,
+    confirmed: pd.DataFrame,
+) -> Tuple[int, int]:
+    """Insert reviewed rows and learn their categories; returns (inserted, duplicates)."""
+    # Learn from every reviewed row, but don't import ones already stored
+    new_rows, duplicate_count = drop_duplicates(db, confirmed)
+    processed_count = insert_transactions(db, new_rows, user_id)
+
+    # Remember reviewed categories so the next import doesn't ask again
+    learn_confirmed_categories(
+        db,
+        user_id,
+        zip(
+            confirmed["description"],
+            confirmed["merchant"],
+            confirmed["amount"],
+            confirmed["category"],
+            confirmed["type"],
+            confirmed["reviewed"],
+        ),
+    )
+
+    db.commit()
+    return processed_count, duplicate_count
+
+
+async def _import_confirmed(
+    db: Session,
+    user_id: int,
+    confirmed: pd.DataFrame,
+    background: bool,
+    response: Response,
+) -> FileUploadResponse:
+    """Insert reviewed rows now, or queue them as a background job."""
+    if background:
+        job = await run_io(create_confirm_job, db, user_id, confirmed)
+        response.status_code = status.HTTP_202_ACCEPTED
+        return FileUploadResponse(
+            message="Import queued",
+            processed_count=0,
+            job_id=job.id,
+        )
+
+    processed_count, duplicate_count = await run_io(_insert_confirmed, db, user_id, confirmed)
+    invalidate_merchant_index(user_id)
+    invalidate_user_trie(user_id)
+
+    return FileUploadResponse(
+        message=f"Successfully imported {processed_count} transactions",
+        processed_count=processed_count,
+        duplicate_count=duplicate_count,
+    )
+
+
 @app.post("/api/upload/confirm", response_model=FileUploadResponse)
 async def confirm_upload(
     transactions: List[TransactionPreview],
+    response: Response,
+    background: bool = False,
     current_user: UserModel = Depends(get_current_active_user),
     db: Session = Depends(get_db),
 ):
     """
     Save the reviewed and confirmed transactions to database.
+    With background=true the rows are queued as an import job.
     """
     try:
-        processed_count = 0
-        
-        for txn in transactions:
-            # Use the user-confirmed category or suggested category
-            transaction = TransactionModel(
-                id=txn.id,
-                user_id=current_user.id,
-                date=datetime.strptime(txn.date, '%Y-%m-%d').date(),
-                description=txn.description,
-                category=txn.suggested_category,  # User can modify this before confirming
-                amount=abs(txn.amount),
-                type=txn.suggested_type,
-                status="completed",
-                account=txn.account,
-            )
-            db.add(transaction)
-            processed_count += 1
+        confirmed = pd.DataFrame(
+            {
+                "id": [txn.id for txn in transactions],
+                "date": pd.to_datetime([txn.date for txn in transactions], format="%Y-%m-%d"),
+                "description": [txn.description for txn in transactions],
+                "merchant": [txn.merchant for txn in transactions],
+                # Use the user-confirmed category or suggested category
+                "category": [txn.suggested_category for txn in transactions],
+                "amount": [abs(txn.amount) for txn in transactions],
+                "type": [txn.suggested_type for txn in transactions],
+                "account": [txn.account for txn in transactions],
+                # Every row sent back was confirmed by the user; flagged
+                # ones are learned even when they match the keyword guess
+                "needs_review": False,
+                "reviewed": [txn.needs_review for txn in transactions],
+            }
+        )
+        confirmed["fingerprint"] = Fingerprinter(current_user.id).fingerprint(confirmed)
+        return await _import_confirmed(db, current_user.id, confirmed, background, response)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        await run_io(db.rollback)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Error saving transactions: {str(e)}",
+        )
 
-        db.commit()
 
-        return FileUploadResponse(
-            message=f"Successfully imported {processed_count} transactions",
-            processed_count=processed_count,
+@app.post("/api/upload/confirm/{upload_token}", response_model=FileUploadResponse)
+async def confirm_staged_upload(
+    upload_token: str,
+    confirm_data: StagedConfirmRequest,
+    response: Response,
+    background: bool = False,
+    current_user: UserModel = Depends(get_current_active_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Save a staged preview, applying only the rows the user changed.
+    """
+    # Taken out of the store so the same preview can't be imported twice
+    staged = preview_store.pop(current_user.id, upload_token)
+    if staged is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Upload preview not found or expired",
+        )
+
+    try:
+        frame = staged.frame
+        confirmed = pd.DataFrame(
+            {
+                "id": frame["id"],
+                "date": frame["date"],
+                "description": frame["description"],
+                "merchant": frame["merchant"].astype(object),
+                "category": frame["suggested_category"].astype(object),
+                "amount": frame["amount"],
+                "type": frame["suggested_type"].astype(object),
+                "account": frame["account"].astype(object),
+                # Flagged rows the user didn't override stay unreviewed
+                "needs_review": frame["needs_review"],
+                "reviewed": False,
+                "fingerprint": frame["fingerprint"],
+            }
         )
 
+        if confirm_data.overrides:
+            overrides = pd.DataFrame([override.dict() for override in confirm_data.overrides])
+            positions = pd.Index(confirmed["id"]).get_indexer(overrides["id"])
+            if (positions < 0).any():
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Overrides reference rows that are not in this preview",
+                )
+
+            for column in ("category", "type", "account"):
+                given = overrides[column].notna().to_numpy()
+                confirmed.iloc[positions[given], confirmed.columns.get_loc(column)] = (
+                    overrides[column][given].to_numpy()
+                )
+            # Overridden rows are reviewed: stored as such and always learned
+            confirmed.iloc[positions, confirmed.columns.get_loc("needs_review")] = False
+            confirmed.iloc[positions, confirmed.columns.get_loc("reviewed")] = True
+            confirmed = confirmed.drop(index=positions[overrides["exclude"].to_numpy()])
+
+        return await _import_confirmed(db, current_user.id, confirmed, background, response)
+
+    except HTTPException:
+        preview_store.restore(upload_token, staged)
+        raise
     except Exception as e:
-        db.rollback()
+        await run_io(db.rollback)
+        preview_store.restore(upload_token, staged)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Error saving transactions: {str(e)}",
         )
 
 
-@app.get("/api/categorize/suggest")
+@app.get("/api/jobs/{job_id}", response_model=ImportJobResponse)
+def get_import_job(
+    job_id: str,
+    current_user: UserModel = Depends(get_current_active_user),
+    db: Session = Depends(get_db),
+):
+    """Get the progress of a background import."""
+    job = (
+        db.query(ImportJobModel)
+        .filter(
+            ImportJobModel.id == job_id,
+            ImportJobModel.user_id == current_user.id,
+        )
+        .first()
+    )
+
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Import job not found"
+        )
+
+    # A job whose worker died is picked up again by whoever polls it
+    resume_if_stale(job)
+
+    return ImportJobResponse(
+        id=job.id,
+        kind=job.kind,
+        filename=job.filename,
+        status=job.status.value,
+        rows_processed=job.rows_processed,
+        rows_total=job.rows_total,
+        duplicate_count=job.duplicate_count,
+        error_count=job.error_count,
+        errors=json.loads(job.errors or "[]"),
+        message=job.message,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+        **job_progress(job),
+    )
+
+
+def _training_rows(db: Session, user_id: int) -> List[Tuple[str, str, str, str]]:
+    """The user's reviewed, specifically categorized transactions as training rows."""
+    rows = (
+        db.query(
+            TransactionModel.description,
+            TransactionModel.account,
+            TransactionModel.category,
+            TransactionModel.type,
+        )
+        .filter(
+            TransactionModel.user_id == user_id,
+            TransactionModel.category.not_in(UNLABELED_CATEGORIES),
+            TransactionModel.needs_review.is_(False),
+        )
+        .all()
+    )
+    return [
+        (description, account, category, txn_type.value)
+        for description, account, category, txn_type in rows
+    ]
+
+
+@app.post("/api/categorize/model/train", response_model=CategoryModelResponse)
+async def train_category_model(
+    current_user: UserModel = Depends(get_current_active_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Train the user's category model from their confirmed transactions.
+    Catch-all categories and imported rows still flagged for review are
+    left out; the query and the training run off the event loop.
+    """
+    rows = await run_io(_training_rows, db, current_user.id)
+
+    if len(rows) < CATEGORY_MODEL_MIN_SAMPLES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At least {CATEGORY_MODEL_MIN_SAMPLES} reviewed transactions are needed to train a model",
+        )
+
+    model = await run_cpu(train_user_model, current_user.id, rows)
+
+    return CategoryModelResponse(
+        engine=CATEGORIZATION_ENGINE,
+        categories=model.categories,
+        samples=model.samples,
+        trained_at=model.trained_at,
+    )
+
+
+def _suggest_categories(
+    description: str,
+    mode: str,
+    limit: int,
+    user_trie=None,
+) -> CategorySuggestionsResponse:
+    if mode == "typeahead":
+        suggestions = typeahead_suggest(description, user_trie, limit)
+    else:
+        suggestions = get_category_suggestions(description)[:limit]
+
+    return CategorySuggestionsResponse(
+        description=description,
+        suggestions=[
+            CategorySuggestion(category=cat, confidence=conf)
+            for cat, conf in suggestions
+        ],
+        rule_version=get_rules_version(),
+    )
+
+
+def _check_suggestion_mode(mode: str) -> None:
+    if mode not in ["match", "typeahead"]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Mode must be 'match' or 'typeahead'",
+        )
+
+
+@app.get("/api/categorize/suggest", response_model=CategorySuggestionsResponse)
 async def suggest_categories(
     description: str,
+    mode: str = "match",
+    limit: int = Query(3, ge=1, le=20),
     current_user: UserModel = Depends(get_current_active_user),
+    db: Session = Depends(get_db),
 ):
     """
     Get category suggestions for a given description.
-    Useful for manual categorization assistance.
+    Useful for manual categorization assistance. Use mode=typeahead for
+    partial input; it also draws on the user's own history.
     """
-    from categorization import get_category_suggestions
-    
-    suggestions = get_category_suggestions(description)
-    
-    return {
-        "description": description,
-        "suggestions": [
-            {"category": cat, "confidence": conf}
-            for cat, conf in suggestions
+    _check_suggestion_mode(mode)
+    user_trie = (
+        await get_user_trie(db, current_user.id) if mode == "typeahead" else None
+    )
+    return _suggest_categories(description, mode, limit, user_trie)
+
+
+@app.post(
+    "/api/categorize/suggest/batch", response_model=CategorySuggestionBatchResponse
+)
+async def suggest_categories_batch(
+    request: CategorySuggestionBatchRequest,
+    current_user: UserModel = Depends(get_current_active_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Get category suggestions for many descriptions in one round trip.
+    """
+    _check_suggestion_mode(request.mode)
+    user_trie = (
+        await get_user_trie(db, current_user.id)
+        if request.mode == "typeahead"
+        else None
+    )
+    return CategorySuggestionBatchResponse(
+        results=[
+            _suggest_categories(description, request.mode, request.limit, user_trie)
+            for description in request.descriptions
         ]
-    }
+    )
+
+@app.get("/api/admin/rules", response_model=CategoryRulesResponse)
+async def get_category_rules(
+    current_user: UserModel = Depends(get_current_admin_user),
+):
+    """Get the keyword rules currently used for auto-categorization."""
+    version, categories = get_rule_table()
+    return CategoryRulesResponse(version=version, categories=categories)
+
+
+@app.put("/api/admin/rules", response_model=CategoryRulesResponse)
+async def replace_category_rules(
+    rules: CategoryRules,
+    current_user: UserModel = Depends(get_current_admin_user),
+):
+    """
+    Replace the keyword rules. Running workers pick up the new version
+    without a restart.
+    """
+    if not rules.categories or not any(rules.categories.values()):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="At least one category with keywords is required",
+        )
+
+    version = update_rule_table(rules.categories)
+    return CategoryRulesResponse(version=version, categories=rules.categories)
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,164 @@
+"""Per-user merchant -> category mappings learned from confirmed imports."""
+
+import threading
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+from decouple import config
+from sqlalchemy.orm import Session
+
+from categorization import auto_categorize_transaction, normalize_transaction_text
+from database import MerchantCategory, TransactionTypeEnum
+
+# Seconds a worker trusts its in-memory copy before reloading from the database
+MERCHANT_INDEX_TTL = config("MERCHANT_INDEX_TTL", default=300, cast=int)
+# Keys per IN (...) query when reading existing mappings
+_QUERY_BATCH_SIZE = 500
+
+_index: Dict[int, Tuple[float, Dict[str, Tuple[str, str]]]] = {}
+_lock = threading.Lock()
+
+
+def get_merchant_index(db: Session, user_id: int) -> Dict[str, Tuple[str, str]]:
+    """
+    Return the user's learned mapping, loading it from the database if needed.
+
+    The copy is per process: ``invalidate_merchant_index`` only clears the
+    calling worker's cache, so other workers keep serving their copy for up
+    to ``MERCHANT_INDEX_TTL`` seconds after a change.
+
+    Args:
+        db: Database session
+        user_id: Owner of the mapping
+
+    Returns:
+        Dict of normalized merchant text -> (category, transaction_type)
+    """
+    with _lock:
+        cached = _index.get(user_id)
+    if cached is not None and time.monotonic() - cached[0] < MERCHANT_INDEX_TTL:
+        return cached[1]
+
+    rows = (
+        db.query(
+            MerchantCategory.merchant_key,
+            MerchantCategory.category,
+            MerchantCategory.type,
+        )
+        .filter(MerchantCategory.user_id == user_id)
+        .all()
+    )
+    mapping = {key: (category, txn_type.value) for key, category, txn_type in rows}
+
+    with _lock:
+        _index[user_id] = (time.monotonic(), mapping)
+    return mapping
+
+
+def invalidate_merchant_index(user_id: Optional[int] = None) -> None:
+    """Forget the cached mapping for one user, or for everyone."""
+    with _lock:
+        if user_id is None:
+            _index.clear()
+        else:
+            _index.pop(user_id, None)
+
+
+def learn_confirmed_categories(
+    db: Session,
+    user_id: int,
+    confirmed: Iterable[Tuple[str, Optional[str], float, str, str, bool]],
+) -> int:
+    """
+    Record the categories a user confirmed during import review.
+
+    Rows the user explicitly reviewed, or whose confirmed category differs
+    from the keyword guess, are stored. A row the user left at the keyword
+    guess deletes any stored mapping for its merchant, so a correction
+    back to the keyword answer undoes an earlier override. When a merchant
+    appears more than once, the last row wins. Existing mappings are read
+    with one query per key batch and written back with bulk statements.
+    The caller owns the transaction and should call
+    ``invalidate_merchant_index`` once it has committed.
+
+    Args:
+        db: Database session
+        user_id: Owner of the confirmed rows
+        confirmed: Iterable of (description, merchant, amount, category,
+            transaction_type, reviewed); ``reviewed`` marks rows the user
+            confirmed or overrode by hand, unlike ``Transaction.needs_review``
+            which marks rows nobody has reviewed yet
+
+    Returns:
+        Number of merchant mappings created, updated or deleted
+    """
+    # merchant key -> (category, type) to store, or None to forget
+    decisions: Dict[str, Optional[Tuple[str, str]]] = {}
+    for description, merchant, amount, category, txn_type, reviewed in confirmed:
+        key = normalize_transaction_text(description, merchant)
+        decisions[key] = (category, txn_type)
+        if not reviewed:
+            guessed_category, guessed_type, _ = auto_categorize_transaction(
+                description, amount, merchant
+            )
+            if (guessed_category, guessed_type) == (category, txn_type):
+                decisions[key] = None
+
+    if not decisions:
+        return 0
+
+    keys = list(decisions)
+    existing = {}
+    for start in range(0, len(keys), _QUERY_BATCH_SIZE):
+        batch = keys[start:start + _QUERY_BATCH_SIZE]
+        rows = (
+            db.query(
+                MerchantCategory.merchant_key,
+                MerchantCategory.id,
+                MerchantCategory.hits,
+            )
+            .filter(
+                MerchantCategory.user_id == user_id,
+                MerchantCategory.merchant_key.in_(batch),
+            )
+            .all()
+        )
+        existing.update((key, (row_id, hits)) for key, row_id, hits in rows)
+
+    learned = {key: value for key, value in decisions.items() if value is not None}
+    forgotten = [
+        existing[key][0]
+        for key, value in decisions.items()
+        if value is None and key in existing
+    ]
+
+    updates = []
+    inserts = []
+    for key, (category, txn_type) in learned.items():
+        if key in existing:
+            row_id, hits = existing[key]
+            updates.append({
+                "id": row_id,
+                "category": category,
+                "type": TransactionTypeEnum(txn_type),
+                "hits": (hits or 0) + 1,
+            })
+        else:
+            inserts.append({
+                "user_id": user_id,
+                "merchant_key": key,
+                "category": category,
+                "type": TransactionTypeEnum(txn_type),
+                "hits": 1,
+            })
+
+    if updates:
+        db.bulk_update_mappings(MerchantCategory, updates)
+    if inserts:
+        db.bulk_insert_mappings(MerchantCategory, inserts)
+    for start in range(0, len(forgotten), _QUERY_BATCH_SIZE):
+        db.query(MerchantCategory).filter(
+            MerchantCategory.id.in_(forgotten[start:start + _QUERY_BATCH_SIZE])
+        ).delete(synchronize_session=False)
+
+    return len(learned) + len(forgotten)
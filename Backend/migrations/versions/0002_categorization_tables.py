@@ -0,0 +1,68 @@
+"""Learned merchant categories and user categorization rules
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+# Created with the transactions table in 0001
+_TRANSACTION_TYPE = sa.Enum("income", "expense", name="transactiontypeenum").with_variant(
+    postgresql.ENUM("income", "expense", name="transactiontypeenum", create_type=False),
+    "postgresql",
+)
+
+
+def upgrade() -> None:
+    op.create_table(
+        "merchant_categories",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("merchant_key", sa.String(), nullable=False),
+        sa.Column("category", sa.String(), nullable=False),
+        sa.Column("type", _TRANSACTION_TYPE, nullable=False),
+        sa.Column("hits", sa.Integer(), nullable=False),
+        sa.Column(
+            "created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True
+        ),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("user_id", "merchant_key"),
+    )
+    op.create_index("ix_merchant_categories_id", "merchant_categories", ["id"])
+    op.create_index("ix_merchant_categories_user_id", "merchant_categories", ["user_id"])
+
+    op.create_table(
+        "categorization_rules",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("field", sa.String(), nullable=False),
+        sa.Column("match_type", sa.String(), nullable=False),
+        sa.Column("pattern", sa.String(), nullable=False),
+        sa.Column("min_amount", sa.Float(), nullable=True),
+        sa.Column("max_amount", sa.Float(), nullable=True),
+        sa.Column("category", sa.String(), nullable=False),
+        sa.Column("type", _TRANSACTION_TYPE, nullable=True),
+        sa.Column("priority", sa.Integer(), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        sa.Column(
+            "created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True
+        ),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_categorization_rules_id", "categorization_rules", ["id"])
+    op.create_index("ix_categorization_rules_user_id", "categorization_rules", ["user_id"])
+
+
+def downgrade() -> None:
+    op.drop_table("categorization_rules")
+    op.drop_table("merchant_categories")
@@ -0,0 +1,53 @@
+"""Checkpointed background import jobs
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "import_jobs",
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("kind", sa.String(), nullable=False),
+        sa.Column("filename", sa.String(), nullable=False),
+        sa.Column("source_path", sa.String(), nullable=False),
+        sa.Column(
+            "status",
+            sa.Enum("queued", "running", "completed", "failed", name="importjobstatusenum"),
+            nullable=False,
+        ),
+        sa.Column("batches_committed", sa.Integer(), nullable=False),
+        sa.Column("rows_processed", sa.Integer(), nullable=False),
+        sa.Column("rows_total", sa.Integer(), nullable=True),
+        sa.Column("duplicate_count", sa.Integer(), nullable=False),
+        sa.Column("bytes_processed", sa.Integer(), nullable=False),
+        sa.Column("bytes_total", sa.Integer(), nullable=False),
+        sa.Column("error_count", sa.Integer(), nullable=False),
+        sa.Column("errors", sa.Text(), nullable=True),
+        sa.Column("message", sa.String(), nullable=True),
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+        sa.Column("heartbeat_at", sa.DateTime(), nullable=True),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        sa.Column(
+            "created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_import_jobs_id", "import_jobs", ["id"])
+    op.create_index("ix_import_jobs_user_id", "import_jobs", ["user_id"])
+
+
+def downgrade() -> None:
+    op.drop_table("import_jobs")
+    sa.Enum(name="importjobstatusenum").drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,81 @@
+"""Content fingerprints on transactions, backfilled for existing rows
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+
+import pandas as pd
+import sqlalchemy as sa
+from alembic import op
+
+from dedup import Fingerprinter
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+_BATCH_SIZE = 10000
+
+_transactions = sa.table(
+    "transactions",
+    sa.column("id", sa.String),
+    sa.column("user_id", sa.Integer),
+    sa.column("date", sa.DateTime),
+    sa.column("description", sa.String),
+    sa.column("amount", sa.Float),
+    sa.column("account", sa.String),
+    sa.column("fingerprint", sa.String),
+)
+
+
+def _backfill(connection) -> None:
+    """
+    Fingerprint every existing row, as if each user's history were one import.
+
+    Identical rows get consecutive occurrence numbers, so re-importing a
+    statement that was loaded before the upgrade is caught as a duplicate.
+    """
+    set_fingerprint = (
+        _transactions.update()
+        .where(_transactions.c.id == sa.bindparam("row_id"))
+        .values(fingerprint=sa.bindparam("value"))
+    )
+    user_ids = connection.scalars(sa.select(_transactions.c.user_id).distinct()).all()
+    for user_id in user_ids:
+        fingerprinter = Fingerprinter(user_id)
+        rows = connection.execution_options(yield_per=_BATCH_SIZE).execute(
+            sa.select(
+                _transactions.c.id,
+                _transactions.c.date,
+                _transactions.c.description,
+                _transactions.c.amount,
+                _transactions.c.account,
+            )
+            .where(_transactions.c.user_id == user_id)
+            .order_by(_transactions.c.date, _transactions.c.id)
+        )
+        for batch in rows.partitions():
+            frame = pd.DataFrame(batch, columns=["id", "date", "description", "amount", "account"])
+            frame["date"] = pd.to_datetime(frame["date"])
+            connection.execute(
+                set_fingerprint,
+                [
+                    {"row_id": row_id, "value": value}
+                    for row_id, value in zip(frame["id"], fingerprinter.fingerprint(frame))
+                ],
+            )
+
+
+def upgrade() -> None:
+    op.add_column("transactions", sa.Column("fingerprint", sa.String(), nullable=True))
+    _backfill(op.get_bind())
+    op.create_index(
+        "ix_transactions_fingerprint", "transactions", ["fingerprint"], unique=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_transactions_fingerprint", table_name="transactions")
+    op.drop_column("transactions", "fingerprint")
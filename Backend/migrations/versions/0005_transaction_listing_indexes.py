@@ -0,0 +1,36 @@
+"""Composite indexes for keyset pagination and listing filters
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_transactions_user_date_id",
+        "transactions",
+        ["user_id", sa.text("date DESC"), "id"],
+    )
+    op.create_index(
+        "ix_transactions_user_category_date", "transactions", ["user_id", "category", "date"]
+    )
+    op.create_index(
+        "ix_transactions_user_account_date", "transactions", ["user_id", "account", "date"]
+    )
+    op.create_index("ix_transactions_user_amount_id", "transactions", ["user_id", "amount", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_transactions_user_amount_id", table_name="transactions")
+    op.drop_index("ix_transactions_user_account_date", table_name="transactions")
+    op.drop_index("ix_transactions_user_category_date", table_name="transactions")
+    op.drop_index("ix_transactions_user_date_id", table_name="transactions")
@@ -0,0 +1,74 @@
+"""Full-text search index over transaction descriptions and accounts
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+# SQLite: external-content FTS5 table kept in sync by triggers (see search.py)
+_SQLITE_UPGRADE = (
+    """
+    CREATE VIRTUAL TABLE transactions_fts USING fts5(
+        description, account, user_id,
+        content='transactions', content_rowid='rowid',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3 4 5 6 7 8'
+    )
+    """,
+    """
+    CREATE TRIGGER transactions_fts_insert AFTER INSERT ON transactions BEGIN
+        INSERT INTO transactions_fts(rowid, description, account, user_id)
+        VALUES (new.rowid, new.description, new.account, new.user_id);
+    END
+    """,
+    """
+    CREATE TRIGGER transactions_fts_delete AFTER DELETE ON transactions BEGIN
+        INSERT INTO transactions_fts(transactions_fts, rowid, description, account, user_id)
+        VALUES ('delete', old.rowid, old.description, old.account, old.user_id);
+    END
+    """,
+    """
+    CREATE TRIGGER transactions_fts_update
+    AFTER UPDATE OF description, account, user_id ON transactions BEGIN
+        INSERT INTO transactions_fts(transactions_fts, rowid, description, account, user_id)
+        VALUES ('delete', old.rowid, old.description, old.account, old.user_id);
+        INSERT INTO transactions_fts(rowid, description, account, user_id)
+        VALUES (new.rowid, new.description, new.account, new.user_id);
+    END
+    """,
+    "INSERT INTO transactions_fts(transactions_fts) VALUES ('rebuild')",
+)
+_SQLITE_DOWNGRADE = (
+    "DROP TRIGGER transactions_fts_update",
+    "DROP TRIGGER transactions_fts_delete",
+    "DROP TRIGGER transactions_fts_insert",
+    "DROP TABLE transactions_fts",
+)
+
+# PostgreSQL: GIN expression index; search.py repeats the exact expression
+_PG_UPGRADE = (
+    "CREATE INDEX ix_transactions_search ON transactions "
+    "USING gin (to_tsvector('simple', description || ' ' || account))",
+)
+_PG_DOWNGRADE = ("DROP INDEX ix_transactions_search",)
+
+
+def _run(sqlite, postgresql) -> None:
+    dialect = op.get_bind().dialect.name
+    statements = {"sqlite": sqlite, "postgresql": postgresql}.get(dialect, ())
+    for statement in statements:
+        op.execute(statement)
+
+
+def upgrade() -> None:
+    _run(_SQLITE_UPGRADE, _PG_UPGRADE)
+
+
+def downgrade() -> None:
+    _run(_SQLITE_DOWNGRADE, _PG_DOWNGRADE)
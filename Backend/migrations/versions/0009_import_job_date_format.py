@@ -0,0 +1,22 @@
+"""Date format guessed by an import job, kept for resuming it
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("import_jobs", sa.Column("date_format", sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("import_jobs", "date_format")
@@ -0,0 +1,49 @@
+"""Opaque keyset cursors for paginated listings."""
+
+import base64
+import json
+from typing import List
+
+from decouple import config
+
+# Rows per page when the client does not ask for a size
+TRANSACTIONS_PAGE_SIZE = config("TRANSACTIONS_PAGE_SIZE", default=50, cast=int)
+TRANSACTIONS_MAX_PAGE_SIZE = config("TRANSACTIONS_MAX_PAGE_SIZE", default=500, cast=int)
+
+
+def encode_cursor(values: List) -> str:
+    """
+    Encode the sort key of the last row on a page.
+
+    Args:
+        values: JSON-serializable sort key values, in sort order
+
+    Returns:
+        URL-safe cursor string
+    """
+    raw = json.dumps(values, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List:
+    """
+    Decode a cursor produced by ``encode_cursor``.
+
+    Args:
+        cursor: Cursor string from a previous page
+        size: Number of sort key values expected
+
+    Returns:
+        The sort key values
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("Invalid cursor")
+    return values
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional, List
+from typing import Dict, Optional, List
 from datetime import datetime
 from enum import Enum
 
@@ -246,6 +246,136 @@ class TransactionResponse(TransactionBase):
         from_attributes = True
 
 
+class TransactionChanges(BaseModel):
+    """Fields to set on every transaction in a batch; unset fields are kept."""
+
+    date: Optional[datetime] = None
+    description: Optional[str] = None
+    category: Optional[str] = None
+    amount: Optional[float] = None
+    type: Optional[TransactionType] = None
+    status: Optional[TransactionStatus] = None
+    account: Optional[str] = None
+
+
+class TransactionBatchUpdate(BaseModel):
+    ids: List[str] = Field(..., min_length=1)
+    changes: TransactionChanges
+
+
+class TransactionBatchDelete(BaseModel):
+    ids: List[str] = Field(..., min_length=1)
+
+
+class TransactionUpsert(TransactionBase):
+    # Omitted or unused ids create a transaction
+    id: Optional[str] = None
+
+
+class TransactionBatchUpsert(BaseModel):
+    transactions: List[TransactionUpsert] = Field(..., min_length=1)
+
+
+class BatchOutcome(str, Enum):
+    created = "created"
+    updated = "updated"
+    deleted = "deleted"
+    not_found = "not_found"
+    conflict = "conflict"
+
+
+class TransactionBatchResult(BaseModel):
+    id: str
+    outcome: BatchOutcome
+    detail: Optional[str] = None
+
+
+class TransactionBatchResponse(BaseModel):
+    results: List[TransactionBatchResult]
+
+
+class TransactionSearchResponse(BaseModel):
+    transactions: List[TransactionResponse]
+    # Pass back as ?cursor= for more results; None when there are no more
+    next_cursor: Optional[str] = None
+
+
+class TransactionSort(str, Enum):
+    date = "date"
+    amount = "amount"
+    description = "description"
+    category = "category"
+    account = "account"
+
+
+class SortOrder(str, Enum):
+    asc = "asc"
+    desc = "desc"
+
+
+class ExportFormat(str, Enum):
+    csv = "csv"
+    ndjson = "ndjson"
+    xlsx = "xlsx"
+    parquet = "parquet"
+    arrow = "arrow"
+
+
+class TransactionPage(BaseModel):
+    transactions: List[TransactionResponse]
+    # Pass back as ?cursor= for the next page; None on the last page
+    next_cursor: Optional[str] = None
+    # Matching rows, on the first page only; an estimate for large results
+    total_count: Optional[int] = None
+    total_is_estimate: bool = False
+
+
+# Categorization Rule Schemas
+class RuleField(str, Enum):
+    description = "description"
+    merchant = "merchant"
+    account = "account"
+
+
+class RuleMatchType(str, Enum):
+    contains = "contains"
+    equals = "equals"
+
+
+class CategorizationRuleBase(BaseModel):
+    field: RuleField = RuleField.description
+    match_type: RuleMatchType = RuleMatchType.contains
+    pattern: str = Field(..., min_length=1)
+    min_amount: Optional[float] = None
+    max_amount: Optional[float] = None
+    category: str
+    type: Optional[TransactionType] = None
+    priority: int = 0
+    is_active: bool = True
+
+    class Config:
+        use_enum_values = True
+
+
+class CategorizationRuleCreate(CategorizationRuleBase):
+    pass
+
+
+class CategorizationRuleUpdate(CategorizationRuleBase):
+    pass
+
+
+class CategorizationRuleResponse(CategorizationRuleBase):
+    id: int
+    user_id: int
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+        use_enum_values = True
+
+
 # Dashboard Schemas
 class CategoryBreakdown(BaseModel):
     category: str
@@ -280,9 +410,48 @@ class DashboardStats(BaseModel):
 
 
 # File Upload Schema
+class ParseError(BaseModel):
+    """A row of an uploaded file that could not be parsed cleanly"""
+    row: int
+    column: str
+    message: str
+
+
 class FileUploadResponse(BaseModel):
     message: str
     processed_count: int
+    duplicate_count: int = 0
+    parse_error_count: int = 0
+    parse_errors: List[ParseError] = []
+    peak_rss_mb: Optional[float] = None
+    job_id: Optional[str] = None
+
+
+class ImportJobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class ImportJobResponse(BaseModel):
+    """Progress of a background import"""
+    id: str
+    kind: str
+    filename: str
+    status: ImportJobStatus
+    rows_processed: int
+    rows_total: Optional[int] = None
+    duplicate_count: int = 0
+    progress: float
+    rows_per_second: Optional[float] = None
+    eta_seconds: Optional[float] = None
+    error_count: int
+    errors: List[ParseError] = []
+    message: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
 
 # Add these to your schemas.py file
 
@@ -301,17 +470,41 @@ class TransactionPreview(BaseModel):
     needs_review: bool
     account: str
     merchant: Optional[str] = None
+    duplicate: bool = False
 
     class Config:
         from_attributes = True
 
 
+class PreviewOverride(BaseModel):
+    """Change to one staged preview row before it is imported"""
+    id: str
+    category: Optional[str] = None
+    type: Optional[TransactionType] = None
+    account: Optional[str] = None
+    exclude: bool = False
+
+    class Config:
+        use_enum_values = True
+
+
+class StagedConfirmRequest(BaseModel):
+    """Confirm a staged preview, changing only the listed rows"""
+    overrides: List[PreviewOverride] = []
+
+
 class BulkUploadResponse(BaseModel):
     """Response for bulk upload preview"""
     message: str
     total_count: int
     preview: List[TransactionPreview]
     needs_review_count: int
+    duplicate_count: int = 0
+    rule_version: Optional[str] = None
+    upload_token: Optional[str] = None
+    parse_error_count: int = 0
+    parse_errors: List[ParseError] = []
+    peak_rss_mb: Optional[float] = None
 
     class Config:
         from_attributes = True
@@ -326,4 +519,35 @@ class CategorySuggestion(BaseModel):
 class CategorySuggestionsResponse(BaseModel):
     """Response for category suggestions"""
     description: str
-    suggestions: List[CategorySuggestion]
\ No newline at end of file
+    suggestions: List[CategorySuggestion]
+    rule_version: Optional[str] = None
+
+
+class CategorySuggestionBatchRequest(BaseModel):
+    """Many descriptions to suggest categories for in one request"""
+    descriptions: List[str]
+    mode: str = "typeahead"
+    limit: int = Field(3, ge=1, le=20)
+
+
+class CategorySuggestionBatchResponse(BaseModel):
+    """Suggestions for each description, in request order"""
+    results: List[CategorySuggestionsResponse]
+
+
+class CategoryModelResponse(BaseModel):
+    """Summary of a freshly trained category model"""
+    engine: str
+    categories: List[str]
+    samples: int
+    trained_at: str
+
+
+class CategoryRules(BaseModel):
+    """Global keyword rules used for auto-categorization"""
+    categories: Dict[str, List[str]]
+
+
+class CategoryRulesResponse(CategoryRules):
+    """Keyword rules together with their content version"""
+    version: str
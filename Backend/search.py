@@ -0,0 +1,177 @@
+"""Full-text search over transaction descriptions and accounts."""
+
+import re
+from contextlib import contextmanager
+from typing import Iterator, List, Optional
+
+from sqlalchemy import Select, and_, column, func, literal_column, or_, select, table
+from sqlalchemy.orm import Session
+
+from database import Transaction, engine
+from pagination import decode_cursor, encode_cursor
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+# SQLite: an external-content FTS5 table over description, account and
+# user_id, kept in sync by triggers (created by migration 0006). user_id is
+# indexed as a token so the index itself narrows the match to one user.
+# Prefixes up to 8 characters are indexed so a prefix query reads one index
+# entry instead of merging every term it covers. Rows are linked by the
+# implicit rowid, which VACUUM may renumber: run the 'rebuild' command after
+# one. Bulk inserts swap the per-row insert trigger for one set-based fill.
+_SQLITE_INSERT_TRIGGER = """
+    CREATE TRIGGER transactions_fts_insert AFTER INSERT ON transactions BEGIN
+        INSERT INTO transactions_fts(rowid, description, account, user_id)
+        VALUES (new.rowid, new.description, new.account, new.user_id);
+    END
+"""
+_FTS = table("transactions_fts", column("rowid"))
+
+# PostgreSQL: a GIN expression index (migration 0006); queries repeat the
+# exact expression with literal (not bound) arguments so the planner can
+# match it
+_PG_DOCUMENT = func.to_tsvector(
+    literal_column("'simple'"),
+    Transaction.description + literal_column("' '") + Transaction.account,
+)
+
+
+@contextmanager
+def deferred_search_index(db: Session) -> Iterator[None]:
+    """
+    Index rows inserted inside the block with one set-based statement.
+
+    On SQLite the per-row insert trigger is dropped for the block and
+    recreated afterwards. DDL is transactional there, so the change is
+    never visible outside the session's transaction and rolls back with
+    it. Other databases index on their own and are left alone.
+
+    Args:
+        db: Session whose open transaction does the inserts
+    """
+    connection = db.connection()
+    if connection.dialect.name != "sqlite" or not connection.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE name = 'transactions_fts_insert'"
+    ).first():
+        yield
+        return
+
+    # pysqlite only opens a transaction on its own before DML, and DDL run
+    # outside one would commit at once
+    if not connection.connection.dbapi_connection.in_transaction:
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+    # Dropping the trigger takes the write lock, so no other writer can add
+    # rows after the high-water mark is read
+    connection.exec_driver_sql("DROP TRIGGER transactions_fts_insert")
+    last_rowid = connection.exec_driver_sql(
+        "SELECT coalesce(max(rowid), 0) FROM transactions"
+    ).scalar()
+    try:
+        yield
+    finally:
+        connection.exec_driver_sql(
+            "INSERT INTO transactions_fts(rowid, description, account, user_id) "
+            "SELECT rowid, description, account, user_id FROM transactions WHERE rowid > ?",
+            (last_rowid,),
+        )
+        connection.exec_driver_sql(_SQLITE_INSERT_TRIGGER)
+
+
+def search_terms(query: str) -> List[List[str]]:
+    """Split a query into terms, each a list of word tokens ("pg&e" -> ["pg", "e"])."""
+    terms = (_TOKEN.findall(term.lower()) for term in query.split())
+    return [tokens for tokens in terms if tokens]
+
+
+def _prefix(terms: List[List[str]]) -> bool:
+    # Only the word being typed is a prefix, and one letter is too broad to be one
+    return len(terms[-1][-1]) > 1
+
+
+def _fts5_query(user_id: int, terms: List[List[str]]) -> str:
+    # Tokens are \w+ only, so quoting them as phrases is injection-safe
+    phrases = " ".join(f'"{" ".join(tokens)}"' for tokens in terms)
+    if _prefix(terms):
+        phrases += "*"
+    return f'user_id : "{user_id}" AND {{description account}} : ({phrases})'
+
+
+def _tsquery(terms: List[List[str]]) -> str:
+    query = " & ".join("(" + " <-> ".join(tokens) + ")" for tokens in terms)
+    return query[:-1] + ":*)" if _prefix(terms) else query
+
+
+def _rank(terms: List[List[str]]):
+    """Relevance of a matching row; lower is better, as FTS5's bm25() returns it."""
+    if engine.dialect.name == "sqlite":
+        # Description words weigh five times account words; user_id is a filter
+        return literal_column("bm25(transactions_fts, 10.0, 2.0, 0.0)")
+    if engine.dialect.name == "postgresql":
+        query = func.to_tsquery(literal_column("'simple'"), _tsquery(terms))
+        return -func.ts_rank(_PG_DOCUMENT, query)
+    # Other databases have no index to rank with
+    return literal_column("0.0")
+
+
+def _query_key(terms: List[List[str]]) -> str:
+    return " ".join("+".join(tokens) for tokens in terms) + ("*" if _prefix(terms) else "")
+
+
+def search_statement(
+    user_id: int, terms: List[List[str]], limit: int, cursor: Optional[str] = None
+) -> Select:
+    """
+    Ranked search over the user's transactions.
+
+    Every term must match description or account, in order within a term;
+    the last word of the query also matches as a prefix. All matches are
+    ranked, by FTS5's bm25() on SQLite and ts_rank on PostgreSQL, with
+    matches in the description weighing more than matches in the account.
+    Rows are ordered on (rank, id) and continue after ``cursor`` the way
+    ``order_page`` does, so every match is reachable page by page. Each
+    page reads every match to rank it, so broad one-word queries cost the
+    most.
+
+    Args:
+        user_id: Owner of the transactions
+        terms: Output of ``search_terms``; must not be empty
+        limit: Rows to return
+        cursor: ``search_cursor`` of the last row of the previous page
+
+    Returns:
+        Select of (``Transaction``, rank) rows, best match first
+
+    Raises:
+        ValueError: If the cursor is malformed or was issued for another query
+    """
+    rank = _rank(terms)
+    statement = select(Transaction, rank.label("rank")).where(Transaction.user_id == user_id)
+    if engine.dialect.name == "sqlite":
+        statement = statement.join(
+            _FTS, _FTS.c.rowid == literal_column("transactions.rowid")
+        ).where(literal_column("transactions_fts").op("MATCH")(_fts5_query(user_id, terms)))
+    elif engine.dialect.name == "postgresql":
+        query = func.to_tsquery(literal_column("'simple'"), _tsquery(terms))
+        statement = statement.where(_PG_DOCUMENT.op("@@")(query))
+    else:
+        # Unindexed substring match on every token
+        for tokens in terms:
+            for token in tokens:
+                statement = statement.where(
+                    Transaction.description.icontains(token, autoescape=True)
+                    | Transaction.account.icontains(token, autoescape=True)
+                )
+
+    statement = statement.order_by(rank, Transaction.id).limit(limit)
+    if cursor is None:
+        return statement
+
+    query_key, value, last_id = decode_cursor(cursor, 3)
+    if query_key != _query_key(terms) or not isinstance(value, (int, float)):
+        raise ValueError("Cursor belongs to a different query")
+    return statement.where(or_(rank > value, and_(rank == value, Transaction.id > last_id)))
+
+
+def search_cursor(terms: List[List[str]], transaction: Transaction, rank: float) -> str:
+    """Cursor for the search page that follows ``transaction``."""
+    return encode_cursor([_query_key(terms), rank, transaction.id])
@@ -0,0 +1,154 @@
+"""Server-side staging of categorized upload previews."""
+
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import pandas as pd
+from decouple import config
+
+# Seconds a staged preview can be confirmed or paged through
+PREVIEW_STAGING_TTL = config("PREVIEW_STAGING_TTL", default=1800, cast=int)
+# Rows kept across all staged previews; least recently used previews go first
+PREVIEW_STAGING_MAX_ROWS = config("PREVIEW_STAGING_MAX_ROWS", default=2_000_000, cast=int)
+
+# Low-cardinality columns stored as categoricals
+_CATEGORICAL_COLUMNS = ("account", "merchant", "suggested_category", "suggested_type")
+
+
+class StagedPreview:
+    """A categorized upload held in columnar form until it is confirmed."""
+
+    def __init__(self, user_id: int, frame: pd.DataFrame, rule_version: Optional[str]):
+        self.user_id = user_id
+        self.frame = frame
+        self.rule_version = rule_version
+        self.created = time.monotonic()
+
+    @property
+    def needs_review_count(self) -> int:
+        return int(self.frame["needs_review"].sum())
+
+    @property
+    def duplicate_count(self) -> int:
+        return int(self.frame["duplicate"].sum())
+
+    def page(
+        self,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        needs_review_only: bool = False,
+    ) -> list:
+        """
+        Return a slice of the staged rows as preview dicts.
+
+        Args:
+            offset: Rows to skip
+            limit: Rows to return; all remaining rows if None
+            needs_review_only: Only page through rows flagged for review
+
+        Returns:
+            List of dicts matching ``TransactionPreview``
+        """
+        frame = self.frame
+        if needs_review_only:
+            frame = frame[frame["needs_review"].to_numpy()]
+        end = None if limit is None else offset + limit
+        return preview_records(frame.iloc[offset:end])
+
+
+def preview_records(frame: pd.DataFrame) -> list:
+    """Convert categorized preview rows to ``TransactionPreview`` dicts."""
+    rows = frame.drop(columns="fingerprint", errors="ignore")
+    return rows.assign(
+        date=rows["date"].dt.strftime("%Y-%m-%d"),
+        **{
+            column: rows[column].astype(object)
+            for column in _CATEGORICAL_COLUMNS
+            if column in rows
+        },
+    ).to_dict("records")
+
+
+class PreviewStore:
+    """
+    Staged previews keyed by upload token.
+
+    Entries expire after ``PREVIEW_STAGING_TTL`` seconds, and the least
+    recently used ones are evicted while the total row count exceeds
+    ``PREVIEW_STAGING_MAX_ROWS``.
+    """
+
+    def __init__(
+        self,
+        ttl: int = PREVIEW_STAGING_TTL,
+        max_rows: int = PREVIEW_STAGING_MAX_ROWS,
+    ):
+        self.ttl = ttl
+        self.max_rows = max_rows
+        self._entries: "OrderedDict[str, StagedPreview]" = OrderedDict()
+        self._rows = 0
+        self._lock = threading.Lock()
+
+    def _drop(self, token: str) -> Optional[StagedPreview]:
+        staged = self._entries.pop(token, None)
+        if staged is not None:
+            self._rows -= len(staged.frame)
+        return staged
+
+    def _evict(self) -> None:
+        now = time.monotonic()
+        expired = [
+            token for token, staged in self._entries.items()
+            if now - staged.created >= self.ttl
+        ]
+        for token in expired:
+            self._drop(token)
+        while self._rows > self.max_rows and len(self._entries) > 1:
+            self._drop(next(iter(self._entries)))
+
+    def put(
+        self,
+        user_id: int,
+        frame: pd.DataFrame,
+        rule_version: Optional[str] = None,
+    ) -> str:
+        """Stage a categorized preview and return its upload token."""
+        frame = frame.astype({column: "category" for column in _CATEGORICAL_COLUMNS})
+        token = secrets.token_urlsafe(24)
+        with self._lock:
+            self._entries[token] = StagedPreview(
+                user_id, frame.reset_index(drop=True), rule_version
+            )
+            self._rows += len(frame)
+            self._evict()
+        return token
+
+    def get(self, user_id: int, token: str) -> Optional[StagedPreview]:
+        """Return the user's staged preview, or None if it expired or is not theirs."""
+        with self._lock:
+            self._evict()
+            staged = self._entries.get(token)
+            if staged is None or staged.user_id != user_id:
+                return None
+            self._entries.move_to_end(token)
+            return staged
+
+    def pop(self, user_id: int, token: str) -> Optional[StagedPreview]:
+        """Remove and return the user's staged preview so it is confirmed once."""
+        with self._lock:
+            staged = self._entries.get(token)
+            if staged is None or staged.user_id != user_id:
+                return None
+            return self._drop(token)
+
+    def restore(self, token: str, staged: StagedPreview) -> None:
+        """Put back a preview whose confirmation failed."""
+        with self._lock:
+            self._entries[token] = staged
+            self._rows += len(staged.frame)
+
+
+preview_store = PreviewStore()
@@ -0,0 +1,71 @@
+"""
+Shared fixtures: every test session runs against a throwaway SQLite
+database and working directory, configured before the app is imported.
+"""
+
+import os
+import sys
+import tempfile
+
+_WORKDIR = tempfile.mkdtemp(prefix="fintrack-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_WORKDIR, 'test.db')}"
+os.environ["IMPORT_JOB_DIR"] = os.path.join(_WORKDIR, "imports")
+os.environ["CATEGORY_MODEL_DIR"] = os.path.join(_WORKDIR, "models")
+os.environ["CATEGORY_RULES_ARTIFACT_DIR"] = os.path.join(_WORKDIR, "rules")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+import database  # noqa: E402
+from database import Base, SessionLocal, create_tables  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def app():
+    import main
+
+    with TestClient(main.app) as client:
+        yield client
+
+
+@pytest.fixture(autouse=True)
+def clean_database():
+    """Start every test from empty tables."""
+    create_tables()
+    yield
+    with database.engine.begin() as connection:
+        for table in reversed(Base.metadata.sorted_tables):
+            connection.execute(table.delete())
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+def register(client: TestClient, name: str) -> dict:
+    """Create a user and return auth headers for them."""
+    client.post(
+        "/api/auth/register",
+        json={"email": f"{name}@example.com", "username": name, "password": "secret1"},
+    )
+    token = client.post(
+        "/api/auth/login",
+        json={"email": f"{name}@example.com", "password": "secret1"},
+    ).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def client(app):
+    return app
+
+
+@pytest.fixture
+def headers(client):
+    return register(client, "alice")
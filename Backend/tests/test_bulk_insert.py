@@ -0,0 +1,43 @@
+import pandas as pd
+from sqlalchemy import text
+
+from bulk_insert import insert_transactions
+from database import SessionLocal, Transaction
+
+USER_ID = 1
+
+
+def _frame():
+    return pd.DataFrame(
+        {
+            "id": ["a", "b"],
+            "date": pd.to_datetime(["2024-01-02", "2024-01-03"]),
+            "description": ["Coffee Shop", ""],
+            "category": ["Food & Dining", "Other"],
+            "amount": [-4.5, -1.0],
+            "type": ["expense", "expense"],
+            "account": ["Checking", ""],
+        }
+    )
+
+
+def _synchronous(db):
+    return db.execute(text("PRAGMA synchronous")).scalar()
+
+
+def test_relaxed_sync_is_scoped_to_the_import(db):
+    default = _synchronous(db)
+    db.rollback()
+
+    assert insert_transactions(db, _frame(), USER_ID) == 2
+    assert _synchronous(db) == 1
+    db.commit()
+    db.close()
+
+    # The pool hands the same connection back with its default restored
+    other = SessionLocal()
+    try:
+        assert _synchronous(other) == default
+        assert other.query(Transaction).filter(Transaction.description == "").count() == 1
+    finally:
+        other.close()
@@ -0,0 +1,153 @@
+import json
+import random
+import re
+
+import pandas as pd
+
+import categorization
+from categorization import KeywordMatcher, compile_rules_artifact
+
+TABLE = {"Food & Dining": ["coffee", "uber eats"], "Transportation": ["uber", "24 hour"]}
+
+SAMPLES = [
+    ("STARBUCKS #1234 01/15", -4.5, None),
+    ("Uber Eats order", 23.0, "UBER"),
+    ("PAYROLL DEPOSIT ACME", -2500.0, None),
+    ("Whole Foods Market 0042", 88.1, "WFM"),
+    ("Sushi bar & grill", 40.0, None),
+    ("sidebar subscription", 9.99, None),
+    ("Shell Oil 5521", 45.0, "Shell"),
+    ("transfer to savings", 200.0, None),
+    ("", 0.0, None),
+    ("ZQX HOLDINGS", -12.0, None),
+]
+
+
+def _naive_score(table, text):
+    """The per-keyword scan the compiled matcher replaced."""
+    scores = {}
+    for category, keywords in table.items():
+        for keyword in keywords:
+            keyword = keyword.lower()
+            if keyword and keyword in text:
+                points = len(keyword) * 2
+                if re.search(r"\b" + re.escape(keyword) + r"\b", text):
+                    points += 10
+                scores[category] = scores.get(category, 0) + points
+    return scores
+
+
+def test_artifact_round_trip_scores_like_a_fresh_compile():
+    compile_rules_artifact(TABLE, "v1")
+    loaded = categorization._load_or_compile_matcher(TABLE, "v1")
+    fresh = KeywordMatcher(TABLE)
+
+    for text in ["uber eats order", "coffee at 24 hour diner", "nothing here"]:
+        assert loaded.score(text) == fresh.score(text)
+
+
+def test_artifact_is_plain_json():
+    path = compile_rules_artifact(TABLE, "v1")
+
+    with open(path, encoding="utf-8") as handle:
+        artifact = json.load(handle)
+    assert artifact["version"] == "v1"
+    assert artifact["matcher"]["patterns"]
+
+
+def test_corrupt_or_stale_artifact_is_recompiled():
+    path = compile_rules_artifact(TABLE, "v1")
+    with open(path, "w", encoding="utf-8") as handle:
+        json.dump({"format": 2, "version": "v1", "matcher": {"goto": [{"u": 99}]}}, handle)
+
+    matcher = categorization._load_or_compile_matcher(TABLE, "v1")
+    assert matcher.score("uber") == KeywordMatcher(TABLE).score("uber")
+    # The broken file was replaced by a fresh compile
+    with open(path, encoding="utf-8") as handle:
+        assert KeywordMatcher.from_artifact(json.load(handle)["matcher"]).patterns
+
+
+def test_keyword_digits_survive_normalization():
+    # Usable before any matcher has been built
+    categorization.reset_matcher()
+    text = categorization.normalize_transaction_text("24 Hour Fitness #5521 01/02", None)
+    assert text == "24 hour fitness #0"
+
+
+def test_result_scored_during_a_rule_swap_is_not_served_for_the_new_rules(monkeypatch):
+    version, table = categorization.get_rule_table()
+    score_text = categorization._score_text
+
+    def racing(matcher, text, amount):
+        result = score_text(matcher, text, amount)
+        # The swap lands after scoring but before the result is cached
+        categorization._apply_rule_table({"Travel": ["zzqx"]}, "swapped")
+        return result
+
+    try:
+        monkeypatch.setattr(categorization, "_score_text", racing)
+        stale = categorization.auto_categorize_transaction("zzqx", 5.0)
+        monkeypatch.setattr(categorization, "_score_text", score_text)
+
+        assert stale[0] == "Other Expense"
+        assert categorization.auto_categorize_transaction("zzqx", 5.0)[0] == "Travel"
+    finally:
+        categorization._apply_rule_table(table, version)
+
+
+def test_matcher_scores_like_a_per_keyword_scan():
+    _, table = categorization.get_rule_table()
+    matcher = KeywordMatcher(table)
+    keywords = [keyword for words in table.values() for keyword in words]
+    rng = random.Random(7)
+    texts = [categorization.normalize_transaction_text(d, m) for d, _, m in SAMPLES]
+    for _ in range(300):
+        # Keywords glued to each other, to punctuation and to word fragments
+        parts = rng.sample(keywords, 3) + ["x", "#0", "-", "ab"]
+        rng.shuffle(parts)
+        texts.append(rng.choice(["", " ", "."]).join(parts))
+
+    for text in texts:
+        assert matcher.score(text) == _naive_score(table, text), text
+
+    assert matcher.score_matrix(texts).tolist() == [
+        [matcher.score(text).get(category, 0) for category in matcher.categories]
+        for text in texts
+    ]
+
+
+def test_columns_match_row_by_row_categorization():
+    descriptions, amounts, merchants = zip(*SAMPLES)
+    results = categorization.categorize_columns(descriptions, merchants, amounts)
+
+    for index, (description, amount, merchant) in enumerate(SAMPLES):
+        category, txn_type, confidence = categorization.auto_categorize_transaction(
+            description, amount, merchant
+        )
+        assert results["suggested_category"][index] == category, description
+        assert results["suggested_type"][index] == txn_type, description
+        assert results["confidence"][index] == round(confidence, 2), description
+
+
+def test_cached_results_match_fresh_scores():
+    categorization._cache.clear()
+    version, matcher = categorization._versioned_matcher()
+    for description, amount, merchant in SAMPLES * 2:
+        text = categorization.normalize_transaction_text(description, merchant)
+        assert categorization.auto_categorize_transaction(
+            description, amount, merchant
+        ) == categorization._score_text(matcher, text, amount)
+
+    assert categorization.get_cache_stats()["hits"] >= len(SAMPLES)
+
+
+def test_vectorized_normalization_matches_the_scalar_one():
+    texts = [f"{description} {merchant or ''}" for description, _, merchant in SAMPLES]
+    vectorized = categorization._normalize_text_series(
+        pd.Series(texts, dtype=object)
+    )
+
+    assert list(vectorized) == [
+        categorization.normalize_transaction_text(description, merchant)
+        for description, _, merchant in SAMPLES
+    ]
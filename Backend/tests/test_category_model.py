@@ -0,0 +1,86 @@
+import uuid
+from datetime import datetime
+
+import pandas as pd
+
+from bulk_insert import insert_transactions
+from categorization import _with_user_model, categorize_dataframe
+from category_model import CATEGORY_MODEL_MIN_SAMPLES, train_user_model
+
+
+def _import(db, user_id, rows):
+    frame = pd.DataFrame(
+        [
+            {
+                "id": str(uuid.uuid4()),
+                "date": datetime(2024, 1, 1),
+                "description": description,
+                "category": category,
+                "amount": -10.0,
+                "type": "expense",
+                "account": "Checking",
+                "needs_review": needs_review,
+            }
+            for description, category, needs_review in rows
+        ]
+    )
+    insert_transactions(db, frame, user_id)
+    db.commit()
+
+
+def _user_id(client, headers):
+    return client.get("/api/auth/me", headers=headers).json()["id"]
+
+
+def test_training_skips_catch_all_and_unreviewed_rows(client, headers, db):
+    user_id = _user_id(client, headers)
+    _import(
+        db,
+        user_id,
+        [(f"Corner Cafe {n}", "Food & Dining", False) for n in range(CATEGORY_MODEL_MIN_SAMPLES)]
+        + [(f"Mystery {n}", "Other", False) for n in range(10)]
+        + [(f"Guessed {n}", "Shopping", True) for n in range(10)],
+    )
+
+    response = client.post("/api/categorize/model/train", headers=headers)
+    assert response.status_code == 200, response.text
+    trained = response.json()
+    assert trained["categories"] == ["Food & Dining"]
+    assert trained["samples"] == CATEGORY_MODEL_MIN_SAMPLES
+
+
+def test_too_few_reviewed_rows_is_rejected(client, headers, db):
+    user_id = _user_id(client, headers)
+    _import(db, user_id, [(f"Guessed {n}", "Shopping", True) for n in range(50)])
+
+    response = client.post("/api/categorize/model/train", headers=headers)
+    assert response.status_code == 400
+
+
+def test_editing_a_row_marks_it_reviewed(client, headers, db):
+    user_id = _user_id(client, headers)
+    _import(db, user_id, [("Guessed", "Shopping", True)])
+    transaction = client.get("/api/transactions", headers=headers).json()["transactions"][0]
+
+    client.post(
+        "/api/transactions/batch/update",
+        headers=headers,
+        json={"ids": [transaction["id"]], "changes": {"category": "Groceries"}},
+    )
+
+    from database import Transaction
+
+    db.expire_all()
+    assert db.get(Transaction, transaction["id"]).needs_review is False
+
+
+def test_chunks_load_the_stored_model_by_user():
+    train_user_model(
+        42,
+        [("corner cafe", None, "Food & Dining", "expense")] * 5
+        + [("city bus pass", None, "Transportation", "expense")] * 5,
+    )
+    frame = pd.DataFrame({"description": ["corner cafe"], "amount": [-4.0]})
+
+    result = _with_user_model(categorize_dataframe, 42, frame, engine="model")
+    assert result["suggested_category"][0] == "Food & Dining"
@@ -0,0 +1,119 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import pytest
+
+import auth
+import categorization
+from conftest import register
+from executors import (
+    EXECUTOR_RETRY_AFTER,
+    BoundedPool,
+    ExecutorSaturated,
+    LoopLagMonitor,
+    cpu_pool,
+    io_pool,
+)
+
+
+def test_map_keeps_order_and_takes_one_slot():
+    gate = threading.Event()
+    pool = BoundedPool("test", partial(ThreadPoolExecutor, max_workers=2), max_pending=1)
+
+    def square(value):
+        gate.wait(5)
+        return value * value
+
+    async def scenario():
+        batch = asyncio.ensure_future(pool.map(square, range(6)))
+        await asyncio.sleep(0.05)
+        assert pool.stats()["pending"] == 1
+        with pytest.raises(ExecutorSaturated):
+            await pool.run(square, 2)
+        gate.set()
+        return await batch
+
+    try:
+        assert asyncio.run(scenario()) == [0, 1, 4, 9, 16, 25]
+        assert pool.stats()["pending"] == 0
+        assert pool.stats()["completed"] == 1
+    finally:
+        pool.shutdown()
+
+
+def test_saturated_pool_answers_503_with_retry_after(client, headers, monkeypatch):
+    rejected = io_pool.stats()["rejected"]
+    monkeypatch.setattr(io_pool, "max_pending", 0)
+
+    response = client.post(
+        "/api/upload",
+        headers=headers,
+        files={"file": ("statement.csv", b"date,description,amount\n", "text/csv")},
+    )
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == str(EXECUTOR_RETRY_AFTER)
+    assert io_pool.stats()["rejected"] > rejected
+
+    monkeypatch.undo()
+    assert client.get("/api/auth/me", headers=headers).status_code == 200
+
+
+def test_failed_call_releases_its_slot():
+    pool = BoundedPool("test", partial(ThreadPoolExecutor, max_workers=1), max_pending=1)
+
+    def fail():
+        raise RuntimeError("boom")
+
+    try:
+        with pytest.raises(RuntimeError):
+            asyncio.run(pool.run(fail))
+        assert pool.stats()["pending"] == 0
+        assert asyncio.run(pool.run(pow, 2, 3)) == 8
+    finally:
+        pool.shutdown()
+
+
+def test_loop_lag_monitor_sees_a_blocked_loop():
+    monitor = LoopLagMonitor(interval=0.01)
+
+    async def scenario():
+        monitor.start()
+        await asyncio.sleep(0.05)
+        time.sleep(0.2)  # blocks the loop the way sync I/O in a handler would
+        await asyncio.sleep(0.05)
+        monitor.stop()
+
+    asyncio.run(scenario())
+    stats = monitor.stats()
+    assert stats["samples"] >= 2
+    assert stats["max_ms"] >= 150
+    assert stats["mean_ms"] <= stats["max_ms"]
+    assert monitor._task is None
+
+
+def test_parallel_categorization_runs_in_the_cpu_pool(monkeypatch):
+    monkeypatch.setattr(categorization, "CATEGORIZATION_PARALLEL_THRESHOLD", 4)
+    rows = [{"description": "STARBUCKS #123", "amount": -5.0}] * 10
+    completed = cpu_pool.stats()["completed"]
+
+    results = asyncio.run(
+        categorization.bulk_categorize_transactions_parallel(rows, chunk_size=3)
+    )
+
+    assert results == categorization.bulk_categorize_transactions(rows)
+    assert cpu_pool.stats()["completed"] == completed + 1
+
+
+def test_metrics_require_an_admin(client, headers, monkeypatch):
+    assert client.get("/api/metrics").status_code == 401
+    assert client.get("/api/metrics", headers=headers).status_code == 403
+
+    monkeypatch.setattr(auth, "ADMIN_EMAILS", ["root@example.com"])
+    response = client.get("/api/metrics", headers=register(client, "root"))
+    assert response.status_code == 200
+    assert set(response.json()["pools"]) == {"io", "cpu"}
+    assert set(response.json()["event_loop_lag"]) == {"last_ms", "max_ms", "mean_ms", "samples"}
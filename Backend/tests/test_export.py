@@ -0,0 +1,36 @@
+import csv
+import io
+
+TRANSACTION = {
+    "date": "2024-01-02T00:00:00",
+    "description": "Coffee Shop",
+    "category": "Food & Dining",
+    "amount": -4.5,
+    "type": "expense",
+    "account": "Checking",
+}
+
+
+def test_export_defaults_to_csv(client, headers):
+    client.post("/api/transactions", json=TRANSACTION, headers=headers)
+
+    response = client.get("/api/transactions/export", headers=headers)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert 'filename="transactions.csv"' in response.headers["content-disposition"]
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["description"] for row in rows] == ["Coffee Shop"]
+
+
+def test_export_rejects_unknown_formats(client, headers):
+    response = client.get("/api/transactions/export?format=pdf", headers=headers)
+
+    assert response.status_code == 422
+
+
+def test_export_parquet_on_request(client, headers):
+    response = client.get("/api/transactions/export?format=parquet", headers=headers)
+
+    assert response.status_code == 200
+    assert response.content[:4] == b"PAR1"
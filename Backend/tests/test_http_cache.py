@@ -0,0 +1,54 @@
+from conftest import register
+
+ROW = {
+    "date": "2024-01-02T00:00:00",
+    "description": "Coffee Shop",
+    "category": "Food & Dining",
+    "amount": -4.5,
+    "type": "expense",
+    "account": "Checking",
+}
+
+
+def _revalidate(client, headers, path, etag):
+    return client.get(path, headers={**headers, "If-None-Match": etag})
+
+
+def test_unchanged_data_answers_304(client, headers):
+    first = client.get("/api/dashboard/stats", headers=headers)
+    etag = first.headers["ETag"]
+    assert first.headers["Cache-Control"] == "private, no-cache"
+
+    again = _revalidate(client, headers, "/api/dashboard/stats", etag)
+
+    assert again.status_code == 304
+    assert again.headers["ETag"] == etag
+    assert again.content == b""
+
+
+def test_a_write_changes_the_etag(client, headers):
+    etag = client.get("/api/transactions", headers=headers).headers["ETag"]
+
+    client.post("/api/transactions", headers=headers, json=ROW)
+    response = _revalidate(client, headers, "/api/transactions", etag)
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert len(response.json()["transactions"]) == 1
+
+
+def test_etags_differ_per_user_and_url(client, headers):
+    etag = client.get("/api/transactions", headers=headers).headers["ETag"]
+    bob = register(client, "bob")
+
+    assert _revalidate(client, bob, "/api/transactions", etag).status_code == 200
+    assert _revalidate(client, headers, "/api/transactions?limit=5", etag).status_code == 200
+
+
+def test_static_categories_are_cacheable(client, headers):
+    first = client.get("/api/categories", headers=headers)
+    assert "max-age=" in first.headers["Cache-Control"]
+
+    again = _revalidate(client, headers, "/api/categories", first.headers["ETag"])
+
+    assert again.status_code == 304
@@ -0,0 +1,134 @@
+import json
+import os
+from functools import partial
+
+import pandas as pd
+import pytest
+
+import jobs
+from database import ImportJob, ImportJobStatusEnum, Transaction
+from ingest import iter_frames
+
+USER_ID = 1
+
+# The first batch can only be day-first; a fresh guess on the second batch
+# alone would read it month-first
+STATEMENT = (
+    "date,description,amount\n"
+    "25/01/2024,Coffee Shop,-4.50\n"
+    "26/01/2024,Grocery Store,-52.00\n"
+    "03/02/2024,Book Shop,-12.00\n"
+    "04/02/2024,Bakery,-3.20\n"
+)
+
+
+@pytest.fixture
+def two_batch_job(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs, "iter_frames", partial(iter_frames, chunk_rows=2))
+    path = tmp_path / "statement.csv"
+    path.write_text(STATEMENT)
+    job = ImportJob(
+        id="job-1",
+        user_id=USER_ID,
+        kind="upload",
+        filename="statement.csv",
+        source_path=str(path),
+        status=ImportJobStatusEnum.queued,
+        bytes_total=os.path.getsize(path),
+    )
+    db.add(job)
+    db.commit()
+    return job
+
+
+def _crash_after_first_batch(monkeypatch):
+    calls = []
+    insert = jobs.insert_transactions
+
+    def flaky(db, frame, user_id):
+        calls.append(len(frame))
+        if len(calls) == 2:
+            raise RuntimeError("worker died")
+        return insert(db, frame, user_id)
+
+    monkeypatch.setattr(jobs, "insert_transactions", flaky)
+
+
+def test_date_format_is_checkpointed(db, two_batch_job, monkeypatch):
+    _crash_after_first_batch(monkeypatch)
+    jobs.run_import_job(two_batch_job.id)
+
+    db.expire_all()
+    job = db.get(ImportJob, two_batch_job.id)
+    assert job.batches_committed == 1
+    assert job.date_format == "%d/%m/%Y"
+
+
+def test_resumed_job_reuses_the_first_batch_date_format(db, two_batch_job, monkeypatch):
+    _crash_after_first_batch(monkeypatch)
+    jobs.run_import_job(two_batch_job.id)
+    monkeypatch.undo()
+    monkeypatch.setattr(jobs, "iter_frames", partial(iter_frames, chunk_rows=2))
+
+    # Take the job over as if its worker had stopped checkpointing
+    db.expire_all()
+    job = db.get(ImportJob, two_batch_job.id)
+    job.status = ImportJobStatusEnum.running
+    job.heartbeat_at = None
+    db.commit()
+    jobs.run_import_job(job.id)
+
+    db.expire_all()
+    assert db.get(ImportJob, job.id).status == ImportJobStatusEnum.completed
+    dates = {
+        description: date.date().isoformat()
+        for description, date in db.query(Transaction.description, Transaction.date)
+    }
+    assert dates == {
+        "Coffee Shop": "2024-01-25",
+        "Grocery Store": "2024-01-26",
+        "Book Shop": "2024-02-03",
+        "Bakery": "2024-02-04",
+    }
+
+
+def test_confirm_job_spools_plain_ndjson(db, monkeypatch):
+    class Deferred:
+        def submit(self, *args):
+            pass
+
+    monkeypatch.setattr(jobs, "get_job_executor", Deferred)
+    confirmed = pd.DataFrame(
+        {
+            "id": ["a", "b"],
+            "date": pd.to_datetime(["2024-01-25", "2024-02-03"]),
+            "description": ["Coffee Shop", "Book Shop"],
+            "merchant": ["Corner Cafe", None],
+            "category": ["Food & Dining", "Education"],
+            "amount": [4.5, 12.0],
+            "type": ["expense", "expense"],
+            "account": ["Checking", "Checking"],
+            "needs_review": False,
+            "reviewed": [True, False],
+            # Digit-only text must not come back as a number
+            "fingerprint": ["0123", "4567"],
+        }
+    )
+    job = jobs.create_confirm_job(db, USER_ID, confirmed)
+
+    assert os.path.isabs(job.source_path)
+    with open(job.source_path, encoding="utf-8") as spool:
+        assert json.loads(spool.readline())["merchant"] == "Corner Cafe"
+
+    jobs.run_import_job(job.id)
+
+    db.expire_all()
+    assert db.get(ImportJob, job.id).status == ImportJobStatusEnum.completed
+    stored = {
+        txn.description: (txn.date.date().isoformat(), txn.amount, txn.fingerprint)
+        for txn in db.query(Transaction)
+    }
+    assert stored == {
+        "Coffee Shop": ("2024-01-25", 4.5, "0123"),
+        "Book Shop": ("2024-02-03", 12.0, "4567"),
+    }
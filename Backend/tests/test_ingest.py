@@ -0,0 +1,66 @@
+import io
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from ingest import UploadParser, aiter_upload_frames, iter_frames
+
+STATEMENT = pd.DataFrame(
+    {
+        "date": ["2024-01-02", "2024-01-03", "2024-01-04", "2024-01-05", "2024-01-06"],
+        "description": ["Coffee", "Groceries", "Books", "Bakery", "Cinema"],
+        "amount": ["-4.50", "-52.00", "-12.00", "oops", "-9.00"],
+    }
+)
+
+
+def _parquet() -> io.BytesIO:
+    buffer = io.BytesIO()
+    pq.write_table(pa.Table.from_pandas(STATEMENT, preserve_index=False), buffer)
+    buffer.seek(0)
+    return buffer
+
+
+def _csv() -> io.BytesIO:
+    return io.BytesIO(STATEMENT.to_csv(index=False).encode())
+
+
+def test_batches_are_numbered_across_the_file():
+    for source, filename in ((_parquet(), "statement.parquet"), (_csv(), "statement.csv")):
+        frames = list(iter_frames(source, filename, chunk_rows=2))
+
+        assert [len(frame) for frame in frames] == [2, 2, 1]
+        assert [list(frame.index) for frame in frames] == [[0, 1], [2, 3], [4]]
+
+
+def test_parse_errors_report_file_rows_for_parquet():
+    parser = UploadParser()
+    for frame in iter_frames(_parquet(), "statement.parquet", chunk_rows=2):
+        parser.parse(frame)
+
+    assert [error["row"] for error in parser.errors] == [4]
+
+
+def test_upload_is_imported_one_bounded_batch_at_a_time(client, headers, monkeypatch):
+    import main
+
+    sizes = []
+
+    async def small_batches(file):
+        async for frame in aiter_upload_frames(file, chunk_rows=2):
+            sizes.append(len(frame))
+            yield frame
+
+    monkeypatch.setattr(main, "aiter_upload_frames", small_batches)
+    response = client.post(
+        "/api/upload",
+        headers=headers,
+        files={"file": ("statement.csv", _csv(), "text/csv")},
+    )
+
+    assert response.status_code == 200, response.text
+    assert sizes == [2, 2, 1]
+    body = response.json()
+    assert body["processed_count"] == 4
+    assert [error["row"] for error in body["parse_errors"]] == [4]
@@ -0,0 +1,57 @@
+from categorization import auto_categorize_transaction, normalize_transaction_text
+from database import MerchantCategory
+from merchant_index import learn_confirmed_categories
+
+USER_ID = 1
+
+
+def _mapping(db, description):
+    key = normalize_transaction_text(description, None)
+    return (
+        db.query(MerchantCategory)
+        .filter(MerchantCategory.user_id == USER_ID, MerchantCategory.merchant_key == key)
+        .one_or_none()
+    )
+
+
+def _confirm(db, description, category, txn_type, reviewed=False, amount=-5.0):
+    count = learn_confirmed_categories(
+        db, USER_ID, [(description, None, amount, category, txn_type, reviewed)]
+    )
+    db.commit()
+    return count
+
+
+def test_override_of_keyword_guess_is_stored(db):
+    guessed, txn_type, _ = auto_categorize_transaction("STARBUCKS #123", -5.0)
+    override = "Groceries" if guessed != "Groceries" else "Shopping"
+
+    assert _confirm(db, "STARBUCKS #123", override, txn_type) == 1
+    assert _mapping(db, "STARBUCKS #123").category == override
+
+
+def test_row_matching_keyword_guess_is_not_stored(db):
+    guessed, txn_type, _ = auto_categorize_transaction("STARBUCKS #123", -5.0)
+
+    assert _confirm(db, "STARBUCKS #123", guessed, txn_type) == 0
+    assert _mapping(db, "STARBUCKS #123") is None
+
+
+def test_correction_back_to_keyword_guess_deletes_mapping(db):
+    guessed, txn_type, _ = auto_categorize_transaction("STARBUCKS #123", -5.0)
+    override = "Groceries" if guessed != "Groceries" else "Shopping"
+    _confirm(db, "STARBUCKS #123", override, txn_type)
+
+    # Later rows come in categorized from the mapping, not reviewed by hand;
+    # the user sets one back to the keyword answer
+    assert _confirm(db, "STARBUCKS #123", guessed, txn_type) == 1
+    assert _mapping(db, "STARBUCKS #123") is None
+
+
+def test_reviewed_row_is_stored_even_when_it_matches_guess(db):
+    guessed, txn_type, _ = auto_categorize_transaction("STARBUCKS #123", -5.0)
+
+    assert _confirm(db, "STARBUCKS #123", guessed, txn_type, reviewed=True) == 1
+    assert _mapping(db, "STARBUCKS #123").hits == 1
+    _confirm(db, "STARBUCKS #123", guessed, txn_type, reviewed=True)
+    assert _mapping(db, "STARBUCKS #123").hits == 2
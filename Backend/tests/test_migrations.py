@@ -0,0 +1,96 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+from alembic import command
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import Session
+
+from database import ALEMBIC_CONFIG, create_tables
+from dedup import Fingerprinter, existing_fingerprints
+
+# A statement that was imported before fingerprints existed; the first two
+# rows are genuinely separate identical purchases
+STATEMENT = [
+    ("t1", datetime(2024, 3, 1), "Coffee Shop", -4.5, "Checking"),
+    ("t2", datetime(2024, 3, 1), "Coffee Shop", -4.5, "Checking"),
+    ("t3", datetime(2024, 3, 2), "Grocery Store", -52.0, "Checking"),
+]
+
+
+@pytest.fixture
+def legacy_engine(tmp_path):
+    """A database as create_all() built it before migrations existed."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    alembic_config = Config(ALEMBIC_CONFIG)
+    with engine.begin() as connection:
+        alembic_config.attributes["connection"] = connection
+        command.upgrade(alembic_config, "0001")
+        connection.execute(text("DROP TABLE alembic_version"))
+        connection.execute(
+            text(
+                "INSERT INTO users (id, email, username, hashed_password) "
+                "VALUES (1, 'a@example.com', 'a', 'x')"
+            )
+        )
+        for row_id, date, description, amount, account in STATEMENT:
+            connection.execute(
+                text(
+                    "INSERT INTO transactions "
+                    "(id, user_id, date, description, category, amount, type, status, account) "
+                    "VALUES (:id, 1, :date, :description, 'Food & Dining', :amount, "
+                    "'expense', 'completed', :account)"
+                ),
+                {
+                    "id": row_id,
+                    "date": date,
+                    "description": description,
+                    "amount": amount,
+                    "account": account,
+                },
+            )
+    yield engine
+    engine.dispose()
+
+
+def test_legacy_database_is_stamped_and_upgraded(legacy_engine):
+    create_tables(legacy_engine)
+
+    head = ScriptDirectory.from_config(Config(ALEMBIC_CONFIG)).get_current_head()
+    with legacy_engine.connect() as connection:
+        assert connection.scalar(text("SELECT version_num FROM alembic_version")) == head
+        columns = {column["name"] for column in inspect(connection).get_columns("transactions")}
+        assert {"fingerprint", "needs_review"} <= columns
+        assert connection.scalar(text("SELECT data_version FROM users")) == 0
+
+
+def test_backfilled_fingerprints_catch_a_reimport(legacy_engine):
+    create_tables(legacy_engine)
+
+    with legacy_engine.connect() as connection:
+        stored = connection.scalars(text("SELECT fingerprint FROM transactions")).all()
+    assert all(stored) and len(set(stored)) == len(STATEMENT)
+
+    reimport = pd.DataFrame(
+        STATEMENT, columns=["id", "date", "description", "amount", "account"]
+    )
+    fingerprints = Fingerprinter(1).fingerprint(reimport)
+    with Session(legacy_engine) as db:
+        assert existing_fingerprints(db, fingerprints) == set(fingerprints)
+
+
+def test_backfilled_rows_are_searchable(legacy_engine):
+    create_tables(legacy_engine)
+
+    with legacy_engine.connect() as connection:
+        found = connection.scalars(
+            text("SELECT rowid FROM transactions_fts WHERE transactions_fts MATCH 'coffee'")
+        ).all()
+    assert len(found) == 2
+
+
+def test_upgrade_is_idempotent(legacy_engine):
+    create_tables(legacy_engine)
+    create_tables(legacy_engine)
@@ -0,0 +1,86 @@
+import json
+
+import main
+from database import Transaction
+
+STATEMENT = (
+    "date,description,amount,account\n"
+    "2024-01-02,Starbucks Coffee,-4.50,Checking\n"
+    "2024-01-03,Whole Foods Market,-52.00,Checking\n"
+    "2024-01-04,ZQX HOLDINGS 0042,-18.00,Checking\n"
+    "2024-01-05,Shell Oil,-40.00,Visa\n"
+    "2024-01-06,Payroll Deposit,2500.00,Checking\n"
+)
+
+
+def _stream(client, headers):
+    with client.stream(
+        "POST",
+        "/api/upload/preview/stream",
+        headers=headers,
+        files={"file": ("statement.csv", STATEMENT.encode(), "text/csv")},
+    ) as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        return [json.loads(line) for line in response.iter_lines() if line]
+
+
+def _without_id(row):
+    return {key: value for key, value in row.items() if key != "id"}
+
+
+def _small_batches(monkeypatch):
+    frames = main.aiter_upload_frames
+
+    def batched(file):
+        return frames(file, chunk_rows=2)
+
+    monkeypatch.setattr(main, "aiter_upload_frames", batched)
+
+
+def test_rows_stream_before_a_summary_matching_the_plain_preview(client, headers, monkeypatch):
+    _small_batches(monkeypatch)
+    *rows, last = _stream(client, headers)
+
+    summary = last["summary"]
+    assert "preview" not in summary
+    assert summary["total_count"] == len(rows) == 5
+
+    plain = client.post(
+        "/api/upload/preview",
+        headers=headers,
+        files={"file": ("statement.csv", STATEMENT.encode(), "text/csv")},
+    ).json()
+    assert [_without_id(row) for row in rows] == [_without_id(row) for row in plain["preview"]]
+    assert summary["needs_review_count"] == plain["needs_review_count"]
+
+
+def test_streamed_preview_is_staged_for_confirmation(client, headers, db):
+    *_, last = _stream(client, headers)
+
+    response = client.post(
+        f"/api/upload/confirm/{last['summary']['upload_token']}",
+        headers=headers,
+        json={"overrides": []},
+    )
+
+    assert response.status_code == 200, response.text
+    assert db.query(Transaction).count() == 5
+
+
+def test_failure_part_way_ends_the_stream_with_an_error(client, headers, monkeypatch):
+    _small_batches(monkeypatch)
+    parse = main._parse_preview_batch
+    calls = []
+
+    def flaky(*args):
+        calls.append(1)
+        if len(calls) == 2:
+            raise RuntimeError("disk on fire")
+        return parse(*args)
+
+    monkeypatch.setattr(main, "_parse_preview_batch", flaky)
+    *rows, last = _stream(client, headers)
+
+    assert len(rows) == 2
+    assert last == {"error": "Error processing file: disk on fire"}
@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta
+
+from conftest import register
+
+
+def _add(client, headers, description, account="Checking", days=0):
+    response = client.post(
+        "/api/transactions",
+        headers=headers,
+        json={
+            "date": (datetime(2024, 1, 1) + timedelta(days=days)).isoformat(),
+            "description": description,
+            "category": "Shopping",
+            "amount": -10.0,
+            "type": "expense",
+            "account": account,
+        },
+    )
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+
+def _search(client, headers, q, **params):
+    response = client.get(
+        "/api/transactions/search", headers=headers, params={"q": q, **params}
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_every_match_is_reachable_through_cursors(client, headers):
+    ids = {_add(client, headers, f"Coffee shop {n}", days=n) for n in range(25)}
+    _add(client, headers, "Grocery store")
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 7, **({"cursor": cursor} if cursor else {})}
+        page = _search(client, headers, "coffee", **params)
+        seen += [txn["id"] for txn in page["transactions"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert len(seen) == len(set(seen)) == 25
+    assert set(seen) == ids
+
+
+def test_description_match_ranks_above_account_match(client, headers):
+    in_account = _add(client, headers, "Monthly fee", account="Amazon card", days=1)
+    in_description = _add(client, headers, "Amazon order", account="Checking")
+
+    ranked = [txn["id"] for txn in _search(client, headers, "amazon")["transactions"]]
+    assert ranked == [in_description, in_account]
+
+
+def test_last_word_matches_as_prefix(client, headers):
+    _add(client, headers, "Uber to Airport")
+    _add(client, headers, "Uber Eats")
+
+    found = _search(client, headers, "uber air")["transactions"]
+    assert [txn["description"] for txn in found] == ["Uber to Airport"]
+
+
+def test_other_users_rows_are_not_found(client, headers):
+    _add(client, headers, "Coffee shop")
+    other = register(client, "bob")
+
+    assert _search(client, other, "coffee")["transactions"] == []
+
+
+def test_cursor_from_another_query_is_rejected(client, headers):
+    for n in range(3):
+        _add(client, headers, f"Coffee shop {n}")
+    cursor = _search(client, headers, "coffee", limit=1)["next_cursor"]
+
+    response = client.get(
+        "/api/transactions/search",
+        headers=headers,
+        params={"q": "shop", "cursor": cursor},
+    )
+    assert response.status_code == 400
@@ -0,0 +1,76 @@
+from conftest import register
+
+ROW = {
+    "date": "2024-01-02T00:00:00",
+    "description": "Coffee Shop",
+    "category": "Food & Dining",
+    "amount": -4.5,
+    "type": "expense",
+    "account": "Checking",
+}
+
+
+def _outcomes(response):
+    assert response.status_code == 200, response.text
+    return [(result["id"], result["outcome"]) for result in response.json()["results"]]
+
+
+def _upsert(client, headers, rows):
+    return client.post(
+        "/api/transactions/batch/upsert", headers=headers, json={"transactions": rows}
+    )
+
+
+def _get(client, headers, id):
+    return client.get(f"/api/transactions/{id}", headers=headers)
+
+
+def test_upsert_creates_and_replaces(client, headers):
+    [(id, outcome)] = _outcomes(_upsert(client, headers, [ROW]))
+    assert outcome == "created"
+
+    results = _outcomes(
+        _upsert(client, headers, [{**ROW, "id": id, "amount": -6.0}, {**ROW, "id": "new-id"}])
+    )
+
+    assert results == [(id, "updated"), ("new-id", "created")]
+    assert _get(client, headers, id).json()["amount"] == -6.0
+
+
+def test_upsert_never_touches_another_users_transaction(client, headers):
+    [(id, _)] = _outcomes(_upsert(client, headers, [ROW]))
+    mallory = register(client, "mallory")
+
+    response = _upsert(client, mallory, [{**ROW, "id": id, "description": "Hijacked"}])
+
+    assert _outcomes(response) == [(id, "conflict")]
+    assert response.json()["results"][0]["detail"] == "Id is already in use"
+    assert _get(client, headers, id).json()["description"] == "Coffee Shop"
+    assert _get(client, mallory, id).status_code == 404
+
+
+def test_upsert_rejects_duplicate_ids_in_one_batch(client, headers):
+    results = _outcomes(
+        _upsert(client, headers, [{**ROW, "id": "dup"}, {**ROW, "id": "dup", "amount": -9.0}])
+    )
+
+    assert results == [("dup", "created"), ("dup", "conflict")]
+    assert _get(client, headers, "dup").json()["amount"] == -4.5
+
+
+def test_update_and_delete_skip_other_users_rows(client, headers):
+    [(id, _)] = _outcomes(_upsert(client, headers, [ROW]))
+    mallory = register(client, "mallory")
+
+    updated = client.post(
+        "/api/transactions/batch/update",
+        headers=mallory,
+        json={"ids": [id], "changes": {"category": "Shopping"}},
+    )
+    deleted = client.post(
+        "/api/transactions/batch/delete", headers=mallory, json={"ids": [id, "missing"]}
+    )
+
+    assert _outcomes(updated) == [(id, "not_found")]
+    assert _outcomes(deleted) == [(id, "not_found"), ("missing", "not_found")]
+    assert _get(client, headers, id).json()["category"] == "Food & Dining"
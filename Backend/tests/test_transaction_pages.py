@@ -0,0 +1,144 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy.dialects.postgresql import asyncpg, psycopg2
+
+from conftest import register
+from database import Transaction
+from pagination import encode_cursor
+from transaction_query import _driver_parameters, filter_transactions
+
+
+def _add(client, headers, amount, days, category="Shopping"):
+    response = client.post(
+        "/api/transactions",
+        headers=headers,
+        json={
+            "date": (datetime(2024, 1, 1) + timedelta(days=days)).isoformat(),
+            "description": f"Purchase {days}",
+            "category": category,
+            "amount": amount,
+            "type": "expense",
+            "account": "Checking",
+        },
+    )
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def _pages(client, headers, **params):
+    pages, cursor = [], None
+    while True:
+        response = client.get(
+            "/api/transactions",
+            headers=headers,
+            params={**params, **({"cursor": cursor} if cursor else {})},
+        )
+        assert response.status_code == 200, response.text
+        page = response.json()
+        pages.append(page)
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return pages
+
+
+def test_cursors_walk_every_row_once_in_order(client, headers):
+    # Repeated amounts: the id tiebreak must keep ties from being skipped
+    created = [_add(client, headers, -float(n % 3), days=n) for n in range(11)]
+
+    pages = _pages(client, headers, limit=4, sort="amount", order="asc")
+
+    assert [len(page["transactions"]) for page in pages] == [4, 4, 3]
+    rows = [txn for page in pages for txn in page["transactions"]]
+    expected = sorted(created, key=lambda txn: (txn["amount"], txn["id"]))
+    assert [txn["id"] for txn in rows] == [txn["id"] for txn in expected]
+    assert pages[0]["total_count"] == 11
+    assert pages[1]["total_count"] is None
+
+
+def test_default_order_is_newest_first(client, headers):
+    for n in range(5):
+        _add(client, headers, -1.0, days=n)
+
+    pages = _pages(client, headers, limit=2)
+
+    dates = [txn["date"] for page in pages for txn in page["transactions"]]
+    assert dates == sorted(dates, reverse=True)
+
+
+def test_filters_apply_to_every_page(client, headers):
+    for n in range(6):
+        _add(client, headers, -1.0, days=n, category="Groceries" if n % 2 else "Shopping")
+
+    pages = _pages(client, headers, limit=2, category="Groceries")
+
+    rows = [txn for page in pages for txn in page["transactions"]]
+    assert len(rows) == 3
+    assert {txn["category"] for txn in rows} == {"Groceries"}
+
+
+def test_cursor_from_another_sort_is_rejected(client, headers):
+    for n in range(3):
+        _add(client, headers, -1.0, days=n)
+    cursor = _pages(client, headers, limit=1)[0]["next_cursor"]
+
+    for params in ({"sort": "amount"}, {"order": "asc"}, {}):
+        response = client.get(
+            "/api/transactions",
+            headers=headers,
+            params={"limit": 1, "cursor": cursor if params else "not-a-cursor", **params},
+        )
+        assert response.status_code == 400
+
+
+def test_pages_only_show_the_callers_rows(client, headers):
+    _add(client, headers, -1.0, days=0)
+    other = register(client, "bob")
+
+    assert _pages(client, other)[0]["transactions"] == []
+
+
+def test_tampered_cursor_values_are_rejected(client, headers):
+    _add(client, headers, -1.0, days=0)
+
+    for sort, values in [
+        ("date", [{"$gt": 1}, "id"]),
+        ("date", ["2024-01-01T00:00:00", 7]),
+        ("amount", ["1.0", "id"]),
+        ("amount", [True, "id"]),
+        ("amount", [[1.0], "id"]),
+        ("description", [None, "id"]),
+    ]:
+        cursor = encode_cursor([sort, True, *values])
+        response = client.get(
+            "/api/transactions",
+            headers=headers,
+            params={"sort": sort, "order": "desc", "cursor": cursor},
+        )
+        assert response.status_code == 400, (sort, values)
+
+    cursor = encode_cursor(["date", 1, "2024-01-01T00:00:00", "id"])
+    response = client.get("/api/transactions", headers=headers, params={"cursor": cursor})
+    assert response.status_code == 400
+
+
+def test_estimate_query_keeps_values_bound():
+    statement = filter_transactions(
+        1, categories=["Fees :refund", "Shopping"], type="expense"
+    ).with_only_columns(Transaction.id)
+
+    compiled = statement.compile(
+        dialect=psycopg2.dialect(), compile_kwargs={"render_postcompile": True}
+    )
+    assert ":refund" not in compiled.string
+    assert _driver_parameters(compiled) == {
+        "user_id_1": 1,
+        "category_1_1": "Fees :refund",
+        "category_1_2": "Shopping",
+        "type_1": "expense",
+    }
+
+    compiled = statement.compile(
+        dialect=asyncpg.dialect(), compile_kwargs={"render_postcompile": True}
+    )
+    # Positional drivers get the values in placeholder order
+    assert _driver_parameters(compiled) == (1, "expense", "Fees :refund", "Shopping")
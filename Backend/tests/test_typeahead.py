@@ -0,0 +1,96 @@
+from datetime import datetime
+
+import typeahead
+from typeahead import PrefixTrie, build_trie
+
+
+def _add(client, headers, description, category):
+    response = client.post(
+        "/api/transactions",
+        headers=headers,
+        json={
+            "date": datetime(2024, 1, 1).isoformat(),
+            "description": description,
+            "category": category,
+            "amount": -10.0,
+            "type": "expense",
+            "account": "Checking",
+        },
+    )
+    assert response.status_code == 201, response.text
+
+
+def _suggest(client, headers, description, **params):
+    return client.get(
+        "/api/categorize/suggest",
+        headers=headers,
+        params={"description": description, "mode": "typeahead", **params},
+    )
+
+
+def test_lookup_ranks_categories_by_weight_under_the_prefix():
+    trie = build_trie(
+        [("zorb market", "Shopping", 3), ("zorb cafe", "Food & Dining", 1), ("zed", "Travel", 5)]
+    )
+
+    assert trie.lookup("zorb") == [("Shopping", 0.75), ("Food & Dining", 0.25)]
+    assert trie.lookup("zorb c") == [("Food & Dining", 1.0)]
+    assert trie.lookup("zq") == []
+    assert trie.lookup("") == []
+
+
+def test_lookup_keeps_top_k_and_reuses_the_deepest_node():
+    trie = PrefixTrie(max_depth=4, top_k=2)
+    for category, weight in [("A", 1), ("B", 2), ("C", 3)]:
+        trie.add("abcdef", category, weight)
+    trie.finalize()
+
+    assert [category for category, _ in trie.lookup("ab")] == ["C", "B"]
+    # Past max_depth every prefix lands on the same node
+    assert trie.lookup("abcdzz") == trie.lookup("abcd")
+    assert trie.node_count == 5
+
+
+def test_cache_evicts_least_recently_used_tries_over_the_node_budget(monkeypatch):
+    monkeypatch.setattr(typeahead, "TYPEAHEAD_MAX_NODES", 12)
+    monkeypatch.setattr(typeahead, "_user_tries", type(typeahead._user_tries)())
+    monkeypatch.setattr(typeahead, "_cached_nodes", 0)
+    tries = {user_id: build_trie([(f"user{user_id}", "Shopping", 1)]) for user_id in (1, 2, 3)}
+
+    typeahead._cache_user_trie(1, tries[1])
+    typeahead._cache_user_trie(2, tries[2])
+    # Replacing a user's trie does not count its old nodes twice
+    typeahead._cache_user_trie(1, tries[1])
+    assert list(typeahead._user_tries) == [2, 1]
+
+    typeahead._cache_user_trie(3, tries[3])
+    assert list(typeahead._user_tries) == [1, 3]
+    assert typeahead._cached_nodes == tries[1].node_count + tries[3].node_count
+
+    typeahead.invalidate_user_trie(1)
+    assert typeahead._cached_nodes == tries[3].node_count
+
+
+def test_typeahead_mode_draws_on_the_users_history(client, headers):
+    for _ in range(3):
+        _add(client, headers, "Zorblax Emporium", "Shopping")
+    _add(client, headers, "Zorblax Eatery", "Food & Dining")
+
+    response = _suggest(client, headers, "zorbl")
+    assert response.status_code == 200, response.text
+    suggestions = response.json()["suggestions"]
+    assert suggestions[0] == {"category": "Shopping", "confidence": 0.75}
+
+    # A new transaction drops the cached trie
+    _add(client, headers, "Quuxley Books", "Education")
+    suggestions = _suggest(client, headers, "quux").json()["suggestions"]
+    assert suggestions[0]["category"] == "Education"
+
+
+def test_suggest_limit_is_bounded(client, headers):
+    assert _suggest(client, headers, "coffee", limit=0).status_code == 422
+    assert _suggest(client, headers, "coffee", limit=21).status_code == 422
+
+    response = _suggest(client, headers, "coffee", limit=1)
+    assert response.status_code == 200
+    assert len(response.json()["suggestions"]) <= 1
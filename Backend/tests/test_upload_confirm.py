@@ -0,0 +1,57 @@
+from database import MerchantCategory, Transaction
+from main import _training_rows
+
+STATEMENT = (
+    "date,description,amount,account\n"
+    "2024-01-02,ZQX HOLDINGS 0042,-18.00,Checking\n"
+    "2024-01-03,FLURB 88,-25.00,Checking\n"
+)
+
+
+def _preview(client, headers):
+    response = client.post(
+        "/api/upload/preview",
+        headers=headers,
+        files={"file": ("statement.csv", STATEMENT.encode(), "text/csv")},
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def _user_id(client, headers):
+    return client.get("/api/auth/me", headers=headers).json()["id"]
+
+
+def test_overridden_staged_row_is_stored_as_reviewed(client, headers, db):
+    preview = _preview(client, headers)
+    flagged = {row["description"]: row for row in preview["preview"]}
+    assert all(row["needs_review"] for row in flagged.values())
+    overridden = flagged["ZQX HOLDINGS 0042"]["id"]
+
+    response = client.post(
+        f"/api/upload/confirm/{preview['upload_token']}",
+        headers=headers,
+        json={"overrides": [{"id": overridden, "category": "Groceries"}]},
+    )
+    assert response.status_code == 200, response.text
+
+    stored = {txn.description: txn for txn in db.query(Transaction)}
+    assert stored["ZQX HOLDINGS 0042"].needs_review is False
+    assert stored["ZQX HOLDINGS 0042"].category == "Groceries"
+    # Left as suggested: still nobody has reviewed it
+    assert stored["FLURB 88"].needs_review is True
+
+    user_id = _user_id(client, headers)
+    training = _training_rows(db, user_id)
+    assert [row[0] for row in training] == ["ZQX HOLDINGS 0042"]
+    learned = db.query(MerchantCategory).filter(MerchantCategory.user_id == user_id).all()
+    assert [(mapping.category, mapping.hits) for mapping in learned] == [("Groceries", 1)]
+
+
+def test_confirmed_rows_are_stored_as_reviewed(client, headers, db):
+    preview = _preview(client, headers)
+
+    response = client.post("/api/upload/confirm", headers=headers, json=preview["preview"])
+    assert response.status_code == 200, response.text
+
+    assert {txn.needs_review for txn in db.query(Transaction)} == {False}
@@ -0,0 +1,94 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+from database import CategorizationRule, TransactionTypeEnum
+from user_rules import UserRuleMatcher
+
+ROWS = [
+    ("AMAZON MKTP US", "Amazon", "Visa", 25.0),
+    ("AMAZON PRIME", "Amazon", "Visa", 139.0),
+    ("rent", None, "Checking", 1800.0),
+    ("Corner Cafe", None, "Checking", 4.0),
+    ("ACME PAYROLL", None, "Checking", -2500.0),
+]
+
+
+def _rule(rule_id, pattern, category, **fields):
+    return CategorizationRule(id=rule_id, pattern=pattern, category=category, **fields)
+
+
+def _matcher():
+    return UserRuleMatcher(
+        [
+            _rule(1, "amazon", "Shopping", field="description", match_type="contains"),
+            # Higher priority, but only for large amounts
+            _rule(
+                2, "amazon", "Subscriptions",
+                field="merchant", match_type="contains", priority=5, min_amount=100,
+            ),
+            _rule(3, "rent", "Housing", field="description", match_type="equals"),
+            _rule(
+                4, "payroll", "Salary",
+                field="description", match_type="contains", type=TransactionTypeEnum.income,
+            ),
+        ]
+    )
+
+
+def test_rules_apply_in_priority_order_within_amount_limits():
+    matcher = _matcher()
+
+    assert [matcher.match(*row) for row in ROWS] == [
+        ("Shopping", "expense"),
+        ("Subscriptions", "expense"),
+        ("Housing", "expense"),
+        None,
+        ("Salary", "income"),
+    ]
+
+
+def test_columns_match_row_by_row_rules():
+    matcher = _matcher()
+    descriptions, merchants, accounts, amounts = zip(*ROWS)
+
+    matched, categories, types = matcher.match_columns(
+        pd.Series(descriptions, dtype=object),
+        pd.Series(merchants, dtype=object).fillna(""),
+        pd.Series(accounts, dtype=object),
+        np.asarray(amounts),
+    )
+
+    for index, row in enumerate(ROWS):
+        expected = matcher.match(*row)
+        assert matched[index] == (expected is not None)
+        if expected is not None:
+            assert (categories[index], types[index]) == expected
+
+
+def test_a_new_rule_applies_to_the_next_preview(client, headers):
+    def preview():
+        response = client.post(
+            "/api/upload/preview",
+            headers=headers,
+            files={
+                "file": (
+                    "statement.csv",
+                    io.BytesIO(b"date,description,amount\n2024-01-02,ZQX HOLDINGS 0042,-12.00\n"),
+                    "text/csv",
+                )
+            },
+        )
+        assert response.status_code == 200, response.text
+        return response.json()["preview"][0]["suggested_category"]
+
+    assert preview() != "Investment"
+
+    response = client.post(
+        "/api/rules",
+        headers=headers,
+        json={"pattern": "zqx holdings", "category": "Investment"},
+    )
+    assert response.status_code == 201, response.text
+    assert preview() == "Investment"
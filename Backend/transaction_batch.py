@@ -0,0 +1,152 @@
+"""Set-based bulk updates, deletes and upserts of a user's transactions."""
+
+import uuid
+from typing import Dict, Iterator, List, Set, Tuple
+
+from decouple import config
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import Transaction, engine
+
+# Most ids or rows accepted in one batch request
+TRANSACTION_BATCH_MAX_ITEMS = config("TRANSACTION_BATCH_MAX_ITEMS", default=10000, cast=int)
+
+# Ids bound per IN (...) list, well under SQLite's variable limit
+_IN_CHUNK = 5000
+
+# Session objects are not touched by batch statements, so there is nothing
+# to synchronize
+_NO_SYNC = {"synchronize_session": False}
+
+
+def _chunks(ids: List[str]) -> Iterator[List[str]]:
+    for start in range(0, len(ids), _IN_CHUNK):
+        yield ids[start:start + _IN_CHUNK]
+
+
+async def _owned_ids(db: AsyncSession, user_id: int, ids: List[str]) -> Set[str]:
+    owned = set()
+    for chunk in _chunks(ids):
+        owned.update(
+            await db.scalars(
+                select(Transaction.id).where(
+                    Transaction.user_id == user_id, Transaction.id.in_(chunk)
+                )
+            )
+        )
+    return owned
+
+
+async def _apply(db: AsyncSession, user_id: int, ids: List[str], statement) -> Set[str]:
+    """Run an UPDATE or DELETE over ``ids`` in chunks; the ids it matched."""
+    matched = set()
+    returning = engine.dialect.update_returning and engine.dialect.delete_returning
+    for chunk in _chunks(ids):
+        chunk_statement = statement.where(
+            Transaction.user_id == user_id, Transaction.id.in_(chunk)
+        ).execution_options(**_NO_SYNC)
+        if returning:
+            result = await db.execute(chunk_statement.returning(Transaction.id))
+            matched.update(result.scalars())
+        else:
+            matched |= await _owned_ids(db, user_id, chunk)
+            await db.execute(chunk_statement)
+    return matched
+
+
+async def update_transactions(
+    db: AsyncSession, user_id: int, ids: List[str], changes: Dict
+) -> Dict[str, str]:
+    """
+    Apply the same changes to many of a user's transactions.
+
+    One UPDATE per ``_IN_CHUNK`` ids; nothing is committed here.
+
+    Args:
+        db: Async (or threaded) session
+        user_id: Owner of the transactions
+        ids: Transaction ids; duplicates are ignored
+        changes: Column name -> new value
+
+    Returns:
+        id -> "updated" or "not_found"
+    """
+    ids = list(dict.fromkeys(ids))
+    updated = await _apply(db, user_id, ids, update(Transaction).values(**changes))
+    return {id: "updated" if id in updated else "not_found" for id in ids}
+
+
+async def delete_transactions(
+    db: AsyncSession, user_id: int, ids: List[str]
+) -> Dict[str, str]:
+    """
+    Delete many of a user's transactions.
+
+    One DELETE per ``_IN_CHUNK`` ids; nothing is committed here.
+
+    Args:
+        db: Async (or threaded) session
+        user_id: Owner of the transactions
+        ids: Transaction ids; duplicates are ignored
+
+    Returns:
+        id -> "deleted" or "not_found"
+    """
+    ids = list(dict.fromkeys(ids))
+    deleted = await _apply(db, user_id, ids, delete(Transaction))
+    return {id: "deleted" if id in deleted else "not_found" for id in ids}
+
+
+async def upsert_transactions(
+    db: AsyncSession, user_id: int, rows: List[Dict]
+) -> List[Tuple[str, str, str]]:
+    """
+    Create or replace many of a user's transactions.
+
+    Rows whose id belongs to the user replace it; rows without an id, or
+    with an id not used yet, are created. That is one SELECT per
+    ``_IN_CHUNK`` ids, then one executemany UPDATE and one executemany
+    INSERT. Nothing is committed here.
+
+    Args:
+        db: Async (or threaded) session
+        user_id: Owner of the transactions
+        rows: Transaction fields, each with an optional "id"
+
+    Returns:
+        (id, outcome, detail) per row, in order; outcome is "created",
+        "updated" or "conflict"
+    """
+    given = list(dict.fromkeys(row["id"] for row in rows if row.get("id")))
+    owners = {}
+    for chunk in _chunks(given):
+        owners.update(
+            (await db.execute(
+                select(Transaction.id, Transaction.user_id).where(Transaction.id.in_(chunk))
+            )).all()
+        )
+
+    results, updates, inserts, seen = [], [], [], set()
+    for row in rows:
+        id = row.get("id") or str(uuid.uuid4())
+        if id in seen:
+            results.append((id, "conflict", "Duplicate id in batch"))
+            continue
+        seen.add(id)
+        if id not in owners:
+            inserts.append({**row, "id": id, "user_id": user_id})
+            results.append((id, "created", None))
+        elif owners[id] == user_id:
+            updates.append({**row, "id": id})
+            results.append((id, "updated", None))
+        else:
+            results.append((id, "conflict", "Id is already in use"))
+
+    # Bulk UPDATE by primary key; ownership was checked above in the same
+    # transaction
+    if updates:
+        await db.execute(update(Transaction).execution_options(**_NO_SYNC), updates)
+    if inserts:
+        await db.execute(insert(Transaction), inserts)
+    return results
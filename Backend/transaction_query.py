@@ -0,0 +1,184 @@
+"""SQL for filtered, sorted and keyset-paginated transaction listings."""
+
+import json
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from decouple import config
+from sqlalchemy import Select, and_, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.compiler import SQLCompiler
+
+from database import Transaction, TransactionTypeEnum, engine
+from pagination import decode_cursor, encode_cursor
+
+# Matching rows counted exactly; larger totals are estimated
+TRANSACTIONS_COUNT_CAP = config("TRANSACTIONS_COUNT_CAP", default=10000, cast=int)
+
+SORT_COLUMNS = {
+    "date": Transaction.date,
+    "amount": Transaction.amount,
+    "description": Transaction.description,
+    "category": Transaction.category,
+    "account": Transaction.account,
+}
+
+
+def filter_transactions(
+    user_id: int,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    categories: Optional[List[str]] = None,
+    type: Optional[str] = None,
+    account: Optional[str] = None,
+    min_amount: Optional[float] = None,
+    max_amount: Optional[float] = None,
+) -> Select:
+    """
+    Build the filtered listing query for one user.
+
+    Every filter is an indexed predicate: user_id leads each composite
+    index, and category/account equality is followed by date.
+
+    Args:
+        user_id: Owner of the transactions
+        date_from: Earliest date, inclusive
+        date_to: Latest date, inclusive
+        categories: Only these categories
+        type: "income" or "expense"
+        account: Only this account
+        min_amount: Smallest amount, inclusive
+        max_amount: Largest amount, inclusive
+
+    Returns:
+        Unordered select of ``Transaction`` rows
+    """
+    conditions = [Transaction.user_id == user_id]
+    if date_from is not None:
+        conditions.append(Transaction.date >= date_from)
+    if date_to is not None:
+        conditions.append(Transaction.date <= date_to)
+    if categories:
+        conditions.append(
+            Transaction.category == categories[0]
+            if len(categories) == 1
+            else Transaction.category.in_(categories)
+        )
+    if type is not None:
+        conditions.append(Transaction.type == TransactionTypeEnum(type))
+    if account is not None:
+        conditions.append(Transaction.account == account)
+    if min_amount is not None:
+        conditions.append(Transaction.amount >= min_amount)
+    if max_amount is not None:
+        conditions.append(Transaction.amount <= max_amount)
+    return select(Transaction).where(*conditions)
+
+
+def order_page(
+    statement: Select,
+    sort: str = "date",
+    descending: bool = True,
+    cursor: Optional[str] = None,
+) -> Select:
+    """
+    Order a listing query and continue it after ``cursor``.
+
+    Rows are ordered on (sort column, id); id ascends either way so
+    the key is unique and a cursor names exactly one position.
+
+    Raises:
+        ValueError: If the cursor is malformed or was issued for another sort
+    """
+    column = SORT_COLUMNS[sort]
+    statement = statement.order_by(
+        column.desc() if descending else column.asc(), Transaction.id
+    )
+    if cursor is None:
+        return statement
+
+    cursor_sort, cursor_descending, value, last_id = decode_cursor(cursor, 4)
+    if cursor_sort != sort or cursor_descending is not descending:
+        raise ValueError("Cursor belongs to a different sort order")
+    # Checked before they reach the query, where a wrong type fails late
+    expected = (int, float) if sort == "amount" else str
+    if isinstance(value, bool) or not isinstance(value, expected) or not isinstance(last_id, str):
+        raise ValueError("Invalid cursor")
+    if sort == "date":
+        value = datetime.fromisoformat(value)
+    past = column < value if descending else column > value
+    return statement.where(or_(past, and_(column == value, Transaction.id > last_id)))
+
+
+def page_cursor(transaction: Transaction, sort: str = "date", descending: bool = True) -> str:
+    """Cursor for the page that follows ``transaction``."""
+    value = getattr(transaction, sort)
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    return encode_cursor([sort, descending, value, transaction.id])
+
+
+async def count_transactions(
+    db: AsyncSession,
+    statement: Select,
+    cap: int = TRANSACTIONS_COUNT_CAP,
+) -> Tuple[int, bool]:
+    """
+    Count the rows of a filtered listing without scanning all of them.
+
+    At most ``cap + 1`` index entries are read. Beyond the cap, PostgreSQL
+    reports the planner's row estimate; other databases report ``cap`` as a
+    lower bound.
+
+    Args:
+        db: Async (or threaded) session
+        statement: Query from ``filter_transactions``
+        cap: Largest total counted exactly
+
+    Returns:
+        (count, is_estimate)
+    """
+    matching = statement.with_only_columns(Transaction.id).order_by(None)
+    exact = await db.scalar(
+        select(func.count()).select_from(matching.limit(cap + 1).subquery())
+    )
+    if exact <= cap:
+        return exact, False
+
+    if engine.dialect.name == "postgresql":
+        estimate = await db.run_sync(_planned_rows, matching)
+        return max(estimate, exact), True
+    return cap, True
+
+
+def _driver_parameters(compiled: SQLCompiler):
+    """Bound values of ``compiled`` as the DBAPI expects them, types applied."""
+    dialect = compiled.dialect
+    processors = {
+        name: bind.type.dialect_impl(dialect).bind_processor(dialect)
+        for bind, name in compiled.bind_names.items()
+    }
+    parameters = {}
+    for name, value in compiled.params.items():
+        # An expanded IN list is bound as <name>_1, <name>_2, ...
+        processor = processors.get(name) or processors.get(name.rpartition("_")[0])
+        parameters[name] = processor(value) if processor else value
+    if compiled.positiontup is not None:
+        return tuple(parameters[name] for name in compiled.positiontup)
+    return parameters
+
+
+def _planned_rows(session: Session, statement: Select) -> int:
+    """PostgreSQL's row estimate for ``statement``, from its plan."""
+    connection = session.connection()
+    compiled = statement.compile(
+        dialect=connection.dialect, compile_kwargs={"render_postcompile": True}
+    )
+    # Values stay bound; inlined into text(), a ":word" in one became a parameter
+    plan = connection.exec_driver_sql(
+        f"EXPLAIN (FORMAT JSON) {compiled.string}", _driver_parameters(compiled)
+    ).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
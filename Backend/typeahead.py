@@ -0,0 +1,203 @@
+"""Prefix-trie typeahead for category suggestions."""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from decouple import config
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from categorization import get_rule_table, normalize_transaction_text
+from database import MerchantCategory, Transaction
+from executors import run_cpu, run_io
+
+# Characters of each entry that are indexed; longer prefixes reuse the deepest node
+TYPEAHEAD_MAX_PREFIX = config("TYPEAHEAD_MAX_PREFIX", default=32, cast=int)
+TYPEAHEAD_TOP_K = config("TYPEAHEAD_TOP_K", default=5, cast=int)
+# Seconds a user's history trie is reused before it is rebuilt
+TYPEAHEAD_TTL = config("TYPEAHEAD_TTL", default=300, cast=int)
+# Trie nodes kept in memory across all users' history tries
+TYPEAHEAD_MAX_NODES = config("TYPEAHEAD_MAX_NODES", default=2_000_000, cast=int)
+
+
+class PrefixTrie:
+    """
+    Character trie whose nodes hold precomputed top-k category weights.
+
+    Every entry adds its weight to each node along its path, and
+    ``finalize`` turns those totals into a sorted top-k list, so a lookup
+    is just a walk of ``len(prefix)`` dict hops.
+    """
+
+    def __init__(self, max_depth: int = TYPEAHEAD_MAX_PREFIX, top_k: int = TYPEAHEAD_TOP_K):
+        self.max_depth = max_depth
+        self.top_k = top_k
+        # node = [children, category weights, later replaced by the top-k list]
+        self._root: list = [{}, {}]
+        self.node_count = 1
+
+    def add(self, text: str, category: str, weight: float = 1.0) -> None:
+        node = self._root
+        for char in text[:self.max_depth]:
+            child = node[0].get(char)
+            if child is None:
+                child = node[0][char] = [{}, {}]
+                self.node_count += 1
+            node = child
+            node[1][category] = node[1].get(category, 0.0) + weight
+
+    def finalize(self) -> "PrefixTrie":
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            weights = node[1]
+            total = sum(weights.values())
+            ranked = sorted(weights.items(), key=lambda item: item[1], reverse=True)
+            node[1] = [
+                (category, round(weight / total, 2))
+                for category, weight in ranked[:self.top_k]
+            ] if total else []
+            stack.extend(node[0].values())
+        return self
+
+    def lookup(self, prefix: str) -> List[Tuple[str, float]]:
+        """Return the top-k (category, confidence) pairs under ``prefix``."""
+        if not prefix:
+            return []
+        node = self._root
+        for char in prefix[:self.max_depth]:
+            node = node[0].get(char)
+            if node is None:
+                return []
+        return node[1]
+
+
+_keyword_trie: Optional[Tuple[str, PrefixTrie]] = None
+_user_tries: "OrderedDict[int, Tuple[float, PrefixTrie]]" = OrderedDict()
+_cached_nodes = 0
+_lock = threading.Lock()
+
+
+def get_keyword_trie() -> PrefixTrie:
+    """Return the trie over the current keyword rules, rebuilding it when they change."""
+    global _keyword_trie
+    version, table = get_rule_table()
+    if _keyword_trie is None or _keyword_trie[0] != version:
+        trie = PrefixTrie()
+        for category, keywords in table.items():
+            for keyword in keywords:
+                trie.add(keyword.lower(), category)
+        _keyword_trie = (version, trie.finalize())
+    return _keyword_trie[1]
+
+
+def _user_history(db: Session, user_id: int) -> List[Tuple[str, str, float]]:
+    """Read the (text, category, weight) entries of a user's history trie."""
+    history = (
+        db.query(Transaction.description, Transaction.category, func.count())
+        .filter(Transaction.user_id == user_id)
+        .group_by(Transaction.description, Transaction.category)
+        .all()
+    )
+    merchants = (
+        db.query(MerchantCategory.merchant_key, MerchantCategory.category, MerchantCategory.hits)
+        .filter(MerchantCategory.user_id == user_id)
+        .all()
+    )
+    return [
+        (normalize_transaction_text(description), category, count)
+        for description, category, count in history
+    ] + [(merchant_key, category, hits or 1) for merchant_key, category, hits in merchants]
+
+
+def build_trie(entries: Iterable[Tuple[str, str, float]]) -> PrefixTrie:
+    """Build and finalize a trie from (text, category, weight) entries."""
+    trie = PrefixTrie()
+    for text, category, weight in entries:
+        trie.add(text, category, weight)
+    return trie.finalize()
+
+
+def _cache_user_trie(user_id: int, trie: PrefixTrie) -> None:
+    """Keep a user's trie, evicting the least recently used ones over the node budget."""
+    global _cached_nodes
+    with _lock:
+        replaced = _user_tries.pop(user_id, None)
+        if replaced is not None:
+            _cached_nodes -= replaced[1].node_count
+        _user_tries[user_id] = (time.monotonic(), trie)
+        _cached_nodes += trie.node_count
+        while _cached_nodes > TYPEAHEAD_MAX_NODES and len(_user_tries) > 1:
+            _, (_, evicted) = _user_tries.popitem(last=False)
+            _cached_nodes -= evicted.node_count
+
+
+async def get_user_trie(db: Session, user_id: int) -> PrefixTrie:
+    """
+    Return the trie over a user's past descriptions and learned merchants.
+
+    The history is read in the I/O pool and the trie built in the CPU pool,
+    so a rebuild never runs on the event loop.
+
+    Args:
+        db: Database session
+        user_id: Owner of the history
+
+    Returns:
+        Finalized trie, weighted by how often each category was used
+    """
+    with _lock:
+        cached = _user_tries.get(user_id)
+        if cached is not None and time.monotonic() - cached[0] < TYPEAHEAD_TTL:
+            _user_tries.move_to_end(user_id)
+            return cached[1]
+
+    entries = await run_io(_user_history, db, user_id)
+    trie = await run_cpu(build_trie, entries)
+    _cache_user_trie(user_id, trie)
+    return trie
+
+
+def invalidate_user_trie(user_id: int) -> None:
+    """Drop a user's history trie after their transactions change."""
+    global _cached_nodes
+    with _lock:
+        cached = _user_tries.pop(user_id, None)
+        if cached is not None:
+            _cached_nodes -= cached[1].node_count
+
+
+def suggest(
+    text: str,
+    user_trie: Optional[PrefixTrie] = None,
+    limit: int = 3,
+) -> List[Tuple[str, float]]:
+    """
+    Suggest categories for a partially typed description.
+
+    The whole prefix is looked up in the user's history, and the word being
+    typed is looked up among the keywords. Each category keeps the higher
+    of its two confidences.
+
+    Args:
+        text: Partial description
+        user_trie: Optional trie from ``get_user_trie``
+        limit: Number of suggestions to return
+
+    Returns:
+        List of (category, confidence) pairs, best first
+    """
+    prefix = normalize_transaction_text(text)
+    if not prefix:
+        return []
+
+    scores: Dict[str, float] = {}
+    if user_trie is not None:
+        scores.update(user_trie.lookup(prefix))
+    for category, confidence in get_keyword_trie().lookup(prefix.rsplit(" ", 1)[-1]):
+        if confidence > scores.get(category, 0.0):
+            scores[category] = confidence
+
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
@@ -0,0 +1,201 @@
+"""Per-user categorization rules compiled into cached matchers."""
+
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from decouple import config
+from sqlalchemy.orm import Session
+
+from categorization import INCOME_CATEGORIES, KeywordMatcher
+from database import CategorizationRule
+
+# Compiled rule sets kept in memory at once
+USER_RULES_CACHE_SIZE = config("USER_RULES_CACHE_SIZE", default=256, cast=int)
+# Seconds a worker trusts a compiled rule set before reloading it
+USER_RULES_TTL = config("USER_RULES_TTL", default=300, cast=int)
+
+RULE_FIELDS = ("description", "merchant", "account")
+
+CompiledRule = namedtuple(
+    "CompiledRule", ["id", "category", "type", "min_amount", "max_amount"]
+)
+
+
+class UserRuleMatcher:
+    """
+    All of a user's rules compiled for one-pass evaluation.
+
+    "contains" rules of each field share one Aho-Corasick automaton and
+    "equals" rules are a dict lookup, so finding the candidate rules costs
+    O(text length) however many rules there are. Only the candidates have
+    their amount limits checked, in priority order.
+    """
+
+    def __init__(self, rules: List[CategorizationRule]):
+        ordered = sorted(rules, key=lambda rule: (-(rule.priority or 0), rule.id))
+        self.rules: List[CompiledRule] = [
+            CompiledRule(
+                rule.id,
+                rule.category,
+                rule.type.value if rule.type is not None else None,
+                rule.min_amount,
+                rule.max_amount,
+            )
+            for rule in ordered
+        ]
+
+        self._equals: Dict[str, Dict[str, List[int]]] = {}
+        contains: Dict[str, Dict[str, List[str]]] = {}
+        for index, rule in enumerate(ordered):
+            pattern = rule.pattern.strip().lower()
+            if rule.match_type == "equals":
+                self._equals.setdefault(rule.field, {}).setdefault(pattern, []).append(index)
+            else:
+                contains.setdefault(rule.field, {})[str(index)] = [pattern]
+
+        # field -> (automaton, automaton category index -> rule index)
+        self._contains: Dict[str, Tuple[KeywordMatcher, List[int]]] = {
+            field: (matcher, [int(name) for name in matcher.categories])
+            for field, matcher in (
+                (field, KeywordMatcher(table)) for field, table in contains.items()
+            )
+        }
+
+    def candidates(
+        self,
+        description: Optional[str],
+        merchant: Optional[str],
+        account: Optional[str],
+    ) -> List[int]:
+        """Return indices of the rules whose text condition holds, best first."""
+        found = set()
+        for field, text in zip(RULE_FIELDS, (description, merchant, account)):
+            text = (text or "").lower()
+            equals = self._equals.get(field)
+            if equals:
+                found.update(equals.get(text.strip(), ()))
+            compiled = self._contains.get(field)
+            if compiled:
+                matcher, rule_indices = compiled
+                for pattern_index in matcher.scan(text):
+                    found.update(rule_indices[i] for i in matcher.postings[pattern_index])
+        return sorted(found)
+
+    def _pick(self, candidates: List[int], amount: float) -> Optional[Tuple[str, str]]:
+        for index in candidates:
+            rule = self.rules[index]
+            if rule.min_amount is not None and amount < rule.min_amount:
+                continue
+            if rule.max_amount is not None and amount > rule.max_amount:
+                continue
+            if rule.type is not None:
+                txn_type = rule.type
+            elif rule.category in INCOME_CATEGORIES:
+                txn_type = "income"
+            else:
+                txn_type = "expense" if amount >= 0 else "income"
+            return rule.category, txn_type
+        return None
+
+    def match(
+        self,
+        description: Optional[str],
+        merchant: Optional[str],
+        account: Optional[str],
+        amount: float,
+    ) -> Optional[Tuple[str, str]]:
+        """
+        Apply the rules to one transaction.
+
+        Returns:
+            Tuple of (category, transaction_type) from the first matching
+            rule, or None
+        """
+        candidates = self.candidates(description, merchant, account)
+        return self._pick(candidates, amount) if candidates else None
+
+    def match_columns(
+        self,
+        descriptions: pd.Series,
+        merchants: pd.Series,
+        accounts: pd.Series,
+        amounts: np.ndarray,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Apply the rules to whole columns.
+
+        Text conditions are evaluated once per distinct (description,
+        merchant, account) triple; amount limits only for rows that have
+        candidate rules.
+
+        Returns:
+            Tuple of (matched mask, category, transaction_type) arrays
+        """
+        codes, unique_keys = pd.MultiIndex.from_arrays(
+            [descriptions, merchants, accounts]
+        ).factorize()
+
+        unique_candidates = [self.candidates(*key) for key in unique_keys]
+        has_candidates = np.fromiter(
+            (bool(found) for found in unique_candidates), dtype=bool, count=len(unique_keys)
+        )
+
+        matched = np.zeros(len(codes), dtype=bool)
+        categories = np.empty(len(codes), dtype=object)
+        types = np.empty(len(codes), dtype=object)
+        for row in np.flatnonzero(has_candidates[codes]):
+            result = self._pick(unique_candidates[codes[row]], float(amounts[row]))
+            if result is not None:
+                matched[row] = True
+                categories[row], types[row] = result
+
+        return matched, categories, types
+
+
+_matchers: "OrderedDict[int, Tuple[float, Optional[UserRuleMatcher]]]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def get_user_rule_matcher(db: Session, user_id: int) -> Optional[UserRuleMatcher]:
+    """
+    Return the user's compiled rules, compiling them on a cache miss.
+
+    Args:
+        db: Database session
+        user_id: Owner of the rules
+
+    Returns:
+        The compiled matcher, or None if the user has no active rules
+    """
+    with _lock:
+        cached = _matchers.get(user_id)
+        if cached is not None and time.monotonic() - cached[0] < USER_RULES_TTL:
+            _matchers.move_to_end(user_id)
+            return cached[1]
+
+    rules = (
+        db.query(CategorizationRule)
+        .filter(
+            CategorizationRule.user_id == user_id,
+            CategorizationRule.is_active.is_(True),
+        )
+        .all()
+    )
+    matcher = UserRuleMatcher(rules) if rules else None
+
+    with _lock:
+        _matchers[user_id] = (time.monotonic(), matcher)
+        _matchers.move_to_end(user_id)
+        while len(_matchers) > USER_RULES_CACHE_SIZE:
+            _matchers.popitem(last=False)
+    return matcher
+
+
+def invalidate_user_rules(user_id: int) -> None:
+    """Drop a user's compiled rules after they are edited."""
+    with _lock:
+        _matchers.pop(user_id, None)
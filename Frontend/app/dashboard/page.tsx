@@ -2,7 +2,15 @@
 
 import { useState, useEffect } from "react";
 import Link from "next/link";
-import { useQuery } from "@tanstack/react-query";
+import {
+  keepPreviousData,
+  useInfiniteQuery,
+  useQuery,
+} from "@tanstack/react-query";
+import type {
+  ColumnFiltersState,
+  SortingState,
+} from "@tanstack/react-table";
 import { useRouter } from "next/navigation";
 import { Plus, RefreshCw } from "lucide-react";
 import { DashboardHeader } from "@/components/layout/dashboard-header";
@@ -22,7 +30,26 @@ import {
   DialogTitle,
 } from "@/components/ui/dialog";
 import { TransactionForm } from "@/components/dashboard/transaction-form";
-import type { Transaction } from "@/lib/api";
+import type { Transaction, TransactionFilters } from "@/lib/api";
+
+// The table's column filters and sort order as /api/transactions params
+function toTransactionFilters(
+  sorting: SortingState,
+  columnFilters: ColumnFiltersState
+): TransactionFilters {
+  const filters: TransactionFilters = {};
+  for (const { id, value } of columnFilters) {
+    if (!value) continue;
+    if (id === "type") filters.type = value as TransactionFilters["type"];
+    if (id === "category") filters.category = [value as string];
+    if (id === "account") filters.account = value as string;
+  }
+  if (sorting.length > 0) {
+    filters.sort = sorting[0].id as TransactionFilters["sort"];
+    filters.order = sorting[0].desc ? "desc" : "asc";
+  }
+  return filters;
+}
 
 export default function DashboardPage() {
   const router = useRouter();
@@ -30,6 +57,11 @@ export default function DashboardPage() {
   const [showForm, setShowForm] = useState(false);
   const [selectedTransaction, setSelectedTransaction] =
     useState<Transaction | null>(null);
+  const [searchInput, setSearchInput] = useState("");
+  const [searchQuery, setSearchQuery] = useState("");
+  const [sorting, setSorting] = useState<SortingState>([]);
+  const [columnFilters, setColumnFilters] = useState<ColumnFiltersState>([]);
+  const transactionFilters = toTransactionFilters(sorting, columnFilters);
 
   useEffect(() => {
     const token = localStorage.getItem("access_token");
@@ -39,16 +71,50 @@ export default function DashboardPage() {
   }, []);
 
   const {
-    data: transactions = [],
+    data: transactionPages,
     isLoading: transactionsLoading,
     error: transactionsError,
     refetch: refetchTransactions,
-  } = useQuery({
-    queryKey: ["transactions", refreshKey],
-    queryFn: transactionApi.getAll,
+    fetchNextPage,
+    hasNextPage,
+    isFetchingNextPage,
+  } = useInfiniteQuery({
+    queryKey: ["transactions", transactionFilters, refreshKey],
+    queryFn: ({ pageParam }) =>
+      transactionApi.getPage(pageParam, 100, transactionFilters),
+    initialPageParam: null as string | null,
+    getNextPageParam: (lastPage) => lastPage.next_cursor,
+    // Keep showing the current rows while a new filter or sort loads
+    placeholderData: keepPreviousData,
     retry: 3,
     retryDelay: 1000,
   });
+  const transactions =
+    transactionPages?.pages.flatMap((page) => page.transactions) ?? [];
+
+  // Wait for a pause in typing before querying the search index
+  useEffect(() => {
+    const timer = setTimeout(() => setSearchQuery(searchInput.trim()), 250);
+    return () => clearTimeout(timer);
+  }, [searchInput]);
+
+  const {
+    data: searchPages,
+    fetchNextPage: fetchNextSearchPage,
+    hasNextPage: hasNextSearchPage,
+    isFetchingNextPage: isFetchingNextSearchPage,
+  } = useInfiniteQuery({
+    queryKey: ["transaction-search", searchQuery, refreshKey],
+    queryFn: ({ pageParam }) =>
+      transactionApi.search(searchQuery, 50, pageParam ?? undefined),
+    initialPageParam: null as string | null,
+    getNextPageParam: (lastPage) => lastPage.next_cursor,
+    enabled: searchQuery.length > 0,
+    placeholderData: keepPreviousData,
+  });
+  const searching = searchQuery.length > 0;
+  const searchResults =
+    searchPages?.pages.flatMap((page) => page.transactions) ?? [];
 
   const {
     data: dashboardStats,
@@ -223,7 +289,18 @@ export default function DashboardPage() {
                     await refetchTransactions();
                   },
                 })}
-                data={transactions}
+                data={searching ? searchResults : transactions}
+                hasMore={searching ? hasNextSearchPage : hasNextPage}
+                isLoadingMore={
+                  searching ? isFetchingNextSearchPage : isFetchingNextPage
+                }
+                onLoadMore={searching ? fetchNextSearchPage : fetchNextPage}
+                onSearch={setSearchInput}
+                sorting={sorting}
+                onSortingChange={setSorting}
+                columnFilters={columnFilters}
+                onColumnFiltersChange={setColumnFilters}
+                serverSide={!searching}
               />
             )}
           </div>
@@ -1,6 +1,6 @@
 "use client";
 
-import { useState } from "react";
+import { useEffect, useState } from "react";
 import {
   Table,
   TableBody,
@@ -18,8 +18,10 @@ import {
   useReactTable,
   type ColumnDef,
   type ColumnFiltersState,
+  type OnChangeFn,
   type SortingState,
 } from "@tanstack/react-table";
+import { ArrowDown, ArrowUp, ArrowUpDown } from "lucide-react";
 import { Button } from "@/components/ui/button";
 import { Input } from "@/components/ui/input";
 import {
@@ -71,39 +73,98 @@ const ALL_CATEGORIES = [
 interface DataTableProps<TData, TValue> {
   columns: ColumnDef<TData, TValue>[];
   data: TData[];
+  // Server-side pages not loaded yet; fetched when paging past the end
+  hasMore?: boolean;
+  isLoadingMore?: boolean;
+  onLoadMore?: () => unknown;
+  // Search on the server instead of filtering the loaded rows
+  onSearch?: (query: string) => void;
+  // Filter and sort state owned by the parent, e.g. to send to the server
+  sorting?: SortingState;
+  onSortingChange?: OnChangeFn<SortingState>;
+  columnFilters?: ColumnFiltersState;
+  onColumnFiltersChange?: OnChangeFn<ColumnFiltersState>;
+  // Rows arrive filtered and sorted; don't redo it over the loaded pages
+  serverSide?: boolean;
 }
 
 export function DataTable<TData, TValue>({
   columns,
   data,
+  hasMore = false,
+  isLoadingMore = false,
+  onLoadMore,
+  onSearch,
+  sorting: controlledSorting,
+  onSortingChange,
+  columnFilters: controlledColumnFilters,
+  onColumnFiltersChange,
+  serverSide = false,
 }: DataTableProps<TData, TValue>) {
-  const [sorting, setSorting] = useState<SortingState>([]);
-  const [columnFilters, setColumnFilters] = useState<ColumnFiltersState>([]);
+  const [localSorting, setLocalSorting] = useState<SortingState>([]);
+  const [localColumnFilters, setLocalColumnFilters] =
+    useState<ColumnFiltersState>([]);
+  const sorting = controlledSorting ?? localSorting;
+  const columnFilters = controlledColumnFilters ?? localColumnFilters;
   const [globalFilter, setGlobalFilter] = useState<string>("");
+  const [advanceAfterLoad, setAdvanceAfterLoad] = useState(false);
 
   const table = useReactTable({
     data,
     columns,
+    // Keep the current page when more rows are appended
+    autoResetPageIndex: false,
     getCoreRowModel: getCoreRowModel(),
     getPaginationRowModel: getPaginationRowModel(),
-    onSortingChange: setSorting,
+    manualSorting: serverSide,
+    manualFiltering: serverSide,
+    // The server orders by one column at a time
+    enableMultiSort: !serverSide,
+    onSortingChange: onSortingChange ?? setLocalSorting,
     getSortedRowModel: getSortedRowModel(),
-    onColumnFiltersChange: setColumnFilters,
+    onColumnFiltersChange: onColumnFiltersChange ?? setLocalColumnFilters,
     getFilteredRowModel: getFilteredRowModel(),
     state: {
       sorting,
       columnFilters,
-      globalFilter,
+      globalFilter: onSearch ? "" : globalFilter,
     },
   });
 
+  // A new filter or sort order starts again from the first page
+  useEffect(() => {
+    table.setPageIndex(0);
+  }, [sorting, columnFilters]);
+
+  // Move to the next page once the rows it needs have arrived
+  useEffect(() => {
+    if (advanceAfterLoad && !isLoadingMore) {
+      setAdvanceAfterLoad(false);
+      if (table.getCanNextPage()) {
+        table.nextPage();
+      }
+    }
+  }, [advanceAfterLoad, isLoadingMore, data.length]);
+
+  const handleNextPage = () => {
+    if (table.getCanNextPage()) {
+      table.nextPage();
+    } else if (hasMore && onLoadMore) {
+      setAdvanceAfterLoad(true);
+      onLoadMore();
+    }
+  };
+
   return (
     <div>
       <div className="flex flex-col md:flex-row justify-between items-start md:items-center py-4 gap-4">
         <Input
           placeholder="Search all transactions..."
           value={globalFilter}
-          onChange={(e) => setGlobalFilter(e.target.value)}
+          onChange={(e) => {
+            setGlobalFilter(e.target.value);
+            onSearch?.(e.target.value);
+          }}
           className="max-w-sm"
         />
         <div className="flex items-center gap-2 flex-wrap">
@@ -153,6 +214,7 @@ export function DataTable<TData, TValue>({
             size="sm"
             onClick={() => {
               setGlobalFilter("");
+              onSearch?.("");
               table.getColumn("type")?.setFilterValue("");
               table.getColumn("category")?.setFilterValue("");
             }}
@@ -166,16 +228,39 @@ export function DataTable<TData, TValue>({
           <TableHeader>
             {table.getHeaderGroups().map((headerGroup) => (
               <TableRow key={headerGroup.id}>
-                {headerGroup.headers.map((header) => (
-                  <TableHead key={header.id}>
-                    {header.isPlaceholder
-                      ? null
-                      : flexRender(
-                          header.column.columnDef.header,
-                          header.getContext()
-                        )}
-                  </TableHead>
-                ))}
+                {headerGroup.headers.map((header) => {
+                  if (header.isPlaceholder) {
+                    return <TableHead key={header.id} />;
+                  }
+                  const label = flexRender(
+                    header.column.columnDef.header,
+                    header.getContext()
+                  );
+                  const sorted = header.column.getIsSorted();
+                  return (
+                    <TableHead key={header.id}>
+                      {header.column.getCanSort() ? (
+                        <Button
+                          variant="ghost"
+                          size="sm"
+                          className="-ml-3 h-8"
+                          onClick={header.column.getToggleSortingHandler()}
+                        >
+                          {label}
+                          {sorted === "asc" ? (
+                            <ArrowUp className="ml-2 h-4 w-4" />
+                          ) : sorted === "desc" ? (
+                            <ArrowDown className="ml-2 h-4 w-4" />
+                          ) : (
+                            <ArrowUpDown className="ml-2 h-4 w-4" />
+                          )}
+                        </Button>
+                      ) : (
+                        label
+                      )}
+                    </TableHead>
+                  );
+                })}
               </TableRow>
             ))}
           </TableHeader>
@@ -221,7 +306,8 @@ export function DataTable<TData, TValue>({
               table.getState().pagination.pageSize,
             table.getFilteredRowModel().rows.length
           )}{" "}
-          of {table.getFilteredRowModel().rows.length} entries
+          of {table.getFilteredRowModel().rows.length}
+          {hasMore ? "+" : ""} entries
         </div>
         <Button
           variant="outline"
@@ -234,10 +320,12 @@ export function DataTable<TData, TValue>({
         <Button
           variant="outline"
           size="sm"
-          onClick={() => table.nextPage()}
-          disabled={!table.getCanNextPage()}
+          onClick={handleNextPage}
+          disabled={
+            isLoadingMore || (!table.getCanNextPage() && !hasMore)
+          }
         >
-          Next
+          {isLoadingMore ? "Loading..." : "Next"}
         </Button>
       </div>
     </div>
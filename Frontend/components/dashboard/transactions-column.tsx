@@ -95,6 +95,8 @@ export const transactionsColumns = ({
   {
     accessorKey: "status",
     header: "Status",
+    // Not a server-side sort key
+    enableSorting: false,
     cell: ({ row }) => {
       const status = row.getValue("status") as string;
 
@@ -112,6 +114,8 @@ export const transactionsColumns = ({
   {
     accessorKey: "type",
     header: "Type",
+    // Not a server-side sort key
+    enableSorting: false,
     cell: ({ row }) => {
       const type = row.getValue("type") as string;
 
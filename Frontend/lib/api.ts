@@ -145,6 +145,40 @@ export interface Transaction {
   updated_at?: string;
 }
 
+export interface TransactionPage {
+  transactions: Transaction[];
+  next_cursor: string | null;
+  total_count: number | null;
+  total_is_estimate: boolean;
+}
+
+export interface TransactionSearchResults {
+  transactions: Transaction[];
+  next_cursor: string | null;
+}
+
+export interface TransactionBatchResult {
+  id: string;
+  outcome: "created" | "updated" | "deleted" | "not_found" | "conflict";
+  detail: string | null;
+}
+
+export interface TransactionBatchResponse {
+  results: TransactionBatchResult[];
+}
+
+export interface TransactionFilters {
+  date_from?: string;
+  date_to?: string;
+  category?: string[];
+  type?: "income" | "expense";
+  account?: string;
+  min_amount?: number;
+  max_amount?: number;
+  sort?: "date" | "amount" | "description" | "category" | "account";
+  order?: "asc" | "desc";
+}
+
 export interface TransactionCreate {
   date: string;
   description: string;
@@ -238,8 +272,27 @@ export const authApi = {
 
 // Transaction API
 export const transactionApi = {
-  getAll: async (): Promise<Transaction[]> => {
-    const response = await api.get("/api/transactions");
+  getPage: async (
+    cursor?: string | null,
+    limit = 100,
+    filters: TransactionFilters = {}
+  ): Promise<TransactionPage> => {
+    const response = await api.get("/api/transactions", {
+      params: { limit, ...filters, ...(cursor ? { cursor } : {}) },
+      // Repeat list filters as ?category=a&category=b
+      paramsSerializer: { indexes: null },
+    });
+    return response.data;
+  },
+
+  search: async (
+    q: string,
+    limit = 50,
+    cursor?: string
+  ): Promise<TransactionSearchResults> => {
+    const response = await api.get("/api/transactions/search", {
+      params: { q, limit, cursor },
+    });
     return response.data;
   },
 
@@ -264,6 +317,32 @@ export const transactionApi = {
   delete: async (id: string): Promise<void> => {
     await api.delete(`/api/transactions/${id}`);
   },
+
+  // Many transactions in one request and one database transaction
+  batchUpdate: async (
+    ids: string[],
+    changes: Partial<TransactionCreate>
+  ): Promise<TransactionBatchResponse> => {
+    const response = await api.post("/api/transactions/batch/update", {
+      ids,
+      changes,
+    });
+    return response.data;
+  },
+
+  batchDelete: async (ids: string[]): Promise<TransactionBatchResponse> => {
+    const response = await api.post("/api/transactions/batch/delete", { ids });
+    return response.data;
+  },
+
+  batchUpsert: async (
+    transactions: (TransactionCreate & { id?: string })[]
+  ): Promise<TransactionBatchResponse> => {
+    const response = await api.post("/api/transactions/batch/upsert", {
+      transactions,
+    });
+    return response.data;
+  },
 };
 
 // Dashboard API